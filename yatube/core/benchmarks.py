@@ -0,0 +1,16 @@
+import time
+
+
+def measure(func, number):
+    """Вызывает func number раз и возвращает среднее время вызова
+    в секундах."""
+    started = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - started) / number
+
+
+def report(stdout, label, seconds):
+    stdout.write(
+        f'{label:<40} {seconds * 1e6:10.1f} µs  {1 / seconds:10.0f} /s'
+    )
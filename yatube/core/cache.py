@@ -0,0 +1,117 @@
+import math
+import random
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache as default_cache
+
+# Сколько секунд держится замок пересчёта: дольше любого пересчёта,
+# но недолго, если процесс с замком упал.
+LOCK_TIMEOUT = 10
+# Как часто ждущие пустого ключа запросы заглядывают в кэш.
+POLL_INTERVAL = 0.05
+
+
+class SkipCache(Exception):
+    """Результат compute, который не нужно класть в кэш.
+
+    get_or_compute вернёт value как есть и не сохранит его.
+    """
+
+    def __init__(self, value):
+        super().__init__(value)
+        self.value = value
+
+
+def should_recompute(expires, delta, beta, now):
+    """Вероятностный ранний пересчёт (XFetch).
+
+    Чем ближе срок и чем дольше пересчёт (delta секунд), тем вероятнее,
+    что запрос пересчитает значение заранее, пока остальные ещё
+    получают свежее. После срока пересчёт нужен всегда.
+    """
+    if now >= expires:
+        return True
+    if not delta or not beta:
+        return False
+    return now - delta * beta * math.log(1 - random.random()) >= expires
+
+
+def get_or_compute(key, compute, timeout, stale=0, beta=1.0,
+                   lock_timeout=LOCK_TIMEOUT, cache=default_cache):
+    """Значение из кэша или compute(), без лавины пересчётов.
+
+    В кэше лежит (значение, срок, время пересчёта) на timeout + stale
+    секунд. Пересчитывает только запрос, взявший замок (cache.add):
+    - до срока — изредка заранее, с вероятностью по XFetch;
+    - после срока, ещё stale секунд, остальные получают старое значение
+      и не ждут (stale-while-revalidate);
+    - если значения нет совсем, остальные ждут его до lock_timeout
+      секунд, а не считают его одновременно.
+    compute может бросить SkipCache(value), чтобы вернуть value без
+    сохранения в кэш.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, expires, delta = entry
+        if not should_recompute(expires, delta, beta, time.time()):
+            return value
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        try:
+            return recompute(key, compute, timeout, stale, cache)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+    if entry is not None:
+        # Пересчитывает другой запрос: до его конца хватит и старого.
+        return entry[0]
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[0]
+        if cache.get(lock_key) is None:
+            # Значение могли положить между двумя чтениями.
+            entry = cache.get(key)
+            if entry is not None:
+                return entry[0]
+            # Замок отпущен без значения: compute бросил SkipCache
+            # или упал. Считаем сами.
+            break
+    return recompute(key, compute, timeout, stale, cache)
+
+
+def recompute(key, compute, timeout, stale, cache):
+    started = time.time()
+    try:
+        value = compute()
+    except SkipCache as skip:
+        return skip.value
+    now = time.time()
+    cache.set(key, (value, now + timeout, now - started), timeout + stale)
+    return value
+
+
+@contextmanager
+def cache_lock(key, timeout=LOCK_TIMEOUT, wait=LOCK_TIMEOUT,
+               cache=default_cache):
+    """Замок на key через cache.add, общий для всех процессов.
+
+    Ждёт его не дольше wait секунд и отдаёт True, если замок взят;
+    отпускает, только если замок всё ещё свой.
+    """
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    acquired = cache.add(key, token, timeout)
+    while not acquired and time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        acquired = cache.add(key, token, timeout)
+    try:
+        yield acquired
+    finally:
+        if acquired and cache.get(key) == token:
+            cache.delete(key)
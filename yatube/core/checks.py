@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+
+SLOW_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@checks.register('performance')
+def check_performance_settings(app_configs, **kwargs):
+    """Находит заведомо медленные настройки боевого окружения."""
+    if not getattr(settings, 'PERFORMANCE_CHECKS', False):
+        return []
+    errors = []
+    if settings.DEBUG:
+        errors.append(checks.Error(
+            'DEBUG включён: каждый SQL-запрос сохраняется в памяти.',
+            id='core.E001',
+        ))
+    for options in settings.TEMPLATES:
+        processors = options.get('OPTIONS', {}).get('context_processors', [])
+        if 'django.template.context_processors.debug' in processors:
+            errors.append(checks.Error(
+                'Включён контекстный процессор debug.',
+                id='core.E002',
+            ))
+        loaders = options.get('OPTIONS', {}).get('loaders')
+        if loaders and not any(
+            isinstance(loader, (list, tuple))
+            and loader[0] == 'django.template.loaders.cached.Loader'
+            for loader in loaders
+        ):
+            errors.append(checks.Error(
+                'Шаблоны загружаются без кэширующего загрузчика.',
+                hint="Оберните загрузчики в "
+                     "'django.template.loaders.cached.Loader'.",
+                id='core.E003',
+            ))
+    for alias, database in settings.DATABASES.items():
+        if database['ENGINE'] == 'django.db.backends.sqlite3':
+            errors.append(checks.Error(
+                f'База {alias!r} работает на SQLite.',
+                id='core.E004',
+            ))
+        if not database.get('CONN_MAX_AGE'):
+            errors.append(checks.Error(
+                f'Для базы {alias!r} не включены постоянные соединения.',
+                hint='Задайте CONN_MAX_AGE.',
+                id='core.E005',
+            ))
+    backend = settings.CACHES['default']['BACKEND']
+    if backend in SLOW_CACHES:
+        errors.append(checks.Error(
+            f'Кэш по умолчанию {backend} не общий для воркеров.',
+            id='core.E006',
+        ))
+    return errors
+
+
+def ensure_fast_configuration():
+    """Прерывает запуск, если конфигурация не прошла проверки."""
+    errors = [
+        error for error in checks.run_checks(tags=['performance'])
+        if error.is_serious()
+    ]
+    if errors:
+        raise ImproperlyConfigured(
+            'Медленная конфигурация:\n'
+            + '\n'.join(str(error) for error in errors)
+        )
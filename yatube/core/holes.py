@@ -0,0 +1,6 @@
+from .pagecache import hole
+
+
+@hole('header_user', 'includes/header_user.html')
+def header_user(request):
+    return {}
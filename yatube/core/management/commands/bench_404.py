@@ -0,0 +1,40 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+
+from core.benchmarks import measure, report
+from core.views import page_not_found, render_not_found
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает пропускную способность страницы 404.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        factory = RequestFactory()
+        counter = iter(range(10 ** 9))
+
+        def make_request():
+            request = factory.get(
+                f'/wp-admin/{next(counter)}.php', REMOTE_ADDR='198.51.100.1'
+            )
+            request.user = AnonymousUser()
+            return request
+
+        report(
+            self.stdout, 'full render',
+            measure(lambda: render_not_found(make_request()), number),
+        )
+        with override_settings(NOT_FOUND_RATE_LIMIT=10 ** 9):
+            report(
+                self.stdout, 'cached body',
+                measure(lambda: page_not_found(make_request(), None), number),
+            )
+        with override_settings(NOT_FOUND_RATE_LIMIT=0):
+            report(
+                self.stdout, 'throttled client',
+                measure(lambda: page_not_found(make_request(), None), number),
+            )
@@ -0,0 +1,71 @@
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from django.views import static
+
+from core import media
+
+
+def download(view, factory, headers):
+    response = view(factory.get('/media/posts/big.jpg', **headers))
+    size = sum(len(chunk) for chunk in response)
+    response.close()
+    return size
+
+
+class Command(BaseCommand):
+    help = 'Пропускная способность отдачи больших картинок из media.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=8)
+        parser.add_argument('--clients', type=int, default=16)
+        parser.add_argument('--requests', type=int, default=64)
+
+    def handle(self, *args, **options):
+        root = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(root, 'posts'))
+            path = os.path.join(root, 'posts', 'big.jpg')
+            with open(path, 'wb') as file:
+                file.write(os.urandom(options['size_mb'] * 1024 * 1024))
+            with override_settings(MEDIA_ROOT=root):
+                self.run(root, options)
+        finally:
+            shutil.rmtree(root)
+
+    def run(self, root, options):
+        factory = RequestFactory()
+        views = {
+            'django.views.static.serve': lambda request: static.serve(
+                request, 'posts/big.jpg', document_root=root
+            ),
+            'core.media.serve': lambda request: media.serve(
+                request, 'posts/big.jpg'
+            ),
+        }
+        cases = {
+            'full file': {},
+            'range 1 MB': {'HTTP_RANGE': 'bytes=1048576-2097151'},
+        }
+        for case, headers in cases.items():
+            for label, view in views.items():
+                if headers and label.startswith('django'):
+                    # django.views.static.serve не поддерживает Range.
+                    continue
+                started = time.perf_counter()
+                with ThreadPoolExecutor(options['clients']) as pool:
+                    total = sum(pool.map(
+                        lambda _: download(view, factory, headers),
+                        range(options['requests']),
+                    ))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{case:<12} {label:<28} '
+                    f'{total / elapsed / 2 ** 20:8.0f} MB/s  '
+                    f'{options["requests"] / elapsed:8.1f} req/s'
+                )
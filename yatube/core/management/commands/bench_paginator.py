@@ -0,0 +1,60 @@
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Context, Template
+from django.template.loader import get_template
+
+from core.benchmarks import measure, report
+from core.pagination import LookaheadPaginator
+
+# Навигация до elided_pages: ссылка на каждую страницу.
+FULL_RANGE_TEMPLATE = """
+{% for i in page_obj.paginator.page_range %}
+  {% if page_obj.number == i %}
+    <li class="page-item active"><span class="page-link">{{ i }}</span></li>
+  {% else %}
+    <li class="page-item">
+      <a class="page-link" href="?page={{ i }}">{{ i }}</a>
+    </li>
+  {% endif %}
+{% endfor %}
+"""
+
+
+class Command(BaseCommand):
+    help = 'Время отрисовки навигации по страницам ленты из 1M постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10 ** 6)
+        parser.add_argument('--per-page', type=int, default=10)
+        parser.add_argument('--number', type=int, default=5)
+
+    def handle(self, *args, **options):
+        posts = range(options['posts'])
+        per_page = options['per_page']
+        number = options['number']
+        paginator = Paginator(posts, per_page)
+        middle = paginator.num_pages // 2
+        page = paginator.get_page(middle)
+        full = Template(FULL_RANGE_TEMPLATE)
+        elided = get_template('includes/paginator.html')
+        context = {'page_obj': page}
+
+        html = full.render(Context(context))
+        self.stdout.write(f'full range: {len(html) / 1024:.0f} KiB')
+        report(
+            self.stdout, 'full range',
+            measure(lambda: full.render(Context(context)), number),
+        )
+        html = elided.render(context)
+        self.stdout.write(f'elided: {len(html) / 1024:.1f} KiB')
+        report(
+            self.stdout, 'elided',
+            measure(lambda: elided.render(context), number * 1000),
+        )
+        lookahead = {
+            'page_obj': LookaheadPaginator(posts, per_page).get_page(middle)
+        }
+        report(
+            self.stdout, 'elided, no count',
+            measure(lambda: elided.render(lookahead), number * 1000),
+        )
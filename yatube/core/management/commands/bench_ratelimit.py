@@ -0,0 +1,74 @@
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.benchmarks import measure, report
+from core.ratelimit import RateLimitMiddleware
+
+LIMIT_US = 100
+
+
+class Command(BaseCommand):
+    help = 'Накладные расходы лимитера запросов на один запрос.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=20000)
+
+    def handle(self, *args, **options):
+        number = options['number']
+        factory = RequestFactory()
+        path = reverse('posts:post_create')
+        match = resolve(path)
+        counter = iter(range(10 ** 9))
+
+        def view(request):
+            return HttpResponse()
+
+        middleware = RateLimitMiddleware(view)
+
+        def make_request():
+            # Каждый запрос от нового адреса: лимит не срабатывает,
+            # меряется полный путь add + incr.
+            number = next(counter)
+            request = factory.post(
+                path, REMOTE_ADDR=f'10.{number >> 16 & 255}.'
+                                  f'{number >> 8 & 255}.{number & 255}'
+            )
+            request.user = AnonymousUser()
+            request.resolver_match = match
+            return request
+
+        def plain():
+            view(make_request())
+
+        def limited():
+            request = make_request()
+            response = middleware.process_view(request, view, (), {})
+            if response is None:
+                middleware(request)
+
+        with override_settings(
+            RATELIMIT_ENABLED=True,
+            RATELIMITS={'posts:post_create': {'rate': '1/h', 'burst': 1}},
+        ):
+            base = measure(plain, number)
+            report(self.stdout, 'without limiter', base)
+            with_limiter = measure(limited, number)
+            report(self.stdout, 'with limiter', with_limiter)
+            repeated = factory.post(path, REMOTE_ADDR='192.0.2.1')
+            repeated.user = AnonymousUser()
+            repeated.resolver_match = match
+            report(
+                self.stdout, 'throttled client',
+                measure(
+                    lambda: middleware.process_view(repeated, view, (), {}),
+                    number,
+                ),
+            )
+        overhead = with_limiter - base
+        self.stdout.write(
+            f'Накладные расходы: {overhead * 1e6:.1f} µs '
+            f'(порог {LIMIT_US} µs)'
+        )
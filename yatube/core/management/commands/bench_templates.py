@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template import Engine, RequestContext
+from django.template.backends.django import get_installed_libraries
+from django.test import RequestFactory
+from django.utils import timezone
+
+from core.benchmarks import measure, report
+from posts.models import Group, Post
+
+User = get_user_model()
+
+TEMPLATES = (
+    'posts/index.html',
+    'posts/group_list.html',
+    'posts/profile.html',
+    'posts/post_detail.html',
+)
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def make_engine(cached):
+    options = settings.TEMPLATES[0]
+    loaders = [('django.template.loaders.cached.Loader', LOADERS)]
+    return Engine(
+        dirs=options['DIRS'],
+        context_processors=options['OPTIONS']['context_processors'],
+        libraries=get_installed_libraries(),
+        loaders=loaders if cached else LOADERS,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Время отрисовки шаблонов страницы с 10 постами.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200)
+
+    def handle(self, *args, **options):
+        author = User(pk=1, username='author')
+        group = Group(pk=1, title='group', slug='group')
+        posts = [
+            Post(
+                pk=i, author=author, group=group,
+                text=f'Пост номер {i}\n' * 20, pub_date=timezone.now(),
+            )
+            for i in range(1, 11)
+        ]
+        page_obj = Paginator(posts, 10).get_page(1)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        context = {
+            'page_obj': page_obj,
+            'group': group,
+            'author': author,
+            'post': posts[0],
+            'post_count': 10,
+            'count_posts': 10,
+        }
+        for cached in (False, True):
+            engine = make_engine(cached)
+            label = 'cached loader' if cached else 'filesystem loader'
+            for name in TEMPLATES:
+                def render():
+                    engine.get_template(name).render(
+                        RequestContext(request, context)
+                    )
+                render()
+                report(
+                    self.stdout, f'{label}: {name}',
+                    measure(render, options['number']),
+                )
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.templates import warm_templates
+
+
+class Command(BaseCommand):
+    help = 'Загружает и разбирает все шаблоны заранее.'
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        loaded, errors = warm_templates()
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        self.stdout.write(
+            f'Загружено шаблонов: {loaded} '
+            f'за {time.perf_counter() - started:.2f} с'
+        )
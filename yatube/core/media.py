@@ -0,0 +1,147 @@
+import mimetypes
+import mmap
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, quote_etag
+from django.views.static import was_modified_since
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 256 * 1024
+MEDIA_CACHE_CONTROL = 'public, max-age=86400'
+
+
+class FileRange:
+    """Отрезок файла для FileResponse.
+
+    fileno() отдаёт дескриптор, уже спозиционированный на начало
+    отрезка, поэтому WSGI-сервер с wsgi.file_wrapper (gunicorn, uWSGI)
+    отправит ровно Content-Length байт через os.sendfile. Если
+    file_wrapper нет, данные читаются из отображения файла в память.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.position = start
+        self.remaining = length
+        self.map = None
+        if length:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.map[self.position:self.position + size]
+        self.position += len(data)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Возвращает (start, end) для одного диапазона или None.
+
+    Несколько диапазонов не поддерживаются: на них отвечаем целым файлом.
+    ValueError означает диапазон за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError('Unsatisfiable range')
+    return start, end
+
+
+def serve(request, path):
+    """Отдаёт загруженные файлы из MEDIA_ROOT в боевом окружении.
+
+    Поддерживает условные запросы и Range. При MEDIA_SENDFILE
+    ('nginx' или 'apache') сам файл отдаёт веб-сервер по
+    X-Accel-Redirect или X-Sendfile.
+    """
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('Файл не найден')
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404('Файл не найден')
+    if not os.path.isfile(full_path):
+        raise Http404('Файл не найден')
+
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    last_modified = http_date(stat.st_mtime)
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag or (
+        'HTTP_IF_NONE_MATCH' not in request.META
+        and not was_modified_since(
+            request.META.get('HTTP_IF_MODIFIED_SINCE'),
+            stat.st_mtime, stat.st_size,
+        )
+    ):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        if settings.MEDIA_SENDFILE == 'nginx':
+            response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + path
+        else:
+            response['X-Sendfile'] = full_path
+    else:
+        response = file_response(request, full_path, stat.st_size, etag,
+                                 last_modified, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Cache-Control'] = MEDIA_CACHE_CONTROL
+    return response
+
+
+def file_response(request, full_path, size, etag, last_modified,
+                  content_type):
+    byte_range = None
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and if_range in (None, etag, last_modified):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+    start, end = byte_range or (0, size - 1)
+    length = end - start + 1 if size else 0
+    response = FileResponse(
+        FileRange(open(full_path, 'rb'), start, length),
+        content_type=content_type,
+    )
+    response.block_size = BLOCK_SIZE
+    response['Content-Length'] = str(length)
+    response['Accept-Ranges'] = 'bytes'
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
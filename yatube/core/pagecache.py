@@ -0,0 +1,161 @@
+import hashlib
+import inspect
+import re
+import uuid
+from functools import wraps
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.http.response import HttpResponseBase
+from django.template.loader import render_to_string
+from django.utils.cache import (
+    add_never_cache_headers, patch_cache_control, patch_vary_headers,
+)
+
+from .cache import SkipCache, get_or_compute
+
+HOLE_RE = re.compile(r'<esi:include src="([^"]+)"\s*/>')
+# Адрес фрагментов; подключается в core/urls.py только при PAGE_CACHE_ESI.
+HOLE_PREFIX = 'holes/'
+
+_holes = {}
+
+
+def hole(name, template, **converters):
+    """Регистрирует дырку в кэшированной странице.
+
+    Функция получает request и аргументы дырки и возвращает контекст
+    для template. Аргументы приходят строками из адреса фрагмента,
+    converters приводят их к нужным типам, например post_id=int.
+    """
+    def decorator(func):
+        _holes[name] = (template, func, converters)
+        return func
+    return decorator
+
+
+def render_hole(request, name, kwargs):
+    try:
+        template, func, converters = _holes[name]
+    except KeyError:
+        raise Http404('Неизвестный фрагмент')
+    try:
+        arguments = inspect.signature(func).bind(request, **kwargs).arguments
+        for key, convert in converters.items():
+            if key in arguments:
+                arguments[key] = convert(arguments[key])
+    except (TypeError, ValueError):
+        raise Http404('Неверные аргументы фрагмента')
+    return render_to_string(template, func(**arguments), request)
+
+
+def hole_marker(name, kwargs):
+    src = f'/{HOLE_PREFIX}{name}/'
+    if kwargs:
+        src += '?' + urlencode(kwargs)
+    return f'<esi:include src="{src}"/>'
+
+
+def fill_holes(request, content):
+    """Подставляет в оболочку страницы фрагменты для текущего
+    пользователя, как это сделал бы ESI-прокси."""
+    def replace(match):
+        url = urlsplit(match.group(1))
+        name = url.path.rstrip('/').rsplit('/', 1)[-1]
+        return render_hole(request, name, dict(parse_qsl(url.query)))
+    return HOLE_RE.sub(replace, content)
+
+
+def accepts_esi(request):
+    return settings.PAGE_CACHE_ESI and 'ESI/1.0' in request.META.get(
+        'HTTP_SURROGATE_CAPABILITY', ''
+    )
+
+
+def invalidate_pages(*tags):
+    """Сбрасывает закэшированные страницы, помеченные этими тегами."""
+    cache.set_many(
+        {f'page_tag:{tag}': uuid.uuid4().hex for tag in tags}, None
+    )
+
+
+def page_key(request, variant, tags):
+    versions = cache.get_many([f'page_tag:{tag}' for tag in tags])
+    source = '|'.join(
+        [request.get_full_path()]
+        + [versions.get(f'page_tag:{tag}', '') for tag in tags]
+    )
+    digest = hashlib.md5(source.encode()).hexdigest()
+    return f'page:{variant}:{digest}'
+
+
+def split_cache_page(tags=None):
+    """Кэширует страницу отдельно для анонимов и для остальных.
+
+    Анонимы получают страницу из кэша целиком. Для авторизованных
+    в кэше лежит оболочка, где всё зависящее от пользователя заменено
+    на <esi:include>; дырки заполняются на каждый запрос, а при
+    PAGE_CACHE_ESI — прокси, который их понимает. Время жизни берётся
+    из PAGE_CACHE_TIMEOUTS по имени view, tags(**kwargs) возвращает
+    теги для invalidate_pages.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            timeout = settings.PAGE_CACHE_TIMEOUTS.get(
+                request.resolver_match.view_name
+            )
+            if not timeout or request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            shell = request.user.is_authenticated
+            key = page_key(
+                request,
+                'shell' if shell else 'anonymous',
+                tags(**kwargs) if tags else [],
+            )
+
+            def render():
+                request.page_shell = shell
+                response = view(request, *args, **kwargs)
+                if (response.status_code != 200 or response.cookies
+                        or request.META.get('CSRF_COOKIE_USED')):
+                    if shell and not response.streaming:
+                        response.content = fill_holes(
+                            request, response.content.decode()
+                        )
+                    raise SkipCache(response)
+                return response.content.decode(), response['Content-Type']
+
+            # Страницу после срока перерисовывает один запрос, остальные
+            # пока получают прежнюю (см. core/cache.py).
+            cached = get_or_compute(
+                key, render, timeout, stale=settings.PAGE_CACHE_STALE
+            )
+            if isinstance(cached, HttpResponseBase):
+                return cached
+            content, content_type = cached
+            if shell and accepts_esi(request):
+                response = HttpResponse(content, content_type=content_type)
+                response['Surrogate-Control'] = 'content="ESI/1.0"'
+            elif shell:
+                response = HttpResponse(
+                    fill_holes(request, content), content_type=content_type
+                )
+                patch_cache_control(response, private=True, max_age=0)
+            else:
+                response = HttpResponse(content, content_type=content_type)
+            patch_vary_headers(response, ['Cookie'])
+            return response
+        return wrapper
+    return decorator
+
+
+def hole_view(request, name):
+    """Фрагмент для ESI-прокси."""
+    response = HttpResponse(
+        render_hole(request, name, request.GET.dict())
+    )
+    add_never_cache_headers(response)
+    return response
@@ -0,0 +1,178 @@
+import json
+
+from django.core.paginator import EmptyPage, Page, PageNotAnInteger, Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# До скольких строк оценка заменяется точным COUNT: он ещё дёшев,
+# а на маленьких таблицах статистика планировщика часто неточна.
+EXACT_COUNT_LIMIT = 10000
+
+
+def elided_page_range(number, num_pages=None, has_next=False,
+                      on_each_side=2, on_ends=1):
+    """Номера страниц для навигации: края и окно вокруг текущей.
+
+    Пропуски обозначаются None, размер списка не зависит от числа
+    страниц. Если num_pages неизвестно, справа от текущей показывается
+    только следующая страница.
+    """
+    pages = []
+    if number > 1 + on_each_side + on_ends + 1:
+        pages.extend(range(1, on_ends + 1))
+        pages.append(None)
+        pages.extend(range(number - on_each_side, number + 1))
+    else:
+        pages.extend(range(1, number + 1))
+    if num_pages is None:
+        if has_next:
+            pages.append(number + 1)
+    elif number < num_pages - on_each_side - on_ends - 1:
+        pages.extend(range(number + 1, number + on_each_side + 1))
+        pages.append(None)
+        pages.extend(range(num_pages - on_ends + 1, num_pages + 1))
+    else:
+        pages.extend(range(number + 1, num_pages + 1))
+    return pages
+
+
+class LookaheadPage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def start_index(self):
+        if not self.object_list:
+            return 0
+        return (self.number - 1) * self.paginator.per_page + 1
+
+    def end_index(self):
+        return (self.number - 1) * self.paginator.per_page + len(self)
+
+
+class LookaheadPaginator(Paginator):
+    """Пагинатор без COUNT по всей таблице.
+
+    На страницу читается на один объект больше, чтобы узнать, есть ли
+    следующая. Число страниц неизвестно: num_pages равно None.
+    """
+
+    count = None
+    num_pages = None
+
+    def validate_number(self, number):
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage('That page contains no results')
+        return LookaheadPage(
+            objects[:self.per_page], number, self,
+            len(objects) > self.per_page,
+        )
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except (PageNotAnInteger, EmptyPage):
+            return self.page(1)
+
+
+class TieredPaginator(LookaheadPaginator):
+    """Лента из двух выборок подряд: object_list, а за его концом tail
+    (например, архив старых записей).
+
+    Пока страница целиком помещается в object_list, tail не читается.
+    На страницах за концом object_list смещение в tail вычисляется
+    одним COUNT по object_list — он дёшев, если это «горячая» часть.
+    tail=None — хвоста нет.
+    """
+
+    def __init__(self, object_list, tail, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.tail = tail
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        size = self.per_page + 1
+        objects = list(self.object_list[bottom:bottom + size])
+        if len(objects) < size and self.tail is not None:
+            if objects or not bottom:
+                offset = 0
+            else:
+                offset = bottom - self.object_list.count()
+            objects += self.tail[offset:offset + size - len(objects)]
+        if not objects and number > 1:
+            raise EmptyPage('That page contains no results')
+        return LookaheadPage(
+            objects[:self.per_page], number, self,
+            len(objects) > self.per_page,
+        )
+
+
+def estimate_count(queryset):
+    """Примерное число строк queryset без COUNT или None.
+
+    В PostgreSQL берётся из статистики планировщика: reltuples для
+    всей таблицы, оценка EXPLAIN для выборки с условиями. В остальных
+    базах оценивается только вся таблица, по разбросу первичных ключей.
+    """
+    connection = connections[queryset.db]
+    query = queryset.query
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            if not query.where:
+                cursor.execute(
+                    'SELECT reltuples FROM pg_class WHERE oid = %s::regclass',
+                    [queryset.model._meta.db_table],
+                )
+                row = cursor.fetchone()
+                return int(row[0]) if row and row[0] >= 0 else None
+            sql, params = query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
+    if query.where:
+        return None
+    # MIN и MAX отдельными запросами: вместе SQLite читает всю таблицу.
+    pks = queryset.model._default_manager.using(queryset.db).order_by(
+        'pk'
+    ).values_list('pk', flat=True)
+    low = pks.first()
+    if low is None:
+        return 0
+    return pks.last() - low + 1
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор, который на больших таблицах не считает строки точно.
+
+    Число страниц по оценке может оказаться больше настоящего: последние
+    страницы тогда пусты.
+    """
+
+    @cached_property
+    def count(self):
+        if not hasattr(self.object_list, 'query'):
+            return super().count
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < EXACT_COUNT_LIMIT:
+            return super().count
+        return estimate
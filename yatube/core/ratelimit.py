@@ -0,0 +1,142 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """'10/m' → интервал между токенами в миллисекундах."""
+    count, period = rate.split('/')
+    return PERIODS[period[0]] * 1000 // int(count)
+
+
+def get_client_key(request):
+    """Ключ клиента: пользователь, а для анонимов — IP."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'u{user.pk}'
+    return f'ip{request.META.get("REMOTE_ADDR", "")}'
+
+
+class TokenBucket:
+    """Ведро токенов в кэше в форме GCRA.
+
+    В ключе лежит «теоретическое время прихода» следующего запроса
+    в миллисекундах. Каждый запрос атомарно прибавляет к нему интервал
+    (incr) и проходит, пока это время опережает текущее не больше чем
+    на burst интервалов. Когда ведро полное, время отстаёт от текущего,
+    и копить токены дальше нельзя: тогда через add заводится новое
+    поколение ключа, начатое с текущего времени. Значения ключей
+    никогда не перезаписываются, поэтому параллельные запросы после
+    простоя не теряют друг друга, и блокировки не нужны.
+    """
+
+    def __init__(self, scope, rate, burst=1):
+        self.scope = scope
+        self.interval = parse_rate(rate)
+        self.burst = burst
+        # Ключ живёт заметно дольше полного наполнения ведра: при его
+        # вытеснении клиент получает полное ведро раньше срока.
+        self.timeout = max(60, math.ceil(self.interval * burst / 100))
+
+    def consume(self, client):
+        """Возвращает 0, если запрос пропущен, иначе секунды до повтора."""
+        key = f'ratelimit:{self.scope}:{client}'
+        now = int(time.time() * 1000)
+        generation = cache.get(key, 0)
+        while True:
+            due_key = f'{key}:{generation}'
+            cache.add(due_key, now, self.timeout)
+            try:
+                due = cache.incr(due_key, self.interval)
+            except ValueError:
+                # Ключ вытеснили между add и incr.
+                return 0
+            if due - self.interval >= now:
+                break
+            # Ведро было полным. Новое поколение заводит один запрос,
+            # остальные пересчитываются в нём же.
+            generation += 1
+            if cache.add(f'{key}:{generation}', now, self.timeout):
+                cache.set(key, generation, self.timeout)
+        overflow = due - now - self.burst * self.interval
+        if overflow <= 0:
+            return 0
+        try:
+            cache.decr(due_key, self.interval)
+        except ValueError:
+            pass
+        return math.ceil(overflow / 1000)
+
+
+_buckets = {}
+
+
+def get_bucket(scope):
+    """Ведро для scope из RATELIMITS или None, если лимита нет."""
+    limit = settings.RATELIMITS.get(scope)
+    if limit is None or not settings.RATELIMIT_ENABLED:
+        return None
+    bucket = _buckets.get(scope)
+    if bucket is None or bucket.limit is not limit:
+        bucket = TokenBucket(scope, **limit)
+        bucket.limit = limit
+        _buckets[scope] = bucket
+    return bucket
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        content_type='text/plain; charset=utf-8',
+        status=429,
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def check_limit(request, scope):
+    if request.method not in settings.RATELIMIT_METHODS:
+        return None
+    bucket = get_bucket(scope)
+    if bucket is None:
+        return None
+    retry_after = bucket.consume(get_client_key(request))
+    if retry_after:
+        return too_many_requests(retry_after)
+    return None
+
+
+def ratelimit(scope):
+    """Декоратор view с лимитом RATELIMITS[scope]."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = check_limit(request, scope)
+            if response is not None:
+                return response
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class RateLimitMiddleware:
+    """Ограничивает view, имена которых ('posts:post_create') есть
+    в RATELIMITS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        view_name = request.resolver_match.view_name
+        if view_name not in settings.RATELIMITS:
+            return None
+        return check_limit(request, view_name)
@@ -0,0 +1,146 @@
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.utils.http import parse_etags
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/.]+$')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'public, max-age=60'
+# Порядок предпочтения сжатых копий.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+BLOCK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещённых q=0."""
+    accepted = set()
+    for item in header.split(','):
+        encoding, _, params = item.strip().partition(';')
+        params = params.replace(' ', '')
+        if params in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(encoding.strip().lower())
+    return accepted
+
+
+def etag_matches(header, etag):
+    """Есть ли etag в If-None-Match: список через запятую или *.
+
+    Сравнение слабое (W/"x" совпадает с "x"), как требует RFC 7232
+    для If-None-Match: прокси часто ослабляют ETag при сжатии.
+    """
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return True
+    return any(
+        (tag[2:] if tag.startswith('W/') else tag) == etag for tag in etags
+    )
+
+
+class StaticFile:
+    def __init__(self, path, url):
+        stat = os.stat(path)
+        content_type, _ = mimetypes.guess_type(path)
+        self.content_type = content_type or 'application/octet-stream'
+        if self.content_type.startswith('text/'):
+            self.content_type += '; charset=utf-8'
+        version = f'{int(stat.st_mtime):x}-{stat.st_size:x}'
+        self.variants = {None: (path, stat.st_size)}
+        # У каждой кодировки свой ETag: кэши не должны отдать сжатую
+        # копию клиенту, который её не принимает, в ответ на 304.
+        self.etags = {None: f'"{version}"'}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = (
+                    path + suffix, os.path.getsize(path + suffix)
+                )
+                self.etags[encoding] = f'"{version}-{suffix[1:]}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.cache_control = (
+            IMMUTABLE if HASHED_NAME.search(url) else REVALIDATE
+        )
+
+    def choose(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding)
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return None
+
+
+class StaticFiles:
+    """WSGI-обёртка, которая отдаёт статику, не заходя в Django.
+
+    Список файлов собирается один раз при старте, поэтому запрос
+    стоит одного поиска в словаре. Файлы с хешем в имени отдаются
+    с Cache-Control immutable, заранее сжатые копии — по Accept-Encoding.
+    """
+
+    def __init__(self, application, root, prefix):
+        self.application = application
+        self.files = self.scan(root, prefix) if root else {}
+
+    @staticmethod
+    def scan(root, prefix):
+        files = {}
+        suffixes = tuple(suffix for _, suffix in ENCODINGS)
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                if filename.endswith(suffixes) and os.path.exists(
+                    path.rsplit('.', 1)[0]
+                ):
+                    continue
+                url = prefix + os.path.relpath(path, root).replace(
+                    os.sep, '/'
+                )
+                files[url] = StaticFile(path, url)
+        return files
+
+    def __call__(self, environ, start_response):
+        static_file = self.files.get(environ.get('PATH_INFO', ''))
+        method = environ.get('REQUEST_METHOD')
+        if static_file is None or method not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        encoding = static_file.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        etag = static_file.etags[encoding]
+        headers = [
+            ('Cache-Control', static_file.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static_file.last_modified),
+        ]
+        if len(static_file.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if etag_matches(environ.get('HTTP_IF_NONE_MATCH'), etag):
+            start_response('304 Not Modified', headers)
+            return []
+        path, size = static_file.variants[encoding]
+        headers += [
+            ('Content-Type', static_file.content_type),
+            ('Content-Length', str(size)),
+        ]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if method == 'HEAD':
+            return []
+        file = open(path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            return file_wrapper(file, BLOCK_SIZE)
+        return _FileIterator(file)
+
+
+class _FileIterator:
+    def __init__(self, file):
+        self.file = file
+
+    def __iter__(self):
+        return iter(lambda: self.file.read(BLOCK_SIZE), b'')
+
+    def close(self):
+        self.file.close()
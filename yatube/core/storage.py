@@ -0,0 +1,50 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: тогда пишем только .gz
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.ico', '.txt', '.html', '.json', '.xml',
+)
+
+
+def compress_file(path):
+    """Пишет рядом с файлом .gz и .br, если они меньше оригинала."""
+    with open(path, 'rb') as source:
+        data = source.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    written = []
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+            written.append(path + suffix)
+    return written
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хранилище статики с хешем в имени и сжатыми копиями файлов.
+
+    collectstatic кладёт рядом с каждым хешированным файлом .gz
+    (и .br при установленном brotli), их отдаёт core.static.StaticFiles.
+    """
+
+    def post_process(self, *args, **kwargs):
+        hashed = []
+        for name, hashed_name, processed in super().post_process(
+            *args, **kwargs
+        ):
+            if hashed_name and not isinstance(processed, Exception):
+                hashed.append(hashed_name)
+            yield name, hashed_name, processed
+        if kwargs.get('dry_run'):
+            return
+        for hashed_name in set(hashed):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(hashed_name))
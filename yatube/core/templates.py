@@ -0,0 +1,41 @@
+import os
+
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+
+
+def iter_template_names():
+    """Имена всех шаблонов проекта и приложений."""
+    seen = set()
+    for engine in engines.all():
+        dirs = list(engine.engine.dirs) + list(
+            get_app_template_dirs('templates')
+        )
+        for directory in dirs:
+            for root, _, files in os.walk(directory):
+                for filename in files:
+                    if not filename.endswith(('.html', '.txt')):
+                        continue
+                    path = os.path.join(root, filename)
+                    name = os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    )
+                    if name not in seen:
+                        seen.add(name)
+                        yield engine, name
+
+
+def warm_templates():
+    """Загружает и разбирает все шаблоны, наполняя кэширующий загрузчик.
+
+    Возвращает число загруженных шаблонов и список ошибок.
+    """
+    loaded, errors = 0, []
+    for engine, name in iter_template_names():
+        try:
+            engine.get_template(name)
+        except Exception as error:
+            errors.append((name, error))
+        else:
+            loaded += 1
+    return loaded, errors
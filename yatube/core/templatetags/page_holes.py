@@ -0,0 +1,18 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from core.pagecache import hole_marker, render_hole
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """Фрагмент, зависящий от пользователя (см. core/pagecache.py).
+
+    В оболочке страницы для кэша вместо него остаётся <esi:include>.
+    """
+    request = context['request']
+    if getattr(request, 'page_shell', False):
+        return mark_safe(hole_marker(name, kwargs))
+    return render_hole(request, name, kwargs)
@@ -0,0 +1,16 @@
+from django import template
+
+from core.pagination import elided_page_range
+
+register = template.Library()
+
+
+@register.simple_tag
+def elided_pages(page_obj):
+    """{% elided_pages page_obj as pages %}: номера страниц для
+    навигации, None на месте пропуска."""
+    return elided_page_range(
+        page_obj.number,
+        page_obj.paginator.num_pages,
+        page_obj.has_next(),
+    )
@@ -0,0 +1,38 @@
+from functools import lru_cache
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.templatetags.static import static
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+
+@lru_cache(maxsize=None)
+def read_static(path):
+    """Содержимое статического файла, читается один раз на процесс."""
+    found = finders.find(path) or staticfiles_storage.path(path)
+    with open(found, encoding='utf-8') as file:
+        return file.read()
+
+
+@register.simple_tag
+def critical_css(critical, stylesheet):
+    """Подключает таблицу стилей, при необходимости с critical CSS.
+
+    При INLINE_CRITICAL_CSS стили первого экрана встраиваются в страницу,
+    а полная таблица грузится без блокировки отрисовки.
+    """
+    href = static(stylesheet)
+    if not settings.INLINE_CRITICAL_CSS:
+        return format_html('<link rel="stylesheet" href="{}">', href)
+    return format_html(
+        '<style>{}</style>\n'
+        '<link rel="preload" href="{}" as="style" '
+        'onload="this.onload=null;this.rel=\'stylesheet\'">\n'
+        '<noscript><link rel="stylesheet" href="{}"></noscript>',
+        mark_safe(read_static(critical)), href, href,
+    )
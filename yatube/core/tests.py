@@ -0,0 +1,653 @@
+import gzip
+import importlib
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import Http404, HttpResponse
+from django.core.cache import cache
+from django.template import Context, Template
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.urls import clear_url_caches, reverse
+
+from core import media
+from core.cache import SkipCache, get_or_compute
+from core.checks import check_performance_settings
+from core.pagination import (
+    EstimatedCountPaginator, LookaheadPaginator, TieredPaginator,
+    elided_page_range,
+)
+from core.ratelimit import TokenBucket, ratelimit
+from core.static import IMMUTABLE, StaticFiles
+from core.templates import warm_templates
+from core.views import render_not_found
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PageNotFoundTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_cached_body_matches_full_render(self):
+        """Готовое тело 404 совпадает с полной отрисовкой шаблона."""
+        response = self.client.get('/unexisting_page/<script>/')
+        self.assertEqual(response.status_code, 404)
+        full = render_not_found(response.wsgi_request)
+        self.assertEqual(response.content, full.content)
+        self.assertNotIn(b'<script>', response.content)
+
+    def test_authorized_client_gets_full_render(self):
+        user = User.objects.create_user(username='Noname')
+        client = Client()
+        client.force_login(user)
+        response = client.get('/unexisting_page/')
+        self.assertEqual(response.status_code, 404)
+        self.assertTemplateUsed(response, 'core/404.html')
+        self.assertContains(response, 'Noname', status_code=404)
+
+    @override_settings(NOT_FOUND_RATE_LIMIT=2)
+    def test_repeated_not_found_short_circuit(self):
+        """После лимита клиент получает короткий ответ без шаблона."""
+        for _ in range(2):
+            response = self.client.get('/unexisting_page/')
+            self.assertContains(response, 'Custom 404', status_code=404)
+        response = self.client.get('/unexisting_page/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.content, b'Not Found')
+
+
+class WarmTemplatesTest(TestCase):
+    def test_all_templates_compile(self):
+        """Все шаблоны проекта загружаются без ошибок."""
+        loaded, errors = warm_templates()
+        self.assertGreater(loaded, 0)
+        self.assertEqual(errors, [])
+
+
+class PerformanceChecksTest(TestCase):
+    def test_checks_disabled_by_default(self):
+        self.assertEqual(check_performance_settings(None), [])
+
+    @override_settings(PERFORMANCE_CHECKS=True, DEBUG=True)
+    def test_slow_configuration_reported(self):
+        """Медленные настройки dev-профиля дают ошибки проверки."""
+        ids = {error.id for error in check_performance_settings(None)}
+        self.assertTrue(
+            {'core.E001', 'core.E002', 'core.E004', 'core.E005', 'core.E006'}
+            <= ids
+        )
+
+
+class StaticPipelineTest(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def get(self, app, path, **environ):
+        result = {}
+
+        def start_response(status, headers):
+            result['status'] = status
+            result['headers'] = dict(headers)
+
+        environ = dict(REQUEST_METHOD='GET', PATH_INFO=path, **environ)
+        body = b''.join(app(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_collectstatic_hashes_and_compresses(self):
+        """collectstatic пишет хешированные файлы и сжатые копии."""
+        with override_settings(
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            name = staticfiles_storage.stored_name('css/bootstrap.min.css')
+        path = os.path.join(self.root, name)
+        self.assertNotEqual(name, 'css/bootstrap.min.css')
+        with open(path, 'rb') as original, open(path + '.gz', 'rb') as gz:
+            self.assertEqual(gzip.decompress(gz.read()), original.read())
+
+    def test_serves_precompressed_variant(self):
+        """Сжатая копия отдаётся с заголовками долгого кэширования."""
+        os.makedirs(os.path.join(self.root, 'css'))
+        path = os.path.join(self.root, 'css', 'site.0123456789ab.css')
+        with open(path, 'wb') as file:
+            file.write(b'body{}' * 100)
+        with open(path + '.gz', 'wb') as file:
+            file.write(gzip.compress(b'body{}' * 100))
+        fallback = []
+
+        def django_app(environ, start_response):
+            fallback.append(environ)
+            start_response('404 Not Found', [])
+            return []
+
+        app = StaticFiles(django_app, self.root, '/static/')
+        status, headers, body = self.get(
+            app, '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip, deflate',
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(headers['Cache-Control'], IMMUTABLE)
+        self.assertEqual(gzip.decompress(body), b'body{}' * 100)
+
+        status, headers, body = self.get(
+            app, '/static/css/site.0123456789ab.css'
+        )
+        self.assertNotIn('Content-Encoding', headers)
+        self.assertEqual(body, b'body{}' * 100)
+
+        status, _, _ = self.get(
+            app, '/static/css/site.0123456789ab.css',
+            HTTP_IF_NONE_MATCH=headers['ETag'],
+        )
+        self.assertEqual(status, '304 Not Modified')
+
+        etag = headers['ETag']
+        status, gzip_headers, _ = self.get(
+            app, '/static/css/site.0123456789ab.css',
+            HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag,
+        )
+        self.assertEqual(status, '200 OK')
+        self.assertEqual(gzip_headers['ETag'], etag[:-1] + '-gz"')
+        for if_none_match in (
+            f'"other", {etag}', f'W/{etag}', '*',
+        ):
+            with self.subTest(if_none_match=if_none_match):
+                status, _, _ = self.get(
+                    app, '/static/css/site.0123456789ab.css',
+                    HTTP_IF_NONE_MATCH=if_none_match,
+                )
+                self.assertEqual(status, '304 Not Modified')
+
+        self.get(app, '/static/missing.css')
+        self.assertEqual(len(fallback), 1)
+
+    @override_settings(INLINE_CRITICAL_CSS=True)
+    def test_inline_critical_css(self):
+        html = Template(
+            "{% load static_tags %}"
+            "{% critical_css 'css/critical.css' 'css/bootstrap.min.css' %}"
+        ).render(Context())
+        self.assertIn('<style>', html)
+        self.assertIn('rel="preload"', html)
+
+
+class MediaServeTest(SimpleTestCase):
+    data = bytes(range(256)) * 40
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, 'posts'))
+        with open(os.path.join(self.root, 'posts', 'big.jpg'), 'wb') as file:
+            file.write(self.data)
+        settings_override = override_settings(MEDIA_ROOT=self.root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.factory = RequestFactory()
+
+    def get(self, path='posts/big.jpg', **headers):
+        response = media.serve(self.factory.get('/media/' + path, **headers),
+                               path)
+        body = b''.join(response) if response.streaming else b''
+        response.close()
+        return response, body
+
+    def test_full_file(self):
+        response, body = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertEqual(response['Content-Length'], str(len(self.data)))
+        self.assertEqual(body, self.data)
+
+    def test_range_requests(self):
+        """Диапазоны отдаются кодом 206 ровно нужной длины."""
+        response, body = self.get(HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(
+            response['Content-Range'], f'bytes 100-199/{len(self.data)}'
+        )
+        self.assertEqual(body, self.data[100:200])
+
+        response, body = self.get(HTTP_RANGE='bytes=-10')
+        self.assertEqual(body, self.data[-10:])
+
+        response, _ = self.get(HTTP_RANGE=f'bytes={len(self.data)}-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_conditional_request(self):
+        response, _ = self.get()
+        response, body = self.get(HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_range_mismatch_returns_full_file(self):
+        response, body = self.get(
+            HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(body, self.data)
+
+    @override_settings(MEDIA_SENDFILE='nginx')
+    def test_accel_redirect(self):
+        response, _ = self.get()
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/posts/big.jpg'
+        )
+
+    def test_path_traversal(self):
+        with self.assertRaises(Http404):
+            self.get('../secret.txt')
+
+
+@override_settings(
+    RATELIMIT_ENABLED=True,
+    RATELIMITS={
+        'posts:add_comment': {'rate': '1/m', 'burst': 2},
+        'users:signup': {'rate': '1/m', 'burst': 1},
+        'test': {'rate': '1/m', 'burst': 2},
+    },
+)
+class RateLimitTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Текст')
+        self.client.force_login(self.author)
+        self.clock = 1_600_000_000.0
+        patcher = mock.patch(
+            'core.ratelimit.time.time', lambda: self.clock
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def comment(self, client=None):
+        return (client or self.client).post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+
+    def test_burst_then_throttled(self):
+        """После burst запросов подряд отвечаем 429 с Retry-After."""
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+        response = self.comment()
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '60')
+        self.assertEqual(self.post.comments.count(), 2)
+
+    def test_limits_are_per_user(self):
+        self.comment()
+        self.comment()
+        other = Client()
+        other.force_login(User.objects.create_user(username='other'))
+        self.assertEqual(self.comment(other).status_code, 302)
+
+    def test_reads_are_not_limited(self):
+        for _ in range(5):
+            response = self.client.get(
+                reverse('posts:post_detail', args=[self.post.pk])
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_tokens_refill_up_to_burst(self):
+        """Токены пополняются со временем, но не больше объёма ведра."""
+        self.comment()
+        self.comment()
+        self.clock += 60
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 429)
+        self.clock += 3600
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 302)
+        self.assertEqual(self.comment().status_code, 429)
+
+    def test_parallel_burst_after_idle(self):
+        """Одновременные запросы после простоя получают не больше burst
+        токенов, даже если все успели сделать incr до нового поколения."""
+        bucket = TokenBucket('parallel', '30/m', burst=3)
+        bucket.consume('client')
+        # Ведро полное, но ключ ещё не истёк.
+        self.clock += 30
+        count = 10
+        # Каждый incr ждёт остальных: все видят полное ведро разом.
+        barrier = threading.Barrier(count, timeout=5)
+
+        class SteppedCache:
+            def incr(self, *args):
+                result = cache.incr(*args)
+                barrier.wait()
+                return result
+
+            def __getattr__(self, name):
+                return getattr(cache, name)
+
+        results = []
+
+        def worker():
+            results.append(bucket.consume('client'))
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        with mock.patch('core.ratelimit.cache', SteppedCache()):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(results), count)
+        self.assertEqual(results.count(0), 3)
+
+    def test_anonymous_limited_by_ip(self):
+        self.client.logout()
+        url = reverse('users:signup')
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 429)
+        response = self.client.post(url, REMOTE_ADDR='192.0.2.7')
+        self.assertEqual(response.status_code, 200)
+
+    def test_decorator(self):
+        view = ratelimit('test')(lambda request: HttpResponse())
+        factory = RequestFactory()
+        codes = [
+            view(factory.post('/', REMOTE_ADDR='192.0.2.1')).status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(codes, [200, 200, 429])
+
+
+def reload_urls():
+    """Перечитывает адреса после смены PAGE_CACHE_ESI."""
+    clear_url_caches()
+    for name in ('core.urls', 'yatube.urls'):
+        importlib.reload(sys.modules[name])
+
+
+@override_settings(PAGE_CACHE_TIMEOUTS={
+    'posts:index': 60,
+    'posts:group_list': 60,
+    'posts:profile': 60,
+    'posts:post_detail': 60,
+})
+class SplitPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Текст поста'
+        )
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        client.get(reverse('about:tech'))
+        return client
+
+    def test_anonymous_page_cached_whole(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(first.content, second.content)
+        self.assertNotIn(b'esi:include', second.content)
+        self.assertNotIn(b'csrfmiddlewaretoken', second.content)
+
+    def test_shell_filled_per_user(self):
+        """Оболочка общая, шапка и форма комментария — свои у каждого."""
+        self.login(self.author).get(self.url)
+        reader = self.login(self.reader)
+        with self.assertNumQueries(0):
+            response = reader.get(self.url)
+        content = response.content.decode()
+        self.assertIn('Пользователь: reader', content)
+        self.assertNotIn('Пользователь: author', content)
+        self.assertIn('csrfmiddlewaretoken', content)
+        self.assertNotIn('Редактировать запись', content)
+        self.assertNotIn('esi:include', content)
+        self.assertIn('private', response['Cache-Control'])
+        author_page = self.login(self.author).get(self.url)
+        self.assertContains(author_page, 'Редактировать запись')
+
+    def test_anonymous_and_shell_are_separate(self):
+        self.login(self.reader).get(self.url)
+        response = self.client.get(self.url)
+        self.assertNotContains(response, 'Пользователь:')
+        self.assertContains(response, 'Войти')
+
+    def test_pages_invalidated_on_change(self):
+        pages = (
+            self.url,
+            reverse('posts:group_list', args=['group']),
+            reverse('posts:profile', args=['author']),
+        )
+        for url in pages:
+            self.client.get(url)
+        self.post.text = 'Новый текст'
+        self.post.save()
+        for url in pages:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'Новый текст')
+
+    def test_old_group_invalidated_on_move(self):
+        """Перенесённый пост пропадает и из ленты прежней группы."""
+        url = reverse('posts:group_list', args=['group'])
+        self.assertContains(self.client.get(url), 'Текст поста')
+        self.post.group = Group.objects.create(title='Другая', slug='other')
+        self.post.save()
+        self.assertNotContains(self.client.get(url), 'Текст поста')
+
+    @override_settings(PAGE_CACHE_ESI=True)
+    def test_esi_surrogate_gets_shell(self):
+        reload_urls()
+        self.addCleanup(reload_urls)
+        reader = self.login(self.reader)
+        response = reader.get(
+            self.url, HTTP_SURROGATE_CAPABILITY='abc=ESI/1.0'
+        )
+        self.assertEqual(response['Surrogate-Control'], 'content="ESI/1.0"')
+        src = reverse('core:hole', args=['header_user'])
+        self.assertContains(response, f'<esi:include src="{src}"/>')
+        self.assertContains(reader.get(src), 'Пользователь: reader')
+        comment_form = reverse('core:hole', args=['comment_form'])
+        for query in ('', 'post_id=abc', 'post_id=1&other=2'):
+            with self.subTest(query=query):
+                response = reader.get(f'{comment_form}?{query}')
+                self.assertEqual(response.status_code, 404)
+
+    def test_holes_hidden_without_esi(self):
+        """Без PAGE_CACHE_ESI фрагменты снаружи не доступны."""
+        reader = self.login(self.reader)
+        response = reader.get('/holes/header_user/')
+        self.assertEqual(response.status_code, 404)
+
+
+class PaginationTest(SimpleTestCase):
+    def test_elided_page_range(self):
+        self.assertEqual(elided_page_range(1, 3), [1, 2, 3])
+        self.assertEqual(
+            elided_page_range(50_000, 100_000),
+            [1, None, 49_998, 49_999, 50_000, 50_001, 50_002, None, 100_000],
+        )
+        self.assertEqual(elided_page_range(2, 100), [1, 2, 3, 4, None, 100])
+
+    def test_unknown_page_count(self):
+        self.assertEqual(
+            elided_page_range(10, has_next=True),
+            [1, None, 8, 9, 10, 11],
+        )
+        self.assertEqual(elided_page_range(10), [1, None, 8, 9, 10])
+
+    def test_lookahead_paginator(self):
+        paginator = LookaheadPaginator(range(25), 10)
+        page = paginator.get_page(2)
+        self.assertEqual(list(page), list(range(10, 20)))
+        self.assertTrue(page.has_next())
+        self.assertEqual((page.start_index(), page.end_index()), (11, 20))
+        last = paginator.get_page(3)
+        self.assertFalse(last.has_next())
+        self.assertEqual(last.end_index(), 25)
+        self.assertEqual(paginator.get_page(9).number, 1)
+        self.assertEqual(paginator.get_page('x').number, 1)
+
+    def test_navigation_is_elided(self):
+        page = LookaheadPaginator(range(10 ** 6), 10).get_page(500)
+        html = Template(
+            "{% include 'includes/paginator.html' %}"
+        ).render(Context({'page_obj': page}))
+        # Первая, Предыдущая, 1 … 498 499 500 501, Следующая.
+        self.assertEqual(html.count('class="page-item'), 9)
+        self.assertIn('?page=501', html)
+        self.assertNotIn('Последняя', html)
+
+
+class EstimatedCountPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=author, text=str(number)) for number in range(20)
+        )
+        Post.objects.filter(text__in=['3', '4']).delete()
+
+    def test_small_table_counted_exactly(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 18)
+
+    @mock.patch('core.pagination.EXACT_COUNT_LIMIT', 10)
+    def test_large_table_estimated(self):
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        with self.assertNumQueries(2):
+            self.assertEqual(paginator.count, 20)
+        # Выборку с условиями в SQLite оценить нечем.
+        filtered = EstimatedCountPaginator(
+            Post.objects.filter(text__startswith='1'), 10
+        )
+        self.assertEqual(filtered.count, 11)
+        self.assertEqual(len(paginator.page(2)), 8)
+
+
+class TieredPaginatorTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='auth')
+        Post.objects.bulk_create(
+            Post(author=author, text=str(number)) for number in range(25)
+        )
+        cls.pks = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)
+        )
+
+    def pks_of(self, page):
+        return [post.pk for post in page]
+
+    def test_tail_read_after_head(self):
+        """Хвост читается, только когда страница доходит до него."""
+        head = Post.objects.filter(pk__gt=self.pks[13]).order_by('-pk')
+        tail = Post.objects.filter(pk__lte=self.pks[13]).order_by('-pk')
+        paginator = TieredPaginator(head, tail, 5)
+        with self.assertNumQueries(1):
+            page = paginator.page(2)
+        self.assertEqual(self.pks_of(page), self.pks[5:10])
+        with self.assertNumQueries(2):
+            page = paginator.page(3)
+        self.assertEqual(self.pks_of(page), self.pks[10:15])
+        # За концом головы смещение в хвосте даёт COUNT по голове.
+        with self.assertNumQueries(3):
+            page = paginator.page(4)
+        self.assertEqual(self.pks_of(page), self.pks[15:20])
+        self.assertTrue(page.has_next())
+        last = paginator.page(5)
+        self.assertEqual(self.pks_of(last), self.pks[20:])
+        self.assertFalse(last.has_next())
+        self.assertEqual(paginator.get_page(6).number, 1)
+
+    def test_without_tail(self):
+        head = Post.objects.filter(pk__gt=self.pks[13]).order_by('-pk')
+        page = TieredPaginator(head, None, 5).page(3)
+        self.assertEqual(self.pks_of(page), self.pks[10:13])
+        self.assertFalse(page.has_next())
+
+
+class CacheStampedeTest(SimpleTestCase):
+    key = 'stampede'
+
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def compute(self, value='new'):
+        def compute():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(0.2)
+            return value
+        return compute
+
+    def run_threads(self, count=20, **kwargs):
+        barrier = threading.Barrier(count)
+        results = []
+
+        def worker():
+            barrier.wait()
+            results.append(
+                get_or_compute(self.key, self.compute(), 60, **kwargs)
+            )
+
+        threads = [threading.Thread(target=worker) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_cold_key_computed_once(self):
+        """Пустой ключ считает один запрос, остальные ждут его."""
+        results = self.run_threads()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, ['new'] * 20)
+
+    def test_expired_value_served_stale_while_recomputed(self):
+        """После срока пересчёт один, остальные сразу получают старое."""
+        cache.set(self.key, ('old', time.time() - 1, 0.2), 60)
+        results = self.run_threads(stale=30)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(results), ['new'] + ['old'] * 19)
+        self.assertEqual(get_or_compute(self.key, self.compute(), 60), 'new')
+        self.assertEqual(self.calls, 1)
+
+    def test_early_recompute(self):
+        cache.set(self.key, ('old', time.time() + 1, 10), 60)
+        with mock.patch('core.cache.random.random', return_value=0):
+            self.assertEqual(
+                get_or_compute(self.key, self.compute(), 60), 'old'
+            )
+        with mock.patch('core.cache.random.random', return_value=0.99):
+            self.assertEqual(
+                get_or_compute(self.key, self.compute(), 60), 'new'
+            )
+        self.assertEqual(self.calls, 1)
+
+    def test_skip_cache_not_stored(self):
+        def compute():
+            raise SkipCache('once')
+
+        self.assertEqual(get_or_compute(self.key, compute, 60), 'once')
+        self.assertIsNone(cache.get(self.key))
+        self.assertIsNone(cache.get(f'{self.key}:lock'))
@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.urls import path
+
+from . import pagecache
+
+app_name = 'core'
+
+urlpatterns = []
+
+# Фрагменты страниц нужны снаружи только ESI-прокси; без него дырки
+# заполняются внутри запроса (см. core/pagecache.py).
+if settings.PAGE_CACHE_ESI:
+    urlpatterns.append(path(
+        f'{pagecache.HOLE_PREFIX}<slug:name>/', pagecache.hole_view,
+        name='hole',
+    ))
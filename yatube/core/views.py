@@ -1,9 +1,55 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotFound
 from django.shortcuts import render
+from django.template.loader import render_to_string
+from django.utils.html import escape
 
+PATH_PLACEHOLDER = '__not_found_path__'
 
-def page_not_found(request, exception):
+# Готовые тела страницы 404 для анонимов, по одному на год в подвале.
+_not_found_bodies = {}
+
+
+def get_client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def is_not_found_flood(request):
+    """Считает 404 от клиента и сообщает, превышен ли лимит."""
+    key = f'not_found:{get_client_ip(request)}'
+    cache.add(key, 0, settings.NOT_FOUND_RATE_WINDOW)
+    try:
+        hits = cache.incr(key)
+    except ValueError:
+        return False
+    return hits > settings.NOT_FOUND_RATE_LIMIT
+
+
+def render_not_found(request):
+    """Полная отрисовка шаблона 404 через base.html."""
     return render(request, 'core/404.html', {'path': request.path}, status=404)
 
 
+def page_not_found(request, exception):
+    if is_not_found_flood(request):
+        return HttpResponseNotFound(b'Not Found', content_type='text/plain')
+    if request.user.is_authenticated:
+        return render_not_found(request)
+    year = datetime.datetime.now().year
+    body = _not_found_bodies.get(year)
+    if body is None:
+        body = render_to_string(
+            'core/404.html', {'path': PATH_PLACEHOLDER}, request=request
+        )
+        _not_found_bodies.clear()
+        _not_found_bodies[year] = body
+    return HttpResponseNotFound(
+        body.replace(PATH_PLACEHOLDER, escape(request.path))
+    )
+
+
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
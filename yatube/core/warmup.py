@@ -0,0 +1,62 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.handlers.base import BaseHandler
+from django.db import connections
+from django.test import RequestFactory
+
+
+def warm_host():
+    """Хост из ALLOWED_HOSTS для запросов прогрева."""
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*':
+            return host.lstrip('.')
+    return 'localhost'
+
+
+def run_concurrently(func, items, workers):
+    """Вызывает func(item) для всех items не больше чем в workers потоках.
+
+    Возвращает [(item, результат или исключение, секунды)] в порядке
+    items. При workers=1 всё выполняется в текущем потоке.
+    """
+    def call(item):
+        started = time.perf_counter()
+        try:
+            result = func(item)
+        except Exception as error:
+            result = error
+        return item, result, time.perf_counter() - started
+
+    def call_in_thread(item):
+        try:
+            return call(item)
+        finally:
+            # Потоки пула не должны оставлять соединения открытыми.
+            connections.close_all()
+
+    if workers <= 1:
+        return [call(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(call_in_thread, items))
+
+
+def warm_pages(urls, workers, host=None):
+    """Запрашивает urls как анонимный читатель: страницы рисуются
+    со всеми middleware и попадают в кэш страниц (core/pagecache.py).
+
+    Запросы идут прямо в обработчик Django, без тестового клиента
+    и его инструментирования. Возвращает то же, что run_concurrently,
+    с кодом ответа в качестве результата.
+    """
+    factory = RequestFactory(HTTP_HOST=host or warm_host())
+    handler = BaseHandler()
+    handler.load_middleware()
+
+    def fetch(url):
+        response = handler.get_response(factory.get(url))
+        response.close()
+        return response.status_code
+
+    return run_concurrently(fetch, urls, workers)
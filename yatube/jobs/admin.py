@@ -0,0 +1,37 @@
+from django.contrib import admin
+
+from .models import Job, OutgoingEmail
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'created',
+    )
+    list_filter = ('status',)
+    search_fields = ('name',)
+
+
+admin.site.register(Job, JobAdmin)
+
+
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'from_email',
+        'recipients',
+        'status',
+        'attempts',
+        'send_after',
+        'created',
+    )
+    list_filter = ('status',)
+    search_fields = ('recipients',)
+    exclude = ('message',)
+
+
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
@@ -0,0 +1,206 @@
+import json
+import logging
+import smtplib
+import traceback
+from datetime import timedelta
+from email import message_from_bytes
+from email.message import Message
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job, OutgoingEmail
+from .queue import enqueue
+
+logger = logging.getLogger(__name__)
+
+DELIVERY_JOB = 'jobs.mail.deliver_outbox'
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Кладёт письма в очередь вместо отправки во время запроса.
+
+    Отправляет их задача deliver_outbox через EMAIL_DELIVERY_BACKEND.
+    """
+
+    def send_messages(self, email_messages):
+        emails = [
+            OutgoingEmail(
+                from_email=message.from_email,
+                recipients=json.dumps(message.recipients()),
+                message=message.message().as_bytes(),
+            )
+            for message in email_messages
+            if message.recipients()
+        ]
+        if not emails:
+            return 0
+        OutgoingEmail.objects.bulk_create(emails)
+        schedule_delivery()
+        return len(emails)
+
+
+class RawMessage(Message):
+    """Разобранное письмо с as_bytes(linesep=...), как у писем Django."""
+
+    def as_bytes(self, unixfrom=False, linesep='\n'):
+        return super().as_bytes(
+            unixfrom, policy=self.policy.clone(linesep=linesep)
+        )
+
+
+class StoredMessage:
+    """Готовое письмо из очереди в виде, понятном бэкендам Django."""
+
+    encoding = None
+
+    def __init__(self, email):
+        self.from_email = email.from_email
+        self._recipients = json.loads(email.recipients)
+        self._message = message_from_bytes(
+            bytes(email.message), _class=RawMessage
+        )
+
+    def recipients(self):
+        return self._recipients
+
+    def message(self):
+        return self._message
+
+
+def schedule_delivery(run_at=None):
+    """Ставит отправку в очередь, если к этому сроку её ещё нет."""
+    run_at = run_at or timezone.now()
+    planned = Job.objects.filter(
+        name=DELIVERY_JOB, status=Job.QUEUED, run_at__lte=run_at
+    )
+    if not planned.exists():
+        enqueue(DELIVERY_JOB, run_at=run_at)
+
+
+def retry_delay(attempts):
+    return settings.EMAIL_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def is_permanent(error):
+    """Ответ 5xx: повтор не поможет."""
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return False
+
+
+def is_rejection(error):
+    """Сервер отклонил письмо, но соединение осталось рабочим."""
+    return isinstance(
+        error,
+        (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused),
+    )
+
+
+def postpone(emails, error, trace):
+    now = timezone.now()
+    permanent = is_permanent(error)
+    for email in emails:
+        if permanent or email.attempts >= settings.EMAIL_MAX_ATTEMPTS:
+            email.status = OutgoingEmail.FAILED
+        else:
+            email.status = OutgoingEmail.QUEUED
+            email.send_after = now + timedelta(
+                seconds=retry_delay(email.attempts)
+            )
+        email.last_error = trace
+        email.locked_at = None
+        email.save(update_fields=[
+            'status', 'send_after', 'last_error', 'locked_at',
+        ])
+
+
+def claim_batch(size):
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True)
+            .filter(status=OutgoingEmail.QUEUED, send_after__lte=now)
+            .order_by('send_after', 'pk')[:size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in batch]
+        ).update(
+            status=OutgoingEmail.SENDING,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+        )
+    for email in batch:
+        email.attempts += 1
+    return batch
+
+
+def close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def send_batch(batch):
+    """Отправляет пачку через одно соединение, возвращает число писем."""
+    connection = get_connection(
+        settings.EMAIL_DELIVERY_BACKEND, fail_silently=False
+    )
+    try:
+        connection.open()
+    except Exception as error:
+        postpone(batch, error, traceback.format_exc())
+        return 0
+    sent = []
+    try:
+        for position, email in enumerate(batch):
+            try:
+                connection.send_messages([StoredMessage(email)])
+            except Exception as error:
+                logger.warning('Письмо %s не отправлено: %s', email.pk, error)
+                if is_rejection(error):
+                    postpone([email], error, traceback.format_exc())
+                    continue
+                # Соединение оборвалось: остальные письма ждут повтора.
+                postpone(batch[position:], error, traceback.format_exc())
+                break
+            sent.append(email.pk)
+    finally:
+        close_quietly(connection)
+    OutgoingEmail.objects.filter(pk__in=sent).delete()
+    return len(sent)
+
+
+def release_stale():
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    return OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING, locked_at__lt=deadline
+    ).update(status=OutgoingEmail.QUEUED, locked_at=None)
+
+
+def deliver_outbox(batch_size=None):
+    """Отправляет накопившиеся письма пачками и планирует повторы."""
+    batch_size = batch_size or settings.EMAIL_BATCH_SIZE
+    release_stale()
+    sent = 0
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            break
+        sent += send_batch(batch)
+    retry = (
+        OutgoingEmail.objects.filter(status=OutgoingEmail.QUEUED)
+        .order_by('send_after')
+        .values_list('send_after', flat=True)
+        .first()
+    )
+    if retry is not None:
+        schedule_delivery(retry)
+    return sent
@@ -0,0 +1,91 @@
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.benchmarks import measure, report
+from jobs.mail import deliver_outbox
+from jobs.models import OutgoingEmail
+from jobs.smtp import LocalSMTPServer
+
+SMTP_EMAIL = 'django.core.mail.backends.smtp.EmailBackend'
+
+
+class Command(BaseCommand):
+    help = 'Время ответа на запрос сброса пароля и скорость рассылки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--number', type=int, default=200)
+        parser.add_argument(
+            '--smtp-latency', type=float, default=0.005,
+            help='Задержка ответа SMTP-сервера на команду, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        number = options['number']
+        with LocalSMTPServer(options['smtp_latency']) as server:
+            mail_settings = override_settings(
+                ALLOWED_HOSTS=['*'],
+                EMAIL_HOST='127.0.0.1',
+                EMAIL_PORT=server.port,
+                EMAIL_FILE_PATH=tempfile.mkdtemp(prefix='yatube-mail-'),
+            )
+            with mail_settings, transaction.atomic():
+                self.run(number)
+                transaction.set_rollback(True)
+
+    def run(self, number):
+        # Письмо уходит только пользователю с паролем.
+        get_user_model().objects.create_user(
+            'bench-reset', 'bench-reset@example.com', 'bench-reset'
+        )
+        path = reverse('users:password_reset_form')
+        view = resolve(path).func
+        factory = RequestFactory()
+
+        def reset():
+            request = factory.post(path, {'email': 'bench-reset@example.com'})
+            request._dont_enforce_csrf_checks = True
+            view(request)
+
+        backends = (
+            ('inline smtp', SMTP_EMAIL),
+            ('inline file',
+             'django.core.mail.backends.filebased.EmailBackend'),
+            ('queued', 'jobs.mail.QueuedEmailBackend'),
+        )
+        self.stdout.write('Запрос сброса пароля:')
+        for label, backend in backends:
+            with override_settings(EMAIL_BACKEND=backend):
+                report(self.stdout, label, measure(reset, number))
+
+        self.stdout.write(f'Рассылка {number} писем, на одно письмо:')
+        messages = [
+            mail.EmailMessage('Сброс пароля', 'Текст', 'from@example.com',
+                              [f'user{position}@example.com'])
+            for position in range(number)
+        ]
+        with override_settings(EMAIL_BACKEND=SMTP_EMAIL):
+            started = time.perf_counter()
+            for message in messages:
+                message.send()
+            report(
+                self.stdout, 'connection per message',
+                (time.perf_counter() - started) / number,
+            )
+        OutgoingEmail.objects.all().delete()
+        with override_settings(EMAIL_DELIVERY_BACKEND=SMTP_EMAIL):
+            mail.get_connection(
+                'jobs.mail.QueuedEmailBackend'
+            ).send_messages(messages)
+            started = time.perf_counter()
+            deliver_outbox()
+            report(
+                self.stdout, 'queued batch',
+                (time.perf_counter() - started) / number,
+            )
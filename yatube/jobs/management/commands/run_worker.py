@@ -0,0 +1,68 @@
+import multiprocessing
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.queue import prune_jobs, requeue_stale, run_pending
+
+
+def worker_loop(stop, poll_interval):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while not stop.is_set():
+        if not run_pending(limit=100):
+            stop.wait(poll_interval)
+    connections.close_all()
+
+
+def terminate(signum, frame):
+    # stop.set() в обработчике сигнала зависает, если основной поток
+    # в этот момент ждёт stop, поэтому прерываем ожидание исключением.
+    raise KeyboardInterrupt
+
+
+class Command(BaseCommand):
+    help = 'Запускает процессы, выполняющие задачи из очереди jobs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=settings.JOBS_WORKER_PROCESSES
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи в текущем процессе и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        requeue_stale()
+        prune_jobs()
+        if options['once']:
+            done = run_pending()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+        # Дочерние процессы не должны делить соединение с родителем.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        workers = [
+            context.Process(
+                target=worker_loop,
+                args=(stop, options['poll_interval']),
+                daemon=True,
+            )
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+        signal.signal(signal.SIGTERM, terminate)
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+        try:
+            while not stop.wait(settings.JOBS_TIMEOUT / 10):
+                requeue_stale()
+                prune_jobs()
+        except KeyboardInterrupt:
+            stop.set()
+        for worker in workers:
+            worker.join()
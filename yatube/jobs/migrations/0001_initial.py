@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 16:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='функция')),
+                ('args', models.TextField(default='[]', verbose_name='аргументы')),
+                ('kwargs', models.TextField(default='{}', verbose_name='именованные аргументы')),
+                ('status', models.CharField(choices=[('queued', 'в очереди'), ('running', 'выполняется'), ('done', 'выполнена'), ('failed', 'ошибка')], default='queued', max_length=10, verbose_name='статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='попыток')),
+                ('max_attempts', models.PositiveIntegerField(default=3, verbose_name='максимум попыток')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='запустить не раньше')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='взята в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создана')),
+            ],
+            options={
+                'ordering': ['run_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['status', 'run_at'], name='jobs_job_status_f5c023_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-19 16:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutgoingEmail',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_email', models.CharField(max_length=254, verbose_name='отправитель')),
+                ('recipients', models.TextField(default='[]', verbose_name='получатели')),
+                ('message', models.BinaryField(verbose_name='письмо')),
+                ('status', models.CharField(choices=[('queued', 'в очереди'), ('sending', 'отправляется'), ('failed', 'не отправлено')], default='queued', max_length=10, verbose_name='статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='попыток')),
+                ('send_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='отправить не раньше')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='взято в работу')),
+                ('last_error', models.TextField(blank=True, verbose_name='последняя ошибка')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создано')),
+            ],
+            options={
+                'ordering': ['send_after'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='outgoingemail',
+            index=models.Index(fields=['status', 'send_after'], name='jobs_outgoi_status_795c64_idx'),
+        ),
+    ]
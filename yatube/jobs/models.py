@@ -0,0 +1,69 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Job(models.Model):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'в очереди'),
+        (RUNNING, 'выполняется'),
+        (DONE, 'выполнена'),
+        (FAILED, 'ошибка'),
+    )
+
+    name = models.CharField('функция', max_length=200)
+    args = models.TextField('аргументы', default='[]')
+    kwargs = models.TextField('именованные аргументы', default='{}')
+    status = models.CharField(
+        'статус', max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('попыток', default=0)
+    max_attempts = models.PositiveIntegerField('максимум попыток', default=3)
+    run_at = models.DateTimeField('запустить не раньше', default=timezone.now)
+    locked_at = models.DateTimeField('взята в работу', null=True, blank=True)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ['run_at']
+        indexes = [models.Index(fields=['status', 'run_at'])]
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (см. jobs/mail.py)."""
+
+    QUEUED = 'queued'
+    SENDING = 'sending'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'в очереди'),
+        (SENDING, 'отправляется'),
+        (FAILED, 'не отправлено'),
+    )
+
+    from_email = models.CharField('отправитель', max_length=254)
+    recipients = models.TextField('получатели', default='[]')
+    message = models.BinaryField('письмо')
+    status = models.CharField(
+        'статус', max_length=10, choices=STATUS_CHOICES, default=QUEUED
+    )
+    attempts = models.PositiveIntegerField('попыток', default=0)
+    send_after = models.DateTimeField(
+        'отправить не раньше', default=timezone.now
+    )
+    locked_at = models.DateTimeField('взято в работу', null=True, blank=True)
+    last_error = models.TextField('последняя ошибка', blank=True)
+    created = models.DateTimeField('создано', auto_now_add=True)
+
+    class Meta:
+        ordering = ['send_after']
+        indexes = [models.Index(fields=['status', 'send_after'])]
+
+    def __str__(self):
+        return f'{self.from_email} → {self.recipients} ({self.status})'
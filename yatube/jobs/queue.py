@@ -0,0 +1,140 @@
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def job_name(func):
+    if isinstance(func, str):
+        return func
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, delay=None, run_at=None, max_attempts=3, **kwargs):
+    """Ставит вызов func(*args, **kwargs) в очередь.
+
+    func — функция или путь к ней, аргументы должны сериализоваться
+    в JSON. Задача пишется в ту же транзакцию, что и остальные
+    изменения запроса, и не потеряется при откате или падении.
+    При JOBS_EAGER сразу выполняются только задачи, срок которых
+    уже наступил.
+    """
+    now = timezone.now()
+    if run_at is None:
+        run_at = now
+        if delay:
+            run_at += timedelta(seconds=delay)
+    job = Job.objects.create(
+        name=job_name(func),
+        args=json.dumps(args),
+        kwargs=json.dumps(kwargs),
+        run_at=run_at,
+        max_attempts=max_attempts,
+    )
+    if settings.JOBS_EAGER and run_at <= now:
+        run_job(claim(job.pk))
+    return job
+
+
+def claim(pk):
+    """Забирает задачу в работу, если её ещё не забрал другой воркер."""
+    now = timezone.now()
+    claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+        status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1
+    )
+    if not claimed:
+        return None
+    return Job.objects.get(pk=pk)
+
+
+def claim_next():
+    candidates = Job.objects.filter(
+        status=Job.QUEUED, run_at__lte=timezone.now()
+    ).values_list('pk', flat=True)[:10]
+    for pk in candidates:
+        job = claim(pk)
+        if job is not None:
+            return job
+    return None
+
+
+def retry_delay(attempts):
+    return settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1)
+
+
+def run_job(job):
+    if job is None:
+        return
+    try:
+        func = import_string(job.name)
+        func(*json.loads(job.args), **json.loads(job.kwargs))
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s упала:\n%s', job, error)
+        if job.attempts < job.max_attempts:
+            job.status = Job.QUEUED
+            job.run_at = timezone.now() + timedelta(
+                seconds=retry_delay(job.attempts)
+            )
+        else:
+            job.status = Job.FAILED
+        job.last_error = error
+        job.locked_at = None
+        job.save(update_fields=['status', 'run_at', 'last_error', 'locked_at'])
+    else:
+        job.status = Job.DONE
+        job.locked_at = None
+        job.save(update_fields=['status', 'locked_at'])
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые не дожили до конца."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=deadline
+    ).update(status=Job.QUEUED, locked_at=None)
+
+
+def run_pending(limit=None):
+    """Выполняет готовые задачи и возвращает их число."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim_next()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def prune_jobs(batch_size=1000):
+    """Удаляет пачками задачи, выполненные раньше JOBS_KEEP_DONE секунд
+    назад, и упавшие раньше JOBS_KEEP_FAILED; возвращает их число.
+
+    Без этого таблица растёт с каждой задачей, а с ней и индекс,
+    по которому воркеры ищут следующую.
+    """
+    now = timezone.now()
+    deleted = 0
+    for status, keep in (
+        (Job.DONE, settings.JOBS_KEEP_DONE),
+        (Job.FAILED, settings.JOBS_KEEP_FAILED),
+    ):
+        old = Job.objects.filter(
+            status=status, run_at__lt=now - timedelta(seconds=keep)
+        )
+        while True:
+            pks = list(old.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            deleted += Job.objects.filter(pk__in=pks).delete()[0]
+    return deleted
@@ -0,0 +1,88 @@
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply('220 localhost ESMTP')
+        envelope = []
+        for line in self.rfile:
+            verb = line[:4].decode('ascii', 'replace').upper()
+            time.sleep(server.latency)
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb in ('MAIL', 'RSET'):
+                envelope = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                envelope.append(line[8:].strip().decode())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                self.receive(envelope)
+                envelope = []
+            elif verb == 'NOOP':
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                break
+            else:
+                self.reply('502 Command not implemented')
+
+    def receive(self, envelope):
+        lines = []
+        for line in self.rfile:
+            if line == b'.\r\n':
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        server = self.server
+        with server.lock:
+            if server.reject:
+                server.reject -= 1
+                self.reply('451 Try again later')
+                return
+            message = message_from_bytes(
+                b''.join(lines), policy=policy.default
+            )
+            message.envelope = envelope
+            server.messages.append(message)
+        self.reply('250 OK')
+
+
+class LocalSMTPServer(socketserver.ThreadingTCPServer):
+    """SMTP-сервер на localhost для тестов и замеров.
+
+    Принимает письма в messages. latency — задержка перед ответом
+    на каждую команду, reject — сколько следующих писем отклонить
+    с кодом 451.
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, latency=0):
+        super().__init__(('127.0.0.1', 0), SMTPHandler)
+        self.latency = latency
+        self.reject = 0
+        self.connections = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,198 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import Job, OutgoingEmail
+from .queue import claim, enqueue, prune_jobs, requeue_stale, run_pending
+from .smtp import LocalSMTPServer
+
+QUEUED_EMAIL = 'jobs.mail.QueuedEmailBackend'
+SMTP_EMAIL = 'django.core.mail.backends.smtp.EmailBackend'
+
+CALLS = []
+
+
+def record(value, suffix=''):
+    CALLS.append(value + suffix)
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_run(self):
+        """Задача сохраняется в базе и выполняется воркером."""
+        job = enqueue(record, 'a', suffix='!')
+        self.assertEqual(job.name, 'jobs.tests.record')
+        self.assertEqual(CALLS, [])
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(CALLS, ['a!'])
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.DONE)
+
+    def test_scheduled_job_waits(self):
+        enqueue(record, 'later', delay=60)
+        self.assertEqual(run_pending(), 0)
+        Job.objects.update(run_at=timezone.now())
+        self.assertEqual(run_pending(), 1)
+
+    def test_job_claimed_once(self):
+        job = enqueue(record, 'a')
+        self.assertIsNotNone(claim(job.pk))
+        self.assertIsNone(claim(job.pk))
+
+    def test_retry_then_fail(self):
+        """Упавшая задача повторяется с задержкой, затем помечается ошибкой."""
+        job = enqueue(explode, max_attempts=2)
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_requeue_stale(self):
+        job = enqueue(record, 'a')
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            locked_at=timezone.now() - timedelta(days=1),
+        )
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(run_pending(), 1)
+
+    def test_prune_old_jobs(self):
+        """Старые выполненные и упавшие задачи удаляются, свежие
+        и ещё не выполненные остаются."""
+        now = timezone.now()
+        for status, age in (
+            (Job.DONE, timedelta(days=2)),
+            (Job.DONE, timedelta(hours=1)),
+            (Job.FAILED, timedelta(days=2)),
+            (Job.FAILED, timedelta(days=8)),
+            (Job.QUEUED, timedelta(days=30)),
+        ):
+            Job.objects.create(
+                name='jobs.tests.record', status=status, run_at=now - age
+            )
+        self.assertEqual(prune_jobs(batch_size=1), 2)
+        self.assertEqual(
+            sorted(Job.objects.values_list('status', flat=True)),
+            [Job.DONE, Job.FAILED, Job.QUEUED],
+        )
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        enqueue(record, 'now')
+        self.assertEqual(CALLS, ['now'])
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode_keeps_delayed_jobs(self):
+        enqueue(record, 'later', delay=60)
+        self.assertEqual(CALLS, [])
+
+
+@override_settings(EMAIL_BACKEND=QUEUED_EMAIL)
+class QueuedEmailTest(TestCase):
+    def setUp(self):
+        self.smtp = LocalSMTPServer()
+        self.smtp.__enter__()
+        self.addCleanup(self.smtp.__exit__)
+        smtp_settings = override_settings(
+            EMAIL_DELIVERY_BACKEND=SMTP_EMAIL,
+            EMAIL_HOST='127.0.0.1',
+            EMAIL_PORT=self.smtp.port,
+        )
+        smtp_settings.enable()
+        self.addCleanup(smtp_settings.disable)
+
+    def send(self, count):
+        for number in range(count):
+            mail.send_mail(
+                f'Письмо {number}', 'Текст', 'from@example.com',
+                [f'user{number}@example.com'],
+            )
+
+    def test_messages_wait_for_worker(self):
+        """Письма ждут воркера, на всю пачку ставится одна задача."""
+        self.send(3)
+        self.assertEqual(self.smtp.messages, [])
+        self.assertEqual(OutgoingEmail.objects.count(), 3)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_batch_uses_one_connection(self):
+        self.send(3)
+        run_pending()
+        self.assertEqual(self.smtp.connections, 1)
+        self.assertEqual(
+            [message['Subject'] for message in self.smtp.messages],
+            ['Письмо 0', 'Письмо 1', 'Письмо 2'],
+        )
+        self.assertEqual(
+            self.smtp.messages[1].envelope, ['<user1@example.com>']
+        )
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_rejected_message_retried_with_backoff(self):
+        """Отклонённое письмо повторяется позже, остальные уходят сразу."""
+        self.smtp.reject = 1
+        self.send(2)
+        run_pending()
+        self.assertEqual(len(self.smtp.messages), 1)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.QUEUED)
+        self.assertEqual(email.attempts, 1)
+        self.assertGreater(email.send_after, timezone.now())
+        self.assertIn('451', email.last_error)
+        retry = Job.objects.get(status=Job.QUEUED)
+        self.assertEqual(retry.run_at, email.send_after)
+        Job.objects.update(run_at=timezone.now())
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        run_pending()
+        self.assertEqual(len(self.smtp.messages), 2)
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    @override_settings(EMAIL_MAX_ATTEMPTS=1)
+    def test_message_fails_after_max_attempts(self):
+        self.smtp.reject = 1
+        self.send(1)
+        run_pending()
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertFalse(Job.objects.filter(status=Job.QUEUED).exists())
+
+    def test_unreachable_server_postpones_batch(self):
+        self.send(2)
+        with override_settings(EMAIL_PORT=1):
+            run_pending()
+        self.assertEqual(
+            list(OutgoingEmail.objects.values_list('status', 'attempts')),
+            [(OutgoingEmail.QUEUED, 1), (OutgoingEmail.QUEUED, 1)],
+        )
+
+    def test_password_reset_is_queued(self):
+        """Сброс пароля не ждёт отправки письма."""
+        get_user_model().objects.create_user(
+            'reader', 'reader@example.com', 'password'
+        )
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'reader@example.com'},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.smtp.messages, [])
+        run_pending()
+        self.assertEqual(
+            self.smtp.messages[0].envelope, ['<reader@example.com>']
+        )
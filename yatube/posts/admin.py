@@ -1,6 +1,104 @@
+import datetime
+
+from django import forms
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.db import models
+from django.utils import timezone
+
+from core.pagination import EstimatedCountPaginator
+
+from .models import ArchivedPost, Post, Group, Purge
+from .purge import schedule_deletion
+
+
+def next_period(day, kind):
+    if kind == 'year':
+        return datetime.date(day.year + 1, 1, 1)
+    if kind == 'month':
+        return datetime.date(
+            day.year + day.month // 12, day.month % 12 + 1, 1
+        )
+    return day + datetime.timedelta(days=1)
+
+
+class IndexedDatesQuerySet(models.QuerySet):
+    """QuerySet, у которого dates() идёт по индексу поля скачками.
+
+    Обычный dates() — DISTINCT по усечённой дате всех строк выборки.
+    Здесь на каждый год, месяц или день приходится один запрос
+    «первое значение не раньше начала следующего периода», который
+    индекс отдаёт сразу. Для date_hierarchy админки.
+    """
+
+    def dates(self, field_name, kind, order='ASC'):
+        if kind not in ('year', 'month', 'day') or order != 'ASC':
+            return super().dates(field_name, kind, order)
+        field = self.model._meta.get_field(field_name)
+        is_datetime = isinstance(field, models.DateTimeField)
+        tz = (
+            timezone.get_current_timezone()
+            if is_datetime and settings.USE_TZ else None
+        )
+        values = self.filter(**{f'{field_name}__isnull': False}).order_by(
+            field_name
+        ).values_list(field_name, flat=True)
+        dates = []
+        value = values.first()
+        while value is not None:
+            if is_datetime:
+                if tz is not None:
+                    value = timezone.localtime(value, tz)
+                value = value.date()
+            start = value.replace(
+                month=1 if kind == 'year' else value.month,
+                day=value.day if kind == 'day' else 1,
+            )
+            dates.append(start)
+            bound = next_period(start, kind)
+            if is_datetime:
+                bound = datetime.datetime.combine(bound, datetime.time.min)
+                if tz is not None:
+                    bound = timezone.make_aware(bound, tz)
+            value = values.filter(**{f'{field_name}__gte': bound}).first()
+        return dates
+
 
-from .models import Post, Group
+class PreloadedAutocompleteSelect(AutocompleteSelect):
+    """Автодополнение, которому подпись выбранного значения передают
+    готовой: без неё виджет делает запрос на каждую строку списка."""
+
+    preloaded = None
+
+    def optgroups(self, name, value, attr=None):
+        selected = [
+            str(v) for v in value
+            if str(v) not in self.choices.field.empty_values
+        ]
+        if self.preloaded is None or selected != [str(self.preloaded[0])]:
+            return super().optgroups(name, value, attr)
+        options = []
+        if not self.is_required:
+            options.append(self.create_option(name, '', '', False, 0))
+        pk, label = self.preloaded
+        options.append(
+            self.create_option(name, pk, label, True, len(options))
+        )
+        return [(None, options, 0)]
+
+
+class PostChangeListForm(forms.ModelForm):
+    """Строка списка постов: группа уже загружена list_select_related."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        widget = self.fields['group'].widget
+        # RelatedFieldWidgetWrapper с кнопками «добавить/изменить».
+        widget = getattr(widget, 'widget', widget)
+        if self.instance.group_id:
+            group = self.instance.group
+            widget.preloaded = (group.pk, str(group))
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -12,16 +110,103 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
+    # Фильтры по дате идут по индексу (pub_date, id), тому же, что
+    # и сортировка списка.
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    autocomplete_fields = ('group',)
+    raw_id_fields = ('author',)
+    # В большой таблице COUNT(*) дороже самой страницы.
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        return IndexedDatesQuerySet(self.model, queryset.query, queryset.db)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'group':
+            kwargs['widget'] = PreloadedAutocompleteSelect(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PostChangeListForm)
+        return super().get_changelist_form(request, **kwargs)
+
+
+class ArchivedPostAdmin(admin.ModelAdmin):
+    """Архив только для просмотра: посты в нём не правят."""
+
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
+    search_fields = ('text',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+class BackgroundDeleteMixin:
+    """Удаление из админки через фоновую очистку (posts/purge.py).
+
+    Страница подтверждения не собирает все связанные объекты: у автора
+    или группы их могут быть миллионы.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        return [str(obj) for obj in objs], model_count, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_deletion(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            schedule_deletion(obj)
 
-class GroupAdmin(admin.ModelAdmin):
+
+class GroupAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     list_display = ('title', 'slug', 'description',)
     search_fields = ('title',)
     empty_value_display = '-пусто-'
 
 
 admin.site.register(Post, PostAdmin)
+admin.site.register(ArchivedPost, ArchivedPostAdmin)
 admin.site.register(Group, GroupAdmin)
+
+
+class PurgeAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'label',
+        'progress',
+        'comments_done',
+        'created',
+        'finished',
+    )
+    list_filter = ('kind',)
+    search_fields = ('label',)
+    readonly_fields = (
+        'kind', 'object_id', 'label', 'posts_total', 'posts_done',
+        'comments_done', 'created', 'finished',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+
+admin.site.register(Purge, PurgeAdmin)
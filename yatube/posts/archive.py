@@ -0,0 +1,143 @@
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.pagecache import invalidate_pages
+
+from .comments import invalidate_comments
+from .models import ArchivedComment, ArchivedPost, Comment, Post
+
+
+def field_names(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+POST_FIELDS = field_names(Post)
+COMMENT_FIELDS = field_names(Comment)
+# Сколько раз переносить пачку, к постам которой всё время добавляют
+# комментарии, прежде чем отложить её до следующего запуска.
+BATCH_ATTEMPTS = 3
+
+logger = logging.getLogger(__name__)
+
+
+def has_archive():
+    """Включён ли архив (ARCHIVE_AFTER_DAYS). Пока он выключен, ленты
+    и страницы постов не обращаются к архивным таблицам."""
+    return settings.ARCHIVE_AFTER_DAYS is not None
+
+
+def archive_cutoff(days=None):
+    days = settings.ARCHIVE_AFTER_DAYS if days is None else days
+    return timezone.now() - timedelta(days=days)
+
+
+class BatchChanged(Exception):
+    """Пока пачка копировалась, к её постам добавились комментарии."""
+
+
+def archive_batch(cutoff, batch_size):
+    """Переносит пачку самых старых постов до cutoff вместе
+    с комментариями в архив одной короткой транзакцией.
+
+    Возвращает число перенесённых постов, 0 — переносить больше нечего
+    или пачка менялась BATCH_ATTEMPTS раз подряд (её перенесёт
+    следующий запуск).
+    """
+    for _ in range(BATCH_ATTEMPTS):
+        try:
+            post_ids = move_batch(cutoff, batch_size)
+            break
+        except BatchChanged:
+            # Новые комментарии попадут в копию со следующей попытки.
+            continue
+    else:
+        logger.warning(
+            'Пачка постов до %s менялась %s раза подряд, перенос отложен',
+            cutoff, BATCH_ATTEMPTS,
+        )
+        return 0
+    for post_id in post_ids:
+        invalidate_comments(post_id)
+    invalidate_pages(*(f'post:{post_id}' for post_id in post_ids))
+    return len(post_ids)
+
+
+def move_batch(cutoff, batch_size):
+    """Копирует пачку в архив и удаляет оригиналы; возвращает id постов.
+
+    Посты пачки заблокированы (select_for_update): в PostgreSQL новый
+    комментарий к ним ждёт конца транзакции. Где блокировки строк нет
+    (SQLite), комментарий, добавленный после копирования, заметен по
+    числу удалённых строк: тогда пачка откатывается целиком
+    (BatchChanged), чтобы перенести её заново.
+    """
+    with transaction.atomic():
+        posts = list(
+            Post.objects.filter(pub_date__lt=cutoff)
+            .order_by('pub_date', 'pk')
+            .select_for_update()
+            .values(*POST_FIELDS)[:batch_size]
+        )
+        if not posts:
+            return []
+        post_ids = [post['id'] for post in posts]
+        comments = Comment.objects.filter(post_id__in=post_ids)
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**post) for post in posts
+        )
+        copied = ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment)
+            for comment in comments.values(*COMMENT_FIELDS)
+        )
+        # Без сигналов post_delete: картинки остаются за архивом,
+        # а кэши постов сбрасываются разом для всей пачки.
+        if comments._raw_delete(comments.db) != len(copied):
+            raise BatchChanged
+        Post.objects.filter(pk__in=post_ids)._raw_delete(Post.objects.db)
+    return post_ids
+
+
+def archive_posts(cutoff, batch_size=None, pause=0, limit=None,
+                  progress=None):
+    """Переносит в архив посты старше cutoff, пачка за пачкой.
+
+    Прерванный перенос можно просто запустить снова: каждая пачка
+    переносится целиком или не переносится вовсе. progress, если задан,
+    вызывается с числом уже перенесённых постов после каждой пачки.
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    moved = 0
+    while limit is None or moved < limit:
+        size = batch_size if limit is None else min(
+            batch_size, limit - moved
+        )
+        count = archive_batch(cutoff, size)
+        if not count:
+            break
+        moved += count
+        if progress is not None:
+            progress(moved)
+        if pause:
+            time.sleep(pause)
+    return moved
+
+
+def get_post(queryset, archived_queryset, post_id):
+    """Пост из основной таблицы или, если его там нет, из архива."""
+    post = queryset.filter(pk=post_id).first()
+    if post is None and has_archive():
+        post = archived_queryset.filter(pk=post_id).first()
+    return post
+
+
+def count_posts(**lookups):
+    """Число постов вместе с архивными: count_posts(author=author)."""
+    count = Post.objects.filter(**lookups).count()
+    if has_archive():
+        count += ArchivedPost.objects.filter(**lookups).count()
+    return count
@@ -0,0 +1,39 @@
+from django.core.cache import cache
+
+from .models import ArchivedComment, Comment
+
+COMMENTS_WINDOW = 20
+COMMENTS_TIMEOUT = 60 * 60
+
+
+def comments_key(post_id):
+    return f'post_comments:{post_id}'
+
+
+def build_comments(post_id, limit=COMMENTS_WINDOW, archived=False):
+    """Последние комментарии поста вместе с авторами одним запросом.
+
+    Берём на один больше окна, чтобы без COUNT понять, есть ли ещё.
+    archived — пост в архиве, и комментарии к нему там же.
+    """
+    model = ArchivedComment if archived else Comment
+    comments = list(
+        model.objects.filter(post_id=post_id)
+        .select_related('author')
+        .order_by('-created', '-pk')[:limit + 1]
+    )
+    return {'comments': comments[:limit], 'has_more': len(comments) > limit}
+
+
+def get_comments(post_id, archived=False):
+    """Окно последних комментариев поста из кэша."""
+    key = comments_key(post_id)
+    window = cache.get(key)
+    if window is None:
+        window = build_comments(post_id, archived=archived)
+        cache.set(key, window, COMMENTS_TIMEOUT)
+    return window
+
+
+def invalidate_comments(*post_ids):
+    cache.delete_many([comments_key(post_id) for post_id in post_ids])
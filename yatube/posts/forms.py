@@ -1,6 +1,65 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.urls import reverse
+from django.utils.html import format_html
+from PIL import Image
 
-from .models import Post, Comment
+from .groups import get_group_choices
+from .models import Post, Purge, Comment
+from .purge import hidden_ids
+from .uploads import normalize_image
+
+
+class GroupAutocompleteInput(forms.TextInput):
+    """Поле ввода slug группы с подсказками из posts:group_autocomplete."""
+
+    class Media:
+        js = ('js/group_autocomplete.js',)
+
+    def get_context(self, name, value, attrs):
+        context = super().get_context(name, value, attrs)
+        widget_attrs = context['widget']['attrs']
+        widget_attrs.setdefault('id', f'id_{name}')
+        widget_attrs['list'] = f'{widget_attrs["id"]}_options'
+        widget_attrs['autocomplete'] = 'off'
+        widget_attrs['data-autocomplete-url'] = reverse(
+            'posts:group_autocomplete'
+        )
+        return context
+
+    def render(self, name, value, attrs=None, renderer=None):
+        context = self.get_context(name, value, attrs)
+        return format_html(
+            '{}<datalist id="{}"></datalist>',
+            super().render(name, value, attrs, renderer),
+            context['widget']['attrs']['list'],
+        )
+
+
+class GroupChoiceField(forms.ModelChoiceField):
+    """Группа по pk (из <select>) или, при by_slug, по slug (из поиска).
+
+    В обоих случаях проверка — один запрос по уникальному индексу.
+    Удалённые группы, которые ещё вычищаются в фоне, не принимаются.
+    """
+
+    # Поиск присылает slug, даже если он из одних цифр.
+    by_slug = False
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if self.by_slug:
+            group = self.queryset.filter(slug=str(value)).first()
+        else:
+            group = super().to_python(value)
+        if group is None or group.pk in hidden_ids(Purge.GROUP):
+            raise ValidationError(
+                self.error_messages['invalid_choice'],
+                code='invalid_choice',
+            )
+        return group
 
 
 class PostForm(forms.ModelForm):
@@ -14,6 +73,55 @@ class PostForm(forms.ModelForm):
             'text': 'текст нового поста',
             'group': 'группа, к которой относится пост',
         }
+        field_classes = {'group': GroupChoiceField}
+
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+        self.setup_group_field()
+
+    def setup_group_field(self):
+        """<select> из кэша, пока групп немного, иначе поиск по slug."""
+        field = self.fields['group']
+        choices = get_group_choices()
+        if choices is not None:
+            field.widget.choices = [('', field.empty_label), *choices]
+            return
+        field.widget = GroupAutocompleteInput()
+        field.by_slug = True
+        field.widget.is_required = field.required
+        group_id = self.instance.group_id
+        if group_id and self.initial.get('group') == group_id:
+            self.initial['group'] = self.instance.group.slug
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if isinstance(image, UploadedFile):
+            try:
+                return normalize_image(image)
+            except Image.DecompressionBombError:
+                raise ValidationError(
+                    'Слишком большое разрешение картинки',
+                    code='image_too_large',
+                )
+            except (OSError, ValueError):
+                raise ValidationError(
+                    'Не удалось обработать картинку: файл повреждён',
+                    code='invalid_image',
+                )
+        return image
+
+    def _get_validation_exclusions(self):
+        # Группу уже нашёл GroupChoiceField; ForeignKey.validate проверил
+        # бы её существование вторым запросом.
+        return [*super()._get_validation_exclusions(), 'group']
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Файлы, отклонённые ещё при загрузке (posts.uploads).
+        for field, error in self.upload_errors.items():
+            self.add_error(field, error)
+        return cleaned_data
 
 
 class CommentForm(forms.ModelForm):
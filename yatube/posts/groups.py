@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import Group, Purge
+from .purge import hidden_ids
+
+GROUP_CHOICES_KEY = 'group_choices'
+GROUP_CHOICES_TIMEOUT = 60 * 60
+# Метка в кэше: групп больше GROUP_SELECT_LIMIT, нужен поиск.
+TOO_MANY = 'too_many'
+AUTOCOMPLETE_LIMIT = 10
+
+
+def get_group_choices():
+    """[(pk, title)] всех групп из кэша или None, если групп слишком
+    много для <select> и форма должна искать их по мере ввода."""
+    choices = cache.get(GROUP_CHOICES_KEY)
+    if choices is None:
+        limit = settings.GROUP_SELECT_LIMIT
+        choices = list(
+            visible_groups(Group.objects.order_by('title'))
+            .values_list('pk', 'title')[:limit + 1]
+        )
+        if len(choices) > limit:
+            choices = TOO_MANY
+        cache.set(GROUP_CHOICES_KEY, choices, GROUP_CHOICES_TIMEOUT)
+    return None if choices == TOO_MANY else choices
+
+
+def visible_groups(queryset):
+    """Группы без удалённых, которые ещё вычищаются в фоне."""
+    hidden = hidden_ids(Purge.GROUP)
+    if hidden:
+        queryset = queryset.exclude(pk__in=hidden)
+    return queryset
+
+
+def invalidate_group_choices():
+    cache.delete(GROUP_CHOICES_KEY)
+
+
+def search_groups(term, limit=AUTOCOMPLETE_LIMIT):
+    """Группы, чьё название или slug начинается с term.
+
+    Только поиск по началу строки: его обслуживают индексы по title
+    и slug с varchar_pattern_ops в PostgreSQL. Для title индекс задан
+    в Group.Meta, для slug (unique) его вместе с обычным создаёт сам
+    Django — индекс *_like. Регистр первой буквы названия не важен,
+    slug всегда в нижнем регистре.
+    """
+    condition = (
+        Q(title__startswith=term)
+        | Q(title__startswith=term[:1].upper() + term[1:])
+        | Q(slug__startswith=term.lower())
+    )
+    return list(
+        visible_groups(Group.objects.filter(condition)).order_by('title')
+        .values('pk', 'title', 'slug')[:limit]
+    )
@@ -0,0 +1,19 @@
+from core.pagecache import hole
+
+from .forms import CommentForm
+
+
+@hole('comment_form', 'includes/comment_form.html', post_id=int)
+def comment_form(request, post_id):
+    return {'form': CommentForm(), 'post_id': post_id}
+
+
+@hole(
+    'post_edit_link', 'includes/post_edit_link.html',
+    post_id=int, author_id=int,
+)
+def post_edit_link(request, post_id, author_id):
+    return {
+        'post_id': post_id,
+        'can_edit': request.user.pk == author_id,
+    }
@@ -0,0 +1,50 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from jobs.queue import enqueue
+
+from .models import ArchivedPost, Post
+from .storage import SAVED_TIMEOUT, content_storage, image_lock, saved_key
+
+
+def delete_image(name):
+    """Удаляет файл картинки, её миниатюры и записи о них в sorl."""
+    image_file = ImageFile(name, storage=content_storage)
+    default.kvstore.delete(image_file)
+    image_file.delete()
+
+
+def release_image(name):
+    """Удаляет картинку, если на неё больше не ссылается ни один пост.
+
+    Число ссылок — число постов с таким image, в том числе в архиве
+    (поле проиндексировано в обеих таблицах).
+    Проверка откладывается до коммита, чтобы откат транзакции
+    не оставил посты без файлов.
+    """
+    if name:
+        transaction.on_commit(partial(delete_unused_image, name))
+
+
+def delete_unused_image(name):
+    """Удаляет картинку, если на неё не ссылается ни один пост.
+
+    Тот же файл могли только что загрузить для поста, который ещё
+    не закоммичен: хранилище отдаёт имя существующего файла. Такой
+    файл (или занятый замок) не трогаем, а проверяем ещё раз позже
+    фоновой задачей.
+    """
+    with image_lock(name) as locked:
+        if any(
+            model.objects.filter(image=name).exists()
+            for model in (Post, ArchivedPost)
+        ):
+            return
+        if locked and not cache.get(saved_key(name)):
+            delete_image(name)
+            return
+    enqueue(delete_unused_image, name, delay=SAVED_TIMEOUT)
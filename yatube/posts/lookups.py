@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import cache
+from django.http import Http404
+
+from .models import Group, User
+
+MISSING = '__missing__'
+
+
+class IdentityMap:
+    """Кэш объектов по уникальному полю: LRU в процессе и общий кэш.
+
+    Неизвестные значения тоже кэшируются (на меньший срок), чтобы
+    повторные 404 не доходили до базы. Локальный LRU живёт недолго:
+    сигналы сбрасывают его только в текущем процессе; size=0 его
+    отключает.
+    """
+
+    def __init__(self, model, field, size=256, timeout=300,
+                 local_timeout=5, negative_timeout=60):
+        self.model = model
+        self.field = field
+        self.prefix = f'identity:{model._meta.label_lower}:{field}'
+        self.size = size
+        self.timeout = timeout
+        self.local_timeout = local_timeout
+        self.negative_timeout = negative_timeout
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'local': 0, 'shared': 0, 'db': 0, 'negative': 0}
+
+    def _key(self, value):
+        digest = hashlib.md5(str(value).encode()).hexdigest()
+        return f'{self.prefix}:{digest}'
+
+    def _pk_key(self, pk):
+        return f'{self.prefix}:pk:{pk}'
+
+    def _get_local(self, value):
+        with self._lock:
+            entry = self._local.get(value)
+            if entry is None:
+                return None
+            expires, obj = entry
+            if expires < time.monotonic():
+                del self._local[value]
+                return None
+            self._local.move_to_end(value)
+            return obj
+
+    def _set_local(self, value, obj):
+        if not self.size:
+            return
+        with self._lock:
+            self._local[value] = (time.monotonic() + self.local_timeout, obj)
+            self._local.move_to_end(value)
+            while len(self._local) > self.size:
+                self._local.popitem(last=False)
+
+    def get(self, value):
+        """Возвращает объект или None, если его нет."""
+        obj = self._get_local(value)
+        if obj is not None:
+            self._count(obj, 'local')
+            return None if obj == MISSING else obj
+        obj = cache.get(self._key(value))
+        if obj is not None:
+            self._count(obj, 'shared')
+            self._set_local(value, obj)
+            return None if obj == MISSING else obj
+        self._count(None, 'db')
+        try:
+            obj = self.model.objects.get(**{self.field: value})
+        except self.model.DoesNotExist:
+            cache.set(self._key(value), MISSING, self.negative_timeout)
+            self._set_local(value, MISSING)
+            return None
+        cache.set_many({
+            self._key(value): obj,
+            self._pk_key(obj.pk): value,
+        }, self.timeout)
+        self._set_local(value, obj)
+        return obj
+
+    def get_or_404(self, value):
+        obj = self.get(value)
+        if obj is None:
+            raise Http404(
+                f'No {self.model._meta.object_name} matches the given query.'
+            )
+        return obj
+
+    def _count(self, obj, source):
+        # += на словаре не атомарен: потоки теряли бы попадания.
+        with self._lock:
+            self.counters['negative' if obj == MISSING else source] += 1
+
+    def forget(self, instance):
+        """Сбрасывает записи объекта, в том числе по старому значению."""
+        value = getattr(instance, self.field)
+        keys = [self._key(value), self._pk_key(instance.pk)]
+        old_value = cache.get(self._pk_key(instance.pk))
+        if old_value is not None:
+            keys.append(self._key(old_value))
+        cache.delete_many(keys)
+        with self._lock:
+            for key, (expires, obj) in list(self._local.items()):
+                if key == value or (
+                    obj != MISSING and obj.pk == instance.pk
+                ):
+                    del self._local[key]
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+
+    def stats(self):
+        """Счётчики попаданий и доля запросов, обслуженных без базы."""
+        with self._lock:
+            counters = dict(self.counters)
+        total = sum(counters.values())
+        hits = total - counters['db']
+        return dict(
+            counters,
+            total=total,
+            hit_rate=hits / total if total else 0.0,
+        )
+
+
+groups_by_slug = IdentityMap(Group, 'slug')
+users_by_username = IdentityMap(User, 'username')
+# Пользователи сессий: хэши паролей не держим в памяти процесса.
+users_by_id = IdentityMap(User, 'pk', size=0)
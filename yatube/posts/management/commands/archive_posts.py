@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.archive import archive_cutoff, archive_posts, has_archive
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит посты старше ARCHIVE_AFTER_DAYS дней вместе '
+        'с комментариями в архив, пачками. Можно прерывать и запускать '
+        'снова, например из cron раз в сутки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int,
+            help='Возраст постов в днях вместо ARCHIVE_AFTER_DAYS.',
+        )
+        parser.add_argument('--batch-size', type=int)
+        parser.add_argument(
+            '--limit', type=int,
+            help='Перенести не больше стольких постов за запуск.',
+        )
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        if not has_archive():
+            # Ленты не читают архив: перенесённые посты бы пропали.
+            raise CommandError('Архив выключен: задайте ARCHIVE_AFTER_DAYS.')
+        cutoff = archive_cutoff(options['days'])
+        verbosity = options['verbosity']
+
+        def progress(moved):
+            if verbosity > 1:
+                self.stdout.write(f'Перенесено постов: {moved}')
+
+        moved = archive_posts(
+            cutoff, options['batch_size'], options['pause'],
+            options['limit'], progress,
+        )
+        self.stdout.write(
+            f'Перенесено в архив постов до {cutoff:%Y-%m-%d}: {moved}.'
+        )
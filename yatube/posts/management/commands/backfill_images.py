@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import IMAGE_META_FIELDS, Post
+
+
+class Command(BaseCommand):
+    help = 'Записывает размеры, формат и объём картинок старых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перечитать все картинки, а не только незаполненные.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk').only(
+            'pk', 'image', *IMAGE_META_FIELDS
+        )
+        if not options['all']:
+            posts = posts.filter(image_size__isnull=True)
+        batch_size = options['batch_size']
+        last = updated = missing = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last)[:batch_size])
+            if not batch:
+                break
+            last = batch[-1].pk
+            found = []
+            for post in batch:
+                try:
+                    post.read_image_meta()
+                except OSError as error:
+                    missing += 1
+                    self.stderr.write(f'Пост {post.pk}: {error}')
+                    continue
+                found.append(post)
+            Post.objects.bulk_update(found, IMAGE_META_FIELDS)
+            updated += len(found)
+        self.stdout.write(
+            f'Обновлено постов: {updated}, файлов не найдено: {missing}.'
+        )
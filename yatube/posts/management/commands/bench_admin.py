@@ -0,0 +1,114 @@
+import time
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.benchmarks import report
+from posts.models import Group, Post
+
+
+class LegacyPostAdmin(admin.ModelAdmin):
+    """PostAdmin до оптимизации: <select> всех групп в каждой строке,
+    COUNT(*) по таблице, без list_select_related и индекса по дате."""
+
+    list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_editable = ('group',)
+    search_fields = ('text',)
+    list_filter = ('pub_date',)
+    empty_value_display = '-пусто-'
+
+
+class Command(BaseCommand):
+    help = 'Время открытия списка постов в админке на большой таблице.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10 ** 6)
+        parser.add_argument('--groups', type=int, default=10 ** 4)
+        parser.add_argument('--number', type=int, default=3)
+        parser.add_argument('--batch-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.fill(options)
+            self.run(options['number'])
+            transaction.set_rollback(True)
+
+    def fill(self, options):
+        started = time.perf_counter()
+        self.admin = get_user_model().objects.create_superuser(
+            'bench-admin', 'bench-admin@example.com', 'bench-admin'
+        )
+        groups = options['groups']
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'bench-{number}',
+                  description='') for number in range(groups)
+        )
+        group_ids = list(Group.objects.values_list('pk', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, options['posts'], batch_size):
+            stop = min(start + batch_size, options['posts'])
+            Post.objects.bulk_create(
+                Post(author=self.admin,
+                     group_id=group_ids[number % len(group_ids)],
+                     text=f'Пост {number}', excerpt=f'Пост {number}')
+                for number in range(start, stop)
+            )
+        self.stdout.write(
+            f'Постов: {options["posts"]}, групп: {groups}, '
+            f'заполнено за {time.perf_counter() - started:.0f} с'
+        )
+
+    def run(self, number):
+        factory = RequestFactory()
+        path = reverse('admin:posts_post_changelist')
+        month = Post.objects.only('pub_date').first().pub_date
+        pages = (
+            ('first page', {}),
+            ('month', {
+                'pub_date__year': month.year,
+                'pub_date__month': month.month,
+            }),
+        )
+        variants = (
+            ('current', admin.site._registry[Post]),
+            ('legacy', LegacyPostAdmin(Post, admin.site)),
+        )
+        for label, model_admin in variants:
+            if label == 'legacy':
+                # Индекс удаляется в той же транзакции и вернётся
+                # при откате.
+                self.drop_indexes()
+            for page, params in pages:
+                # Старая админка без date_hierarchy принимает те же
+                # параметры как обычный фильтр по полю.
+                request = factory.get(path, params)
+                request.user = self.admin
+                seconds, queries, size = self.changelist(
+                    model_admin, request, number
+                )
+                report(self.stdout, f'{label}, {page}', seconds)
+                self.stdout.write(
+                    f'{"":<40} {queries} запросов, {size / 1024:.0f} KiB'
+                )
+
+    def drop_indexes(self):
+        with connection.cursor() as cursor:
+            for index in Post._meta.indexes:
+                cursor.execute(
+                    f'DROP INDEX {connection.ops.quote_name(index.name)}'
+                )
+
+    def changelist(self, model_admin, request, number):
+        elapsed = 0
+        for _ in range(number):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = model_admin.changelist_view(request)
+                response.render()
+                elapsed += time.perf_counter() - started
+        return elapsed / number, len(queries), len(response.content)
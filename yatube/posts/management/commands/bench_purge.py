@@ -0,0 +1,133 @@
+import resource
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from jobs.models import Job
+from jobs.queue import job_name
+from posts.models import Comment, Post
+from posts.purge import run_purge, schedule_deletion
+from posts.views import FEED_DEFER, POST_FILTER
+
+User = get_user_model()
+
+
+class FeedReader(threading.Thread):
+    """Читает первую страницу общей ленты в своём соединении, пока
+    идёт удаление, и запоминает время каждого чтения."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.stopped = threading.Event()
+        self.latencies = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            while not self.stopped.is_set():
+                started = time.perf_counter()
+                try:
+                    list(
+                        Post.objects.select_related('author', 'group')
+                        .defer(*FEED_DEFER)[:POST_FILTER]
+                    )
+                except DatabaseError:
+                    self.errors += 1
+                self.latencies.append(time.perf_counter() - started)
+                time.sleep(0.01)
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаление автора с большой историей: каскад Django и фоновая '
+        'очистка пачками, задержки параллельного чтения ленты. '
+        'Пишет в настроенную базу и коммитит: запускать на копии.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10 ** 6)
+        parser.add_argument(
+            '--comments', type=int, default=10 ** 5,
+            help='Комментариев других пользователей к постам автора.',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--skip-cascade', action='store_true',
+            help='Не мерить каскадное удаление (долго и много памяти).',
+        )
+
+    def handle(self, *args, **options):
+        self.reader = User.objects.create_user('bench-purge-reader')
+        # Каскад последним: пик памяти процесса только растёт.
+        variants = [('purge', self.purge)]
+        if not options['skip_cascade']:
+            variants.append(('cascade', self.cascade))
+        try:
+            for label, delete in variants:
+                author = self.fill(options)
+                self.run(label, delete, author)
+        finally:
+            self.reader.delete()
+
+    def fill(self, options):
+        started = time.perf_counter()
+        author = User.objects.create_user('bench-purge-author')
+        batch_size = options['batch_size']
+        total = options['posts']
+        for start in range(0, total, batch_size):
+            stop = min(start + batch_size, total)
+            Post.objects.bulk_create(
+                Post(author=author, text=f'Пост {number}',
+                     excerpt=f'Пост {number}')
+                for number in range(start, stop)
+            )
+        post_ids = list(
+            Post.objects.filter(author=author).order_by('pk')
+            .values_list('pk', flat=True)[:options['comments']]
+        )
+        for start in range(0, len(post_ids), batch_size):
+            Comment.objects.bulk_create(
+                Comment(post_id=post_id, author=self.reader, text='!')
+                for post_id in post_ids[start:start + batch_size]
+            )
+        self.stdout.write(
+            f'Постов: {total}, комментариев: {len(post_ids)}, '
+            f'заполнено за {time.perf_counter() - started:.0f} с'
+        )
+        return author
+
+    def cascade(self, author):
+        author.delete()
+
+    def purge(self, author):
+        purge = schedule_deletion(author)
+        # Задачу выполняет этот процесс, как это сделал бы воркер.
+        Job.objects.filter(name=job_name(run_purge)).delete()
+        run_purge(purge.pk, budget=float('inf'))
+        purge.delete()
+
+    def run(self, label, delete, author):
+        reader = FeedReader()
+        reader.start()
+        started = time.perf_counter()
+        delete(author)
+        elapsed = time.perf_counter() - started
+        reader.stop()
+        latencies = sorted(reader.latencies) or [0]
+        p99 = latencies[int(len(latencies) * 0.99)]
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        self.stdout.write(
+            f'{label:<10} удаление {elapsed:8.1f} с; чтений ленты '
+            f'{len(reader.latencies)}, p99 {p99 * 1000:.0f} мс, '
+            f'максимум {latencies[-1] * 1000:.0f} мс, ошибок '
+            f'{reader.errors}; пик памяти процесса {rss:.0f} MiB'
+        )
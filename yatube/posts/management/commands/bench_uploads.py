@@ -0,0 +1,120 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory, override_settings
+from PIL import Image
+
+from posts.forms import PostForm
+from posts.uploads import get_upload_errors
+
+DEFAULT_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+
+
+def make_jpeg(megabytes):
+    """Шумная JPEG-картинка размером примерно megabytes МБ."""
+    side = int((megabytes * 1024 * 1024 / 1.1) ** 0.5)
+    noise = Image.frombytes('RGB', (side, side), os.urandom(side * side * 3))
+    output = BytesIO()
+    noise.save(output, 'JPEG', quality=95)
+    return output.getvalue()
+
+
+def rss_bytes():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+class PeakRSS(threading.Thread):
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.base = self.peak = rss_bytes()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            self.peak = max(self.peak, rss_bytes())
+            time.sleep(0.005)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        return self.peak - self.base
+
+
+class UnprocessedPostForm(PostForm):
+    """PostForm до появления обработки картинок при загрузке."""
+
+    def clean_image(self):
+        return self.cleaned_data.get('image')
+
+
+def process(form_class, request):
+    form = form_class(
+        request.POST, request.FILES,
+        upload_errors=get_upload_errors(request),
+    )
+    form.is_valid()
+    for upload in request.FILES.values():
+        upload.close()
+    return form
+
+
+class Command(BaseCommand):
+    help = 'Пиковая память при одновременной загрузке больших картинок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size-mb', type=int, default=20)
+        parser.add_argument('--clients', type=int, default=8)
+
+    def handle(self, *args, **options):
+        image = make_jpeg(options['size_mb'])
+        self.stdout.write(
+            f'Картинка: {len(image) / 2 ** 20:.1f} МБ, '
+            f'{Image.open(BytesIO(image)).size}, '
+            f'клиентов: {options["clients"]}'
+        )
+        modes = {
+            'стандартные обработчики, без обработки': (
+                UnprocessedPostForm,
+                dict(FILE_UPLOAD_HANDLERS=DEFAULT_HANDLERS),
+            ),
+            'потоковая проверка и уменьшение': (PostForm, {}),
+            'отказ по заголовку (IMAGE_MAX_PIXELS)': (
+                PostForm, dict(IMAGE_MAX_PIXELS=10 ** 6),
+            ),
+        }
+        for label, (form_class, overrides) in modes.items():
+            with override_settings(**overrides):
+                self.run(label, form_class, image, options['clients'])
+
+    def run(self, label, form_class, image, clients):
+        factory = RequestFactory()
+        requests = [
+            factory.post('/create/', {
+                'text': 'bench',
+                'image': SimpleUploadedFile('big.jpg', image, 'image/jpeg'),
+            })
+            for _ in range(clients)
+        ]
+        monitor = PeakRSS()
+        monitor.start()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(clients) as pool:
+            forms = list(pool.map(
+                lambda request: process(form_class, request), requests
+            ))
+        elapsed = time.perf_counter() - started
+        peak = monitor.stop()
+        valid = sum(form.is_valid() for form in forms)
+        self.stdout.write(
+            f'{label:<40} пик RSS +{peak / 2 ** 20:7.1f} МБ  '
+            f'{elapsed:6.2f} с  принято {valid}/{clients}'
+        )
@@ -0,0 +1,73 @@
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts.models import ArchivedPost, Post
+from posts.storage import HASH_CHUNK, content_storage, file_digest
+
+
+def read_chunks(path):
+    with open(path, 'rb') as file:
+        yield from iter(lambda: file.read(HASH_CHUNK), b'')
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит картинки постов в хранилище по хешу содержимого, '
+        'удаляет дубликаты и сообщает, сколько места освобождено.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--directory', default='posts')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не меняя.',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        root = content_storage.path(options['directory'])
+        files = duplicates = saved = 0
+        for directory, _, filenames in os.walk(root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(
+                    path, content_storage.location
+                ).replace(os.sep, '/')
+                target = content_storage.content_name(
+                    options['directory'] + '/' + filename,
+                    file_digest(read_chunks(path)),
+                ).replace(os.sep, '/')
+                if target == name:
+                    continue
+                files += 1
+                size = os.path.getsize(path)
+                is_duplicate = content_storage.exists(target)
+                if is_duplicate:
+                    duplicates += 1
+                    saved += size
+                if dry_run:
+                    continue
+                self.relink(name, target, path, is_duplicate)
+        verb = 'Можно освободить' if dry_run else 'Освобождено'
+        self.stdout.write(
+            f'Перенесено файлов: {files}, дубликатов: {duplicates}. '
+            f'{verb}: {saved} байт.'
+        )
+
+    def relink(self, name, target, path, is_duplicate):
+        if not is_duplicate:
+            os.makedirs(
+                os.path.dirname(content_storage.path(target)), exist_ok=True
+            )
+            os.replace(path, content_storage.path(target))
+        with transaction.atomic():
+            for model in (Post, ArchivedPost):
+                model.objects.filter(image=name).update(image=target)
+        # Миниатюры старого имени больше не нужны.
+        default.kvstore.delete(ImageFile(name, storage=content_storage))
+        if is_duplicate:
+            os.remove(path)
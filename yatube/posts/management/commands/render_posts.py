@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML и анонсы постов, сохранённых без них.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перерисовать все посты, а не только пустые.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.order_by('pk').only('pk', 'text')
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        batch_size = options['batch_size']
+        last = rendered = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last)[:batch_size])
+            if not batch:
+                break
+            for post in batch:
+                post.render_text()
+            Post.objects.bulk_update(batch, ['text_html', 'excerpt'])
+            rendered += len(batch)
+            last = batch[-1].pk
+        self.stdout.write(f'Обновлено постов: {rendered}.')
@@ -0,0 +1,88 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Прогревает кэши после выкладки или перезапуска: шаблоны, '
+        'миниатюры и страницы главной, самых больших групп, авторов '
+        'и постов с первых страниц главной.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages', type=int, default=warmup.WARM_PAGES,
+            help='Сколько первых страниц главной прогреть.',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=warmup.WARM_GROUPS,
+            help='Сколько групп с наибольшим числом постов прогреть.',
+        )
+        parser.add_argument(
+            '--profiles', type=int, default=warmup.WARM_PROFILES,
+            help='Сколько профилей авторов с главной прогреть.',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=warmup.WARM_POSTS,
+            help='Сколько постов с главной прогреть.',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=warmup.WARM_WORKERS,
+            help='Сколько страниц и миниатюр готовить одновременно.',
+        )
+        parser.add_argument(
+            '--host', help='Хост запросов вместо первого из ALLOWED_HOSTS.',
+        )
+
+    def handle(self, *args, **options):
+        backend = settings.CACHES['default']['BACKEND']
+        if backend.endswith('LocMemCache'):
+            # Кэш в памяти у каждого процесса свой: страницы останутся
+            # в этой команде. Для воркеров — WARM_CACHES_ON_STARTUP.
+            self.stderr.write(
+                'Кэш default — LocMemCache: прогреются только шаблоны '
+                'и миниатюры, страницы останутся в этом процессе.'
+            )
+        report = warmup.warm_caches(
+            options['pages'], options['groups'], options['profiles'],
+            options['posts'], options['workers'], options['host'],
+        )
+        loaded, errors = report['templates']
+        for name, error in errors:
+            self.stderr.write(f'{name}: {error}')
+        self.stdout.write(
+            f'Шаблоны: {loaded} за {report["templates_time"]:.2f} с'
+        )
+
+        created = 0
+        for post, result, _ in report['thumbnails']:
+            if isinstance(result, Exception):
+                self.stderr.write(f'Миниатюра поста {post.pk}: {result}')
+            else:
+                created += 1
+        self.stdout.write(
+            f'Миниатюры: проверено {report["thumbnails_checked"]}, '
+            f'создано {created} за {report["thumbnails_time"]:.2f} с'
+        )
+
+        times = defaultdict(list)
+        for view_name, url, result, seconds in report['pages']:
+            if isinstance(result, Exception) or result != 200:
+                self.stderr.write(f'{url}: {result}')
+                continue
+            times[view_name].append(seconds)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{url} {seconds * 1000:.0f} мс')
+        for view_name, seconds in times.items():
+            self.stdout.write(
+                f'{view_name:<20} страниц: {len(seconds):4}, '
+                f'самая долгая {max(seconds) * 1000:.0f} мс'
+            )
+        self.stdout.write(
+            f'Страницы: {sum(map(len, times.values()))} '
+            f'из {len(report["pages"])} за {report["pages_time"]:.2f} с'
+        )
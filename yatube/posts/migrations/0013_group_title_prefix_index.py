@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-19 17:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0012_post_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='group',
+            index=models.Index(fields=['title'], name='posts_group_title_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
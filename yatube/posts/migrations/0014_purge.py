@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-19 17:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0013_group_title_prefix_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Purge',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'пользователь'), ('group', 'группа')], max_length=10, verbose_name='что удаляется')),
+                ('object_id', models.PositiveIntegerField(verbose_name='id объекта')),
+                ('label', models.CharField(max_length=200, verbose_name='название')),
+                ('posts_total', models.PositiveIntegerField(blank=True, null=True, verbose_name='постов к очистке')),
+                ('posts_done', models.PositiveIntegerField(default=0, verbose_name='постов обработано')),
+                ('comments_done', models.PositiveIntegerField(default=0, verbose_name='комментариев удалено')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='создана')),
+                ('finished', models.DateTimeField(blank=True, null=True, verbose_name='завершена')),
+            ],
+            options={
+                'ordering': ['-created'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='purge',
+            index=models.Index(fields=['kind', 'object_id'], name='posts_purge_kind_a4c470_idx'),
+        ),
+    ]
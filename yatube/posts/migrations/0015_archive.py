@@ -0,0 +1,55 @@
+# Generated by Django 2.2.16 on 2026-10-19 17:45
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import posts.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_purge'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('text', models.TextField()),
+                ('image', models.ImageField(blank=True, db_index=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка')),
+                ('image_width', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='ширина картинки')),
+                ('image_height', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='высота картинки')),
+                ('image_format', models.CharField(blank=True, editable=False, max_length=10, verbose_name='формат картинки')),
+                ('image_size', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='размер картинки в байтах')),
+                ('text_html', models.TextField(blank=True, editable=False, verbose_name='текст в HTML')),
+                ('excerpt', models.CharField(blank=True, editable=False, max_length=300, verbose_name='анонс')),
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('pub_date', models.DateTimeField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL)),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group')),
+            ],
+            options={
+                'ordering': ['-pub_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('text', models.CharField(max_length=200, verbose_name='Текст комментария')),
+                ('created', models.DateTimeField(verbose_name='дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(fields=['pub_date', 'id'], name='posts_archi_pub_dat_c60017_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcomment',
+            index=models.Index(fields=['post', '-created'], name='posts_archi_post_id_94e1d5_idx'),
+        ),
+    ]
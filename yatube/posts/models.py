@@ -1,8 +1,18 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from PIL import Image
+
+from .storage import content_storage
 
 User = get_user_model()
 
+EXCERPT_LENGTH = 300
+IMAGE_META_FIELDS = (
+    'image_width', 'image_height', 'image_format', 'image_size'
+)
+
 
 class Group(models.Model):
     title = models.CharField(max_length=200)
@@ -12,13 +22,106 @@ class Group(models.Model):
                             verbose_name='slug')
     description = models.TextField()
 
+    class Meta:
+        # Поиск групп по началу названия (posts.groups.search_groups);
+        # в PostgreSQL LIKE 'term%' использует только индекс
+        # с varchar_pattern_ops. Для slug такой индекс (*_like) Django
+        # создаёт сам, как для любого unique CharField.
+        indexes = [
+            models.Index(
+                fields=['title'], name='posts_group_title_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
     def __str__(self) -> str:
         return self.title
 
 
-class Post(models.Model):
+class PostBase(models.Model):
+    """Поля и поведение поста, общие для Post и ArchivedPost."""
+
     text = models.TextField()
     pub_date = models.DateTimeField(auto_now_add=True)
+    image = models.ImageField(
+        'Картинка',
+        upload_to='posts/',
+        storage=content_storage,
+        blank=True,
+        db_index=True,
+    )
+    # Заполняются при загрузке картинки (см. read_image_meta и
+    # manage.py backfill_images): шаблонам не нужно открывать файл.
+    # width_field/height_field не подходят: пока поля пустые, Django
+    # открывает картинку при каждой загрузке поста из базы.
+    image_width = models.PositiveIntegerField(
+        'ширина картинки', null=True, blank=True, editable=False
+    )
+    image_height = models.PositiveIntegerField(
+        'высота картинки', null=True, blank=True, editable=False
+    )
+    image_format = models.CharField(
+        'формат картинки', max_length=10, blank=True, editable=False
+    )
+    image_size = models.PositiveIntegerField(
+        'размер картинки в байтах', null=True, blank=True, editable=False
+    )
+    # Готовятся при сохранении, чтобы ленты не читали и не размечали
+    # полный текст (см. render_text и manage.py render_posts).
+    text_html = models.TextField('текст в HTML', blank=True, editable=False)
+    excerpt = models.CharField(
+        'анонс', max_length=EXCERPT_LENGTH, blank=True, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+    def render_text(self):
+        self.text_html = linebreaks(self.text, autoescape=True)
+        self.excerpt = Truncator(self.text).chars(EXCERPT_LENGTH)
+
+    def read_image_meta(self):
+        """Размеры, формат и объём картинки; читается только заголовок."""
+        self.image_width = self.image_height = self.image_size = None
+        self.image_format = ''
+        if not self.image:
+            return
+        committed = self.image._committed
+        self.image.open()
+        try:
+            with Image.open(self.image) as picture:
+                self.image_width, self.image_height = picture.size
+                self.image_format = picture.format or ''
+        except OSError:
+            pass
+        finally:
+            if committed:
+                self.image.close()
+            else:
+                self.image.seek(0)
+        self.image_size = self.image.size
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        computed = set()
+        if update_fields is None or 'text' in update_fields:
+            self.render_text()
+            computed.update(('text_html', 'excerpt'))
+        if update_fields is None or 'image' in update_fields:
+            # Новая загрузка ещё не сохранена в хранилище и лежит в памяти
+            # или во временном файле.
+            if not self.image or not self.image._committed:
+                self.read_image_meta()
+            computed.update(IMAGE_META_FIELDS)
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, *computed}
+        super().save(*args, **kwargs)
+
+
+class Post(PostBase):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -28,18 +131,37 @@ class Post(models.Model):
                               null=True,
                               on_delete=models.SET_NULL,
                               related_name='posts')
-    image = models.ImageField(
-        'Картинка',
-        upload_to='posts/',
-        blank=True
-    )
 
     class Meta:
         default_related_name = 'posts'
         ordering = ['-pub_date']
+        # Сортировка лент и админки (-pub_date, -pk) и фильтр по дате.
+        indexes = [models.Index(fields=['pub_date', 'id'])]
 
-    def __str__(self) -> str:
-        return self.text[:15]
+
+class ArchivedPost(PostBase):
+    """Пост старше ARCHIVE_AFTER_DAYS (см. posts/archive.py).
+
+    id совпадает с id поста в Post, поэтому адреса постов не меняются.
+    Архив только читается: пост в нём не правят и не комментируют.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    # Дата переносится из Post как есть.
+    pub_date = models.DateTimeField()
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts')
+    group = models.ForeignKey('Group',
+                              blank=True,
+                              null=True,
+                              on_delete=models.SET_NULL,
+                              related_name='archived_posts')
+
+    class Meta:
+        ordering = ['-pub_date']
+        indexes = [models.Index(fields=['pub_date', 'id'])]
 
 
 class Comment(models.Model):
@@ -65,5 +187,77 @@ class Comment(models.Model):
         auto_now_add=True,
     )
 
+    class Meta:
+        indexes = [models.Index(fields=['post', '-created'])]
+
     def __str__(self):
         return self.text[:200]
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к посту из архива, id тот же, что был в Comment."""
+
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+    )
+    text = models.CharField('Текст комментария', max_length=200)
+    created = models.DateTimeField('дата публикации')
+
+    class Meta:
+        indexes = [models.Index(fields=['post', '-created'])]
+
+    def __str__(self):
+        return self.text[:200]
+
+
+class Purge(models.Model):
+    """Фоновая очистка удалённого пользователя или группы.
+
+    Пока она не завершена, объект скрыт от читателей (см. posts/purge.py),
+    а его посты и комментарии удаляются короткими пачками.
+    """
+
+    USER = 'user'
+    GROUP = 'group'
+    KIND_CHOICES = (
+        (USER, 'пользователь'),
+        (GROUP, 'группа'),
+    )
+
+    kind = models.CharField('что удаляется', max_length=10,
+                            choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('id объекта')
+    label = models.CharField('название', max_length=200)
+    posts_total = models.PositiveIntegerField(
+        'постов к очистке', null=True, blank=True
+    )
+    posts_done = models.PositiveIntegerField('постов обработано', default=0)
+    comments_done = models.PositiveIntegerField(
+        'комментариев удалено', default=0
+    )
+    created = models.DateTimeField('создана', auto_now_add=True)
+    finished = models.DateTimeField('завершена', null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = [models.Index(fields=['kind', 'object_id'])]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.label}'
+
+    def progress(self):
+        if self.finished:
+            return 'завершена'
+        if not self.posts_total:
+            return f'постов: {self.posts_done}'
+        percent = min(100, self.posts_done * 100 // self.posts_total)
+        return f'постов: {self.posts_done} из {self.posts_total} ({percent}%)'
+    progress.short_description = 'прогресс'
@@ -0,0 +1,226 @@
+import logging
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.pagecache import invalidate_pages
+from jobs.queue import enqueue
+
+from .comments import invalidate_comments
+from .images import release_image
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Post, Purge, User,
+)
+from .stats import invalidate_group_directory
+
+logger = logging.getLogger(__name__)
+
+HIDDEN_KEY = 'purge_hidden:{kind}'
+HIDDEN_TIMEOUT = 60 * 60
+# Тег страниц постов: на них могут быть комментарии удалённого автора.
+PURGED_USERS_TAG = 'purged_users'
+
+
+def hidden_ids(kind):
+    """id пользователей или групп (kind — Purge.USER или Purge.GROUP),
+    которые уже удалены, но ещё вычищаются в фоне.
+
+    Обычно список пуст, и ленты не добавляют к запросу условий.
+    """
+    key = HIDDEN_KEY.format(kind=kind)
+    ids = cache.get(key)
+    if ids is None:
+        ids = set(
+            Purge.objects.filter(kind=kind, finished__isnull=True)
+            .order_by().values_list('object_id', flat=True)
+        )
+        cache.set(key, ids, HIDDEN_TIMEOUT)
+    return ids
+
+
+def invalidate_hidden(kind):
+    cache.delete(HIDDEN_KEY.format(kind=kind))
+
+
+def visible_posts(queryset):
+    """Посты без удалённых авторов."""
+    authors = hidden_ids(Purge.USER)
+    if authors:
+        queryset = queryset.exclude(author_id__in=authors)
+    return queryset
+
+
+def schedule_deletion(obj):
+    """Удаляет пользователя или группу сразу для читателей и ставит
+    в очередь фоновую очистку их постов и комментариев.
+
+    Пользователь отключается (is_active) и пропадает вместе с постами
+    из лент, группа — из списков и форм. Повторный вызов возвращает
+    уже запланированную очистку.
+    """
+    kind = Purge.USER if isinstance(obj, User) else Purge.GROUP
+    with transaction.atomic():
+        purge, created = Purge.objects.get_or_create(
+            kind=kind, object_id=obj.pk, finished__isnull=True,
+            defaults={'label': str(obj)},
+        )
+        if not created:
+            return purge
+        if kind == Purge.USER:
+            obj.is_active = False
+            obj.save(update_fields=['is_active'])
+            transaction.on_commit(partial(forget_comments_by, obj.pk))
+        else:
+            transaction.on_commit(
+                partial(invalidate_pages, f'group:{obj.pk}')
+            )
+        enqueue(run_purge, purge.pk)
+    return purge
+
+
+def forget_comments_by(user_id):
+    """Сбрасывает окна комментариев и страницы постов, где комментировал
+    удалённый пользователь: в кэше он ещё числится активным."""
+    post_ids = set()
+    for model in (Comment, ArchivedComment):
+        post_ids.update(
+            model.objects.filter(author_id=user_id).order_by()
+            .values_list('post_id', flat=True).distinct()
+        )
+    if post_ids:
+        invalidate_comments(*post_ids)
+    invalidate_pages(PURGED_USERS_TAG)
+
+
+def take_batch(queryset, fields, batch_size):
+    return list(queryset.order_by().values_list(*fields)[:batch_size])
+
+
+def purge_comments(purge, batch_size, model=Comment):
+    """Удаляет пачку комментариев пользователя к чужим и своим постам."""
+    with transaction.atomic():
+        batch = take_batch(
+            model.objects.filter(author_id=purge.object_id),
+            ('pk', 'post_id'), batch_size,
+        )
+        if not batch:
+            return 0
+        model.objects.filter(
+            pk__in=[pk for pk, _ in batch]
+        )._raw_delete(model.objects.db)
+        Purge.objects.filter(pk=purge.pk).update(
+            comments_done=F('comments_done') + len(batch)
+        )
+    post_ids = {post_id for _, post_id in batch}
+    for post_id in post_ids:
+        invalidate_comments(post_id)
+    invalidate_pages(*(f'post:{post_id}' for post_id in post_ids))
+    return len(batch)
+
+
+def purge_posts(purge, batch_size, model=Post, comment_model=Comment):
+    """Удаляет пачку постов пользователя вместе с комментариями к ним.
+
+    Сигналы post_delete на каждый пост не нужны: кэши страниц
+    и картинки освобождаются разом для всей пачки.
+    """
+    with transaction.atomic():
+        batch = take_batch(
+            model.objects.filter(author_id=purge.object_id),
+            ('pk', 'image'), batch_size,
+        )
+        if not batch:
+            return 0
+        post_ids = [pk for pk, _ in batch]
+        comments = comment_model.objects.filter(
+            post_id__in=post_ids
+        )._raw_delete(comment_model.objects.db)
+        model.objects.filter(pk__in=post_ids)._raw_delete(model.objects.db)
+        Purge.objects.filter(pk=purge.pk).update(
+            posts_done=F('posts_done') + len(batch),
+            comments_done=F('comments_done') + comments,
+        )
+        for image in {image for _, image in batch if image}:
+            release_image(image)
+    invalidate_pages(*(f'post:{pk}' for pk in post_ids))
+    return len(batch)
+
+
+def ungroup_posts(purge, batch_size, model=Post):
+    """Убирает пачку постов из удаляемой группы, как SET_NULL."""
+    with transaction.atomic():
+        post_ids = [
+            pk for pk, in take_batch(
+                model.objects.filter(group_id=purge.object_id),
+                ('pk',), batch_size,
+            )
+        ]
+        if not post_ids:
+            return 0
+        model.objects.filter(pk__in=post_ids).update(group=None)
+        Purge.objects.filter(pk=purge.pk).update(
+            posts_done=F('posts_done') + len(post_ids)
+        )
+    invalidate_pages(*(f'post:{pk}' for pk in post_ids))
+    return len(post_ids)
+
+
+def finish(purge):
+    """Удаляет сам объект: связанных строк уже нет, и каскад Django
+    обходится несколькими пустыми выборками."""
+    model = User if purge.kind == Purge.USER else Group
+    with transaction.atomic():
+        model.objects.filter(pk=purge.object_id).delete()
+        purge.finished = timezone.now()
+        purge.save(update_fields=['finished'])
+    invalidate_group_directory()
+
+
+def run_purge(purge_id, batch_size=None, budget=None, pause=None):
+    """Фоновая задача: вычищает удалённого пользователя или группу.
+
+    Каждая пачка — отдельная короткая транзакция, прогресс пишется
+    в Purge после каждой. Когда время выходит за budget секунд, задача
+    ставит своё продолжение в очередь и завершается, не дожидаясь,
+    пока воркер сочтёт её брошенной.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    budget = settings.PURGE_TIME_BUDGET if budget is None else budget
+    pause = settings.PURGE_PAUSE if pause is None else pause
+    purge = Purge.objects.filter(pk=purge_id, finished__isnull=True).first()
+    if purge is None:
+        return
+    if purge.posts_total is None:
+        field = 'author_id' if purge.kind == Purge.USER else 'group_id'
+        purge.posts_total = sum(
+            model.objects.filter(**{field: purge.object_id}).count()
+            for model in (Post, ArchivedPost)
+        )
+        purge.save(update_fields=['posts_total'])
+    if purge.kind == Purge.USER:
+        steps = (
+            purge_comments,
+            partial(purge_comments, model=ArchivedComment),
+            purge_posts,
+            partial(purge_posts, model=ArchivedPost,
+                    comment_model=ArchivedComment),
+        )
+    else:
+        steps = (ungroup_posts, partial(ungroup_posts, model=ArchivedPost))
+    deadline = time.monotonic() + budget
+    for step in steps:
+        while step(purge, batch_size):
+            if time.monotonic() > deadline:
+                purge.refresh_from_db()
+                logger.info('Очистка %s: %s', purge, purge.progress())
+                enqueue(run_purge, purge_id)
+                return
+            if pause:
+                time.sleep(pause)
+    finish(purge)
+    logger.info('Очистка %s завершена', purge)
@@ -0,0 +1,113 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.pagecache import invalidate_pages
+
+from .comments import invalidate_comments
+from .groups import invalidate_group_choices
+from .images import release_image
+from .lookups import groups_by_slug, users_by_id, users_by_username
+from .models import ArchivedPost, Comment, Group, Post, Purge, User
+from .purge import invalidate_hidden
+from .stats import invalidate_group_directory
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Group)
+def reset_group_directory(sender, **kwargs):
+    """Сбрасывает кэш каталога групп при изменении постов и групп."""
+    invalidate_group_directory()
+
+
+@receiver([post_save, post_delete], sender=Group)
+def forget_group(sender, instance, **kwargs):
+    groups_by_slug.forget(instance)
+    invalidate_group_choices()
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_user(sender, instance, **kwargs):
+    users_by_username.forget(instance)
+    users_by_id.forget(instance)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_values(sender, instance, update_fields=None, **kwargs):
+    """Запоминает прежние картинку и группу поста одним запросом."""
+    instance._old_image = None
+    instance._old_group_id = None
+    if instance.pk is None:
+        return
+    fields = [
+        field for field, names in (
+            ('image', {'image'}), ('group_id', {'group', 'group_id'}),
+        )
+        if update_fields is None or names & set(update_fields)
+    ]
+    if not fields:
+        return
+    old = Post.objects.filter(pk=instance.pk).values(*fields).first() or {}
+    instance._old_image = old.get('image')
+    instance._old_group_id = old.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def release_replaced_image(sender, instance, **kwargs):
+    old_image = getattr(instance, '_old_image', None)
+    if old_image and old_image != instance.image.name:
+        release_image(old_image)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def release_deleted_image(sender, instance, **kwargs):
+    release_image(instance.image.name)
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    tags = [
+        f'post:{instance.pk}',
+        f'user:{instance.author_id}',
+        f'group:{instance.group_id}',
+    ]
+    # Пост перенесли в другую группу: из ленты старой он тоже пропал.
+    old_group_id = getattr(instance, '_old_group_id', None)
+    if old_group_id is not None and old_group_id != instance.group_id:
+        tags.append(f'group:{old_group_id}')
+    invalidate_pages(*tags)
+
+
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    # Комментарии меняют не только в add_comment, но и в админке.
+    invalidate_comments(instance.post_id)
+    invalidate_pages(f'post:{instance.post_id}')
+
+
+@receiver([post_save, post_delete], sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    invalidate_pages(f'group:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_pages(sender, instance, **kwargs):
+    invalidate_pages(f'user:{instance.pk}')
+
+
+@receiver([post_save, post_delete], sender=Purge)
+def reset_hidden(sender, instance, **kwargs):
+    """Удалённые группы и авторы пропадают из лент и форм сразу.
+
+    Кэш сбрасывается после коммита: до него параллельный запрос ещё
+    видит старый список и снова положил бы его в кэш на HIDDEN_TIMEOUT.
+    """
+    kind = instance.kind
+
+    def reset():
+        invalidate_hidden(kind)
+        if kind == Purge.GROUP:
+            invalidate_group_choices()
+
+    transaction.on_commit(reset)
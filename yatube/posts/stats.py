@@ -0,0 +1,74 @@
+from collections import Counter
+from itertools import chain
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from core.cache import get_or_compute
+
+from .archive import has_archive
+from .models import ArchivedPost, Group, Post
+
+GROUP_DIRECTORY_KEY = 'group_directory'
+GROUP_DIRECTORY_TIMEOUT = 60 * 60
+# Столько секунд после срока отдаётся прежняя статистика, пока её
+# пересчитывает один запрос.
+GROUP_DIRECTORY_STALE = 5 * 60
+TOP_AUTHORS = 3
+
+
+def build_group_directory():
+    """Собирает статистику по всем группам.
+
+    Число постов, дата последнего поста и самые активные авторы
+    считаются одним сгруппированным запросом по парам (группа, автор),
+    и ещё одним таким же по архиву, если он включён.
+    """
+    models = [Post]
+    if has_archive():
+        models.append(ArchivedPost)
+    stats = {}
+    for row in chain.from_iterable(
+        model.objects.filter(group__isnull=False)
+        .values('group_id', 'author__username')
+        .annotate(posts_count=Count('id'), latest=Max('pub_date'))
+        .order_by()
+        for model in models
+    ):
+        item = stats.setdefault(
+            row['group_id'],
+            {'posts_count': 0, 'latest': None, 'authors': Counter()},
+        )
+        item['posts_count'] += row['posts_count']
+        if item['latest'] is None or row['latest'] > item['latest']:
+            item['latest'] = row['latest']
+        item['authors'][row['author__username']] += row['posts_count']
+
+    directory = []
+    for group in Group.objects.order_by('title'):
+        item = stats.get(
+            group.pk, {'posts_count': 0, 'latest': None, 'authors': {}}
+        )
+        authors = sorted(
+            item['authors'].items(), key=lambda a: (-a[1], a[0])
+        )
+        directory.append({
+            'group': group,
+            'posts_count': item['posts_count'],
+            'latest': item['latest'],
+            'authors': authors[:TOP_AUTHORS],
+        })
+    directory.sort(key=lambda entry: -entry['posts_count'])
+    return directory
+
+
+def get_group_directory():
+    """Возвращает статистику по группам из кэша."""
+    return get_or_compute(
+        GROUP_DIRECTORY_KEY, build_group_directory, GROUP_DIRECTORY_TIMEOUT,
+        stale=GROUP_DIRECTORY_STALE,
+    )
+
+
+def invalidate_group_directory():
+    cache.delete(GROUP_DIRECTORY_KEY)
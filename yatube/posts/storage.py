@@ -0,0 +1,81 @@
+import hashlib
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+from core.cache import cache_lock
+
+HASH_CHUNK = 64 * 1024
+# Сколько секунд файл считается только что сохранённым: дольше любой
+# транзакции, в которой его сохраняют для поста.
+SAVED_TIMEOUT = 10 * 60
+
+
+def saved_key(name):
+    return f'image_saved:{name}'
+
+
+def image_lock(name):
+    """Замок на файл: сохранение и удаление одного имени не пересекаются."""
+    return cache_lock(f'image_lock:{name}')
+
+
+def file_digest(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранит файлы под именем, равным хешу их содержимого.
+
+    Одинаковые загрузки ложатся в один файл, поэтому и миниатюры sorl
+    у них общие. Имя вида posts/ab/ab12…ef.jpg не зависит от имени
+    загруженного файла и не переименовывается при совпадении.
+    """
+
+    def content_name(self, name, digest):
+        directory = os.path.dirname(name)
+        extension = os.path.splitext(name)[1].lower()
+        return os.path.join(directory, digest[:2], digest + extension)
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        name = self.content_name(name, file_digest(content.chunks()))
+        # Пост со ссылкой на файл появится только после коммита; пока
+        # метка жива, release_image файл не удалит (см. posts/images.py).
+        with image_lock(name) as locked:
+            cache.set(saved_key(name), True, SAVED_TIMEOUT)
+            if locked and self.exists(name):
+                return name
+            # Без замка файл может как раз удаляться: пишем его заново.
+            return self.write(name, content)
+
+    def write(self, name, content):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        # Пишем во временный файл и переименовываем: одновременная
+        # загрузка той же картинки просто перезапишет идентичный файл.
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            os.chmod(tmp_path, self.file_permissions_mode or 0o644)
+            os.replace(tmp_path, full_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return name
+
+
+content_storage = ContentAddressedStorage()
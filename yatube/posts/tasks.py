@@ -0,0 +1,10 @@
+from .models import ArchivedPost, Post
+from .thumbnails import post_thumbnail
+
+
+def make_thumbnail(post_id, archived=False):
+    """Фоновая задача: готовит миниатюру поста (archived — из архива)."""
+    model = ArchivedPost if archived else Post
+    post = model.objects.filter(pk=post_id).exclude(image='').first()
+    if post is not None:
+        post_thumbnail(post)
@@ -0,0 +1,38 @@
+from django import template
+from django.utils.html import format_html
+
+from posts.thumbnails import cached_thumbnail, thumbnail_size
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_image(post):
+    """<img> миниатюры поста с размерами из базы.
+
+    Файлы не открываются: размер считается по image_width/image_height,
+    адрес миниатюры берётся из хранилища ключей sorl (для лент — заранее,
+    см. resolve_thumbnails). Пока миниатюра не готова, показывается
+    исходная картинка со своими размерами.
+    """
+    if not post.image:
+        return ''
+    try:
+        thumbnail = post.thumbnail
+    except AttributeError:
+        thumbnail = cached_thumbnail(post)
+    src = thumbnail.url if thumbnail else post.image.url
+    if post.image_width and post.image_height:
+        width, height = post.image_width, post.image_height
+        if thumbnail:
+            width, height = thumbnail_size(width, height)
+        return format_html(
+            '<img class="card-img my-2" src="{}" width="{}" height="{}" '
+            'loading="lazy" decoding="async" alt="">',
+            src, width, height,
+        )
+    return format_html(
+        '<img class="card-img my-2" src="{}" loading="lazy" '
+        'decoding="async" alt="">',
+        src,
+    )
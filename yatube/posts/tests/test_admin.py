@@ -0,0 +1,94 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.admin import IndexedDatesQuerySet
+from posts.models import Group, Post
+
+User = get_user_model()
+
+
+class PostAdminTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.groups = Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'group-{number}',
+                  description='')
+            for number in range(30)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_posts(self, count):
+        Post.objects.bulk_create(
+            Post(author=self.admin, group=self.groups[number % 30],
+                 text=f'Пост {number}')
+            for number in range(count)
+        )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist')
+            )
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Строки списка не добавляют запросов: группы и авторы
+        приходят одним запросом, выбранная группа не перечитывается."""
+        self.create_posts(2)
+        # Первый запрос ещё читает сессию из базы.
+        self.changelist_queries()
+        _, few = self.changelist_queries()
+        self.create_posts(40)
+        response, many = self.changelist_queries()
+        self.assertEqual(few, many)
+        self.assertContains(response, 'admin-autocomplete')
+        # В каждом <select> только выбранная группа и пустой вариант.
+        self.assertContains(response, '<option value="">', count=42)
+
+    def test_date_hierarchy(self):
+        self.create_posts(3)
+        post = Post.objects.first()
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'),
+            {'pub_date__year': post.pub_date.year},
+        )
+        self.assertEqual(len(response.context['cl'].result_list), 3)
+
+    def test_indexed_dates(self):
+        """dates() скачками по индексу совпадает с обычным dates()."""
+        self.create_posts(6)
+        moments = [
+            (2021, 12, 31, 23), (2022, 1, 1, 0), (2022, 1, 1, 12),
+            (2022, 1, 15, 5), (2022, 3, 2, 8), (2024, 7, 9, 10),
+        ]
+        for post, moment in zip(Post.objects.order_by('pk'), moments):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.make_aware(datetime.datetime(*moment))
+            )
+        indexed = IndexedDatesQuerySet(Post)
+        plain = QuerySet(Post)
+        for kind in ('year', 'month', 'day'):
+            with self.subTest(kind=kind):
+                self.assertEqual(
+                    indexed.dates('pub_date', kind),
+                    list(plain.dates('pub_date', kind)),
+                )
+        january = {'pub_date__year': 2022, 'pub_date__month': 1}
+        with self.assertNumQueries(3):
+            days = indexed.filter(**january).dates('pub_date', 'day')
+        self.assertEqual(
+            days, [datetime.date(2022, 1, 1), datetime.date(2022, 1, 15)]
+        )
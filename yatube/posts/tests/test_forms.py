@@ -1,9 +1,15 @@
+from io import BytesIO
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
 from posts.forms import PostForm, CommentForm
 from posts.models import Post, Group, User, Comment
+from PIL import Image
 
 User = get_user_model()
 
@@ -150,3 +156,199 @@ class PostFormTests(TestCase):
             text='текст для проверки'
             ).exists(), f'тут ничего не должно было быть'
         )
+
+
+def make_image(size, image_format='JPEG', exif=None):
+    output = BytesIO()
+    options = {'exif': exif} if exif else {}
+    Image.new('RGB', size, 'red').save(output, image_format, **options)
+    return output.getvalue()
+
+
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='uploader')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, content, name='big.jpg'):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={
+                'text': 'image post',
+                'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+            },
+        )
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_image_downscaled_and_exif_stripped(self):
+        """Картинка уменьшается, EXIF не сохраняется."""
+        exif = Image.Exif()
+        exif[0x010F] = 'camera'
+        self.upload(make_image((400, 200), exif=exif.tobytes()))
+        post = Post.objects.get(text='image post')
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (100, 50))
+            self.assertNotIn(0x010F, stored.getexif())
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_broken_image_is_form_error(self):
+        """Обрезанный файл — ошибка формы, а не 500."""
+        content = make_image((400, 200))
+        response = self.upload(content[:len(content) // 2])
+        self.assertFalse(Post.objects.filter(text='image post').exists())
+        self.assertFormError(
+            response, 'form', 'image',
+            'Не удалось обработать картинку: файл повреждён',
+        )
+
+    def test_jpeg_fill_bytes(self):
+        """Байт-заполнитель 0xFF перед маркером не ломает очистку."""
+        content = make_image((40, 20))
+        self.upload(b'\xff\xd8\xff' + content[2:])
+        post = Post.objects.get(text='image post')
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.size, (40, 20))
+
+    @override_settings(IMAGE_MAX_DIMENSION=100)
+    def test_reencoded_gif_renamed(self):
+        """GIF, пересохранённый в PNG, получает расширение .png."""
+        self.upload(make_image((400, 200), 'GIF'), name='big.gif')
+        post = Post.objects.get(text='image post')
+        self.assertTrue(post.image.name.endswith('.png'))
+        with Image.open(post.image.path) as stored:
+            self.assertEqual(stored.format, 'PNG')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_huge_resolution_rejected_from_header(self):
+        """Слишком большое разрешение отклоняется по заголовку."""
+        response = self.upload(make_image((20, 20)))
+        self.assertFalse(Post.objects.filter(text='image post').exists())
+        self.assertFormError(
+            response, 'form', 'image', 'Слишком большое разрешение картинки'
+        )
+
+    def test_header_pushed_past_limit_rejected(self):
+        """SOF с огромным разрешением за 325 КБ сегментов APP2 не
+        пропускается без проверки."""
+        content = make_image((20, 20))
+        sof = content.index(b'\xff\xc0')
+        content = (
+            content[:sof + 5] + (20000).to_bytes(2, 'big') * 2
+            + content[sof + 9:]
+        )
+        padding = b'\xff\xe2' + (65535).to_bytes(2, 'big') + bytes(65533)
+        response = self.upload(content[:2] + padding * 5 + content[2:])
+        self.assertFalse(Post.objects.filter(text='image post').exists())
+        self.assertFormError(
+            response, 'form', 'image', 'Не удалось прочитать размеры картинки'
+        )
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_huge_resolution_rejected_before_decoding(self):
+        """Разрешение проверяется и в форме, если файл не прошёл через
+        ImageUploadHandler."""
+        form = PostForm(
+            data={'text': 'image post'},
+            files={'image': SimpleUploadedFile(
+                'big.jpg', make_image((20, 20)), 'image/jpeg'
+            )},
+        )
+        self.assertFalse(form.is_valid())
+        self.assertEqual(
+            form.errors['image'], ['Слишком большое разрешение картинки']
+        )
+
+    @override_settings(IMAGE_UPLOAD_MAX_SIZE=100)
+    def test_large_file_rejected(self):
+        response = self.upload(make_image((200, 200)))
+        self.assertFalse(Post.objects.filter(text='image post').exists())
+        self.assertEqual(
+            list(response.context['form'].errors), ['image']
+        )
+
+
+class GroupFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='author')
+        Group.objects.bulk_create(
+            Group(title=title, slug=slug, description='')
+            for title, slug in (
+                ('Котики', 'cats'), ('Кофе', 'coffee'), ('Собаки', 'dogs'),
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def group_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [
+            query for query in queries.captured_queries
+            if 'posts_group' in query['sql']
+        ]
+
+    def test_choices_cached(self):
+        """Пока групп немного — <select> из кэша, без запросов."""
+        url = reverse('posts:post_create')
+        self.group_queries(url)
+        response, queries = self.group_queries(url)
+        self.assertEqual(queries, [])
+        self.assertContains(response, '<option value="', count=4)
+        Group.objects.create(title='Птицы', slug='birds', description='')
+        response, _ = self.group_queries(url)
+        self.assertContains(response, 'Птицы')
+
+    @override_settings(GROUP_SELECT_LIMIT=2)
+    def test_many_groups_use_autocomplete(self):
+        """Много групп — поле поиска и один запрос при сохранении."""
+        response, _ = self.group_queries(reverse('posts:post_create'))
+        self.assertNotContains(response, '<option')
+        self.assertContains(response, 'data-autocomplete-url=')
+        self.assertContains(response, 'js/group_autocomplete.js')
+        form = PostForm(data={'text': 'Пост', 'group': 'dogs'})
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(form.cleaned_data['group'].slug, 'dogs')
+        form = PostForm(data={'text': 'Пост', 'group': 'unknown'})
+        self.assertFalse(form.is_valid())
+        post = Post.objects.create(
+            author=self.user, text='Пост',
+            group=Group.objects.get(slug='cats'),
+        )
+        form = PostForm(instance=post)
+        self.assertIn('value="cats"', str(form['group']))
+
+    @override_settings(GROUP_SELECT_LIMIT=2)
+    def test_autocomplete_numeric_slug(self):
+        """Slug из цифр в поле поиска — это slug, а не pk."""
+        cats = Group.objects.get(slug='cats')
+        group = Group.objects.create(
+            title='Первая', slug=str(cats.pk), description=''
+        )
+        form = PostForm(data={'text': 'Пост', 'group': str(cats.pk)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], group)
+
+    def test_group_autocomplete(self):
+        url = reverse('posts:group_autocomplete')
+        for term, slugs in (
+            ('ко', ['cats', 'coffee']),
+            ('Соб', ['dogs']),
+            ('cof', ['coffee']),
+            ('', []),
+        ):
+            with self.subTest(term=term):
+                response = self.client.get(url, {'q': term})
+                self.assertEqual(
+                    [group['slug'] for group in response.json()['results']],
+                    slugs,
+                )
@@ -1,7 +1,10 @@
+from io import StringIO
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import EXCERPT_LENGTH, Group, Post
 
 User = get_user_model()
 
@@ -32,3 +35,32 @@ class PostModelTest(TestCase):
         post = self.post  # Обратите внимание на синтаксис
         expected_object_name1 = post.text[:15]
         self.assertEqual(expected_object_name1, str(post))
+
+
+class PostRenderedTextTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def test_rendered_on_save(self):
+        post = Post.objects.create(author=self.user, text='<b>раз</b>\nдва')
+        self.assertEqual(
+            post.text_html, '<p>&lt;b&gt;раз&lt;/b&gt;<br>два</p>'
+        )
+        self.assertEqual(post.excerpt, post.text)
+        post.text = 'х' * (EXCERPT_LENGTH + 10)
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(len(post.excerpt), EXCERPT_LENGTH)
+        self.assertTrue(post.excerpt.endswith('…'))
+
+    def test_render_posts_backfills(self):
+        Post.objects.bulk_create(
+            Post(author=self.user, text=f'Пост {number}')
+            for number in range(5)
+        )
+        call_command('render_posts', batch_size=2, stdout=StringIO())
+        for post in Post.objects.all():
+            with self.subTest(text=post.text):
+                self.assertEqual(post.text_html, f'<p>{post.text}</p>')
+                self.assertEqual(post.excerpt, post.text)
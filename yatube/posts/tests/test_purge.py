@@ -0,0 +1,174 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.forms import PostForm
+from posts.groups import get_group_choices
+from posts.models import Comment, Group, Post, Purge
+from posts.purge import HIDDEN_KEY, hidden_ids, schedule_deletion
+
+User = get_user_model()
+
+
+@override_settings(PURGE_BATCH_SIZE=2, PURGE_PAUSE=0)
+class PurgeTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description=''
+        )
+        for number in range(5):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Пост {number}'
+            )
+            Comment.objects.create(post=post, author=cls.reader, text='!')
+        cls.other_post = Post.objects.create(
+            author=cls.reader, group=cls.group, text='Чужой пост'
+        )
+        Comment.objects.create(
+            post=cls.other_post, author=cls.author, text='Ответ'
+        )
+
+    def setUp(self):
+        cache.clear()
+        # TestCase не коммитит транзакцию: выполняем on_commit сразу.
+        patcher = mock.patch(
+            'django.db.transaction.on_commit', side_effect=lambda func: func()
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_user_hidden_at_once(self):
+        """Удалённый автор сразу отключён и пропадает из лент,
+        а посты остаются до фоновой очистки."""
+        purge = schedule_deletion(self.author)
+        self.author.refresh_from_db()
+        self.assertFalse(self.author.is_active)
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+        self.assertEqual(
+            Job.objects.filter(status=Job.QUEUED).count(), 1
+        )
+        self.assertEqual(schedule_deletion(self.author), purge)
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(
+            [post.author for post in response.context['page_obj']],
+            [self.reader],
+        )
+        for url in (
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail',
+                    args=[Post.objects.filter(author=self.author)[0].pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_comments_of_deleted_user_hidden(self):
+        """Комментарии удалённого автора пропадают со страниц постов
+        сразу, хотя окно комментариев и страница уже в кэше."""
+        url = reverse('posts:post_detail', args=[self.other_post.pk])
+        self.assertContains(self.client.get(url), 'Ответ')
+        schedule_deletion(self.author)
+        self.assertNotContains(self.client.get(url), 'Ответ')
+
+    def test_user_purged_in_batches(self):
+        purge = schedule_deletion(self.author)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(run_pending(), 1)
+        deletes = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('DELETE FROM "posts_post"')
+        ]
+        # Пять постов пачками по два.
+        self.assertEqual(len(deletes), 3)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(
+            list(Post.objects.all()), [self.other_post]
+        )
+        self.assertEqual(Comment.objects.count(), 0)
+        purge.refresh_from_db()
+        self.assertIsNotNone(purge.finished)
+        self.assertEqual(
+            (purge.posts_total, purge.posts_done, purge.comments_done),
+            (5, 5, 6),
+        )
+        self.assertEqual(purge.progress(), 'завершена')
+
+    @override_settings(PURGE_TIME_BUDGET=0)
+    def test_long_purge_continues_in_new_job(self):
+        """Выйдя за бюджет времени, задача передаёт остаток новой."""
+        purge = schedule_deletion(self.author)
+        run_pending(limit=1)
+        purge.refresh_from_db()
+        self.assertIsNone(purge.finished)
+        self.assertEqual(purge.comments_done, 1)
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED).count(), 1)
+        run_pending()
+        purge.refresh_from_db()
+        self.assertIsNotNone(purge.finished)
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 5)
+
+    def test_group_purge(self):
+        """Посты удалённой группы остаются без группы, пачками."""
+        self.assertEqual(len(get_group_choices()), 1)
+        schedule_deletion(self.group)
+        self.assertEqual(get_group_choices(), [])
+        response = self.client.get(
+            reverse('posts:group_list', args=['group'])
+        )
+        self.assertEqual(response.status_code, 404)
+        form = PostForm(data={'text': 'Пост', 'group': self.group.pk})
+        self.assertFalse(form.is_valid())
+        run_pending()
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 6)
+        purge = Purge.objects.get()
+        self.assertEqual(purge.posts_done, 6)
+
+    def test_admin_delete_schedules_purge(self):
+        admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'admin'
+        )
+        self.client.force_login(admin)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertContains(response, 'author')
+        self.assertFalse(any(
+            '"posts_post"' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.client.post(url, {'post': 'yes'})
+        self.assertTrue(User.objects.filter(username='author').exists())
+        self.assertTrue(
+            Purge.objects.filter(kind=Purge.USER, object_id=self.author.pk)
+            .exists()
+        )
+
+
+class HiddenAfterCommitTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_hidden_reset_after_commit(self):
+        """Старый список, закэшированный параллельным запросом до коммита,
+        не переживает коммит удаления."""
+        author = User.objects.create_user(username='author')
+        group = Group.objects.create(title='Группа', slug='group')
+        with transaction.atomic():
+            schedule_deletion(author)
+            schedule_deletion(group)
+            # Параллельный запрос ещё не видит Purge и кэширует пустые
+            # списки.
+            for kind in (Purge.USER, Purge.GROUP):
+                cache.set(HIDDEN_KEY.format(kind=kind), set())
+        self.assertIn(author.pk, hidden_ids(Purge.USER))
+        self.assertIn(group.pk, hidden_ids(Purge.GROUP))
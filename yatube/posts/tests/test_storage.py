@@ -0,0 +1,201 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.models import Post
+from posts.storage import content_storage
+from posts.thumbnails import post_thumbnail
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+class ContentAddressedStorageTest(TransactionTestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='Noname')
+
+    def create_post(self, filename):
+        return Post.objects.create(
+            author=self.user,
+            text='test text',
+            image=SimpleUploadedFile(filename, SMALL_GIF, 'image/gif'),
+        )
+
+    def test_identical_uploads_share_file(self):
+        """Одинаковые картинки хранятся одним файлом."""
+        first = self.create_post('small.gif')
+        second = self.create_post('other.gif')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(first.image.name.startswith('posts/'))
+        self.assertEqual(
+            len(os.listdir(os.path.dirname(first.image.path))), 1
+        )
+
+    def test_file_removed_with_last_reference(self):
+        """Файл удаляется только вместе с последним постом."""
+        first = self.create_post('small.gif')
+        second = self.create_post('other.gif')
+        path = first.image.path
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        # Метка «только что сохранён» истекла.
+        cache.clear()
+        second.image = None
+        second.save()
+        self.assertFalse(os.path.exists(path))
+
+    def test_just_saved_file_kept(self):
+        """Файл, который только что сохранили для ещё не закоммиченного
+        поста, не удаляется вместе с последней старой ссылкой."""
+        first = self.create_post('small.gif')
+        path = first.image.path
+        cache.clear()
+        name = content_storage.save(
+            'posts/other.gif', SimpleUploadedFile('other.gif', SMALL_GIF)
+        )
+        self.assertEqual(name, first.image.name)
+        first.delete()
+        self.assertTrue(os.path.exists(path))
+        # Новый пост закоммичен позже; отложенная проверка файл оставит.
+        second = Post.objects.create(author=self.user, text='new', image=name)
+        cache.clear()
+        Job.objects.update(run_at=timezone.now())
+        run_pending()
+        self.assertTrue(os.path.exists(path))
+        second.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_file_rewritten_without_lock(self):
+        """Не дождавшись замка, хранилище перезаписывает файл, а не
+        полагается на существующий: его может удалять другой процесс."""
+        post = self.create_post('small.gif')
+        with open(post.image.path, 'wb'):
+            pass
+        with mock.patch('posts.storage.image_lock') as image_lock:
+            image_lock.return_value.__enter__.return_value = False
+            content_storage.save(
+                'posts/other.gif', SimpleUploadedFile('other.gif', SMALL_GIF)
+            )
+        with open(post.image.path, 'rb') as stored:
+            self.assertEqual(stored.read(), SMALL_GIF)
+
+    def test_dedupe_media_command(self):
+        """Команда переносит старые файлы и убирает дубликаты."""
+        os.makedirs(os.path.join(self.media_root, 'posts'))
+        for name in ('a.gif', 'b.gif'):
+            with open(os.path.join(self.media_root, 'posts', name),
+                      'wb') as file:
+                file.write(SMALL_GIF)
+            Post.objects.create(
+                author=self.user, text=name, image=f'posts/{name}'
+            )
+        out = StringIO()
+        call_command('dedupe_media', stdout=out)
+        names = set(Post.objects.values_list('image', flat=True))
+        self.assertEqual(len(names), 1)
+        name = names.pop()
+        self.assertTrue(
+            os.path.exists(os.path.join(self.media_root, name))
+        )
+        self.assertFalse(
+            os.path.exists(os.path.join(self.media_root, 'posts', 'a.gif'))
+        )
+        self.assertIn(f'{len(SMALL_GIF)} байт', out.getvalue())
+
+
+class ImageMetaTest(TransactionTestCase):
+    def setUp(self):
+        caches['thumbnails'].clear()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(username='Noname')
+        self.post = Post.objects.create(
+            author=self.user,
+            text='test text',
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def render(self, post):
+        """Рендер тега, при котором любое обращение к файлам — ошибка."""
+        template = Template('{% load post_images %}{% post_image post %}')
+        with mock.patch.object(FileSystemStorage, 'open') as opened, \
+                mock.patch.object(FileSystemStorage, 'exists') as exists, \
+                mock.patch.object(FileSystemStorage, 'size') as size:
+            html = template.render(Context({'post': post}))
+        for method in (opened, exists, size):
+            method.assert_not_called()
+        return html
+
+    def test_meta_recorded_on_upload(self):
+        """Размеры, формат и объём пишутся при загрузке."""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_format, 'GIF')
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+        post.image = None
+        post.save(update_fields=['image'])
+        post.refresh_from_db()
+        self.assertIsNone(post.image_width)
+        self.assertEqual(post.image_format, '')
+
+    def test_backfill_images_command(self):
+        """Команда заполняет поля старых постов и пропускает пропавшие
+        файлы."""
+        Post.objects.update(
+            image_width=None, image_height=None, image_format='',
+            image_size=None,
+        )
+        Post.objects.create(
+            author=self.user, text='lost', image='posts/lost.gif'
+        )
+        out = StringIO()
+        call_command('backfill_images', stdout=out, stderr=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual((post.image_width, post.image_height), (2, 1))
+        self.assertEqual(post.image_format, 'GIF')
+        self.assertEqual(post.image_size, len(SMALL_GIF))
+        self.assertIn(
+            'Обновлено постов: 1, файлов не найдено: 1', out.getvalue()
+        )
+
+    def test_post_image_without_file_access(self):
+        """Тег берёт размеры из базы, а адрес миниатюры — из sorl."""
+        post = Post.objects.get(pk=self.post.pk)
+        html = self.render(post)
+        # Миниатюры ещё нет: исходная картинка со своими размерами.
+        self.assertIn(f'src="{post.image.url}" width="2" height="1"', html)
+        self.assertIn('loading="lazy" decoding="async"', html)
+        thumbnail = post_thumbnail(post)
+        self.assertEqual((thumbnail.width, thumbnail.height), (960, 339))
+        html = self.render(post)
+        self.assertIn(f'src="{thumbnail.url}"', html)
+        self.assertIn('width="960" height="339"', html)
@@ -1,10 +1,25 @@
+import threading
+from io import BytesIO
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django import forms
-from django.core.cache import cache
+from django.core.cache import cache, caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
 
-from posts.models import Group, Post
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.lookups import (
+    IdentityMap, groups_by_slug, users_by_id, users_by_username,
+)
+from posts.comments import COMMENTS_WINDOW
+from posts.models import Comment, Group, Post
+from posts.thumbnails import cached_thumbnail, post_thumbnail
+from posts.views import POST_FILTER
 
 User = get_user_model()
 
@@ -104,6 +119,22 @@ class PostViewTest(TestCase):
         self.assertEqual(post_new.author, self.post.author)
         self.assertEqual(post_new.group, self.post.group)
 
+    def test_post_detail_renders_text_html(self):
+        """Готовый HTML текста выводится разметкой, а не экранируется
+        повторно; HTML из самого текста остаётся экранированным."""
+        post = Post.objects.create(
+            author=self.user, text='Первая строка\nвторая <b>строка</b>'
+        )
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.id})
+        )
+        self.assertContains(
+            response,
+            '<p>Первая строка<br>вторая &lt;b&gt;строка&lt;/b&gt;</p>',
+            html=False,
+        )
+        self.assertNotContains(response, '&lt;p&gt;')
+
     def test_context_group_list(self):
         response = self.authorized_client.get(
             reverse('posts:group_list', kwargs={'slug': self.group.slug})
@@ -146,6 +177,22 @@ class PostViewTest(TestCase):
         response_post_group2 = response_group2.context['page_obj']
         self.assertEqual(len(response_post_group2), 0)
 
+    def test_feeds_defer_text(self):
+        reverses = [reverse('posts:index'),
+                    reverse('posts:group_list',
+                            kwargs={'slug': self.group.slug}),
+                    reverse('posts:profile',
+                            kwargs={'username': self.user.username})
+                    ]
+        for reverse_name in reverses:
+            with self.subTest(reverse_name=reverse_name):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.guest_client.get(reverse_name)
+                self.assertContains(response, self.post.excerpt)
+                for query in queries.captured_queries:
+                    self.assertNotIn('"posts_post"."text"', query['sql'])
+
     def test_index_cache(self):
         response = self.authorized_client.get(
             reverse('posts:index')
@@ -207,3 +254,351 @@ class PaginatorViewsTest(TestCase):
                 self.assertEqual(len(response.context['page_obj']), 10)
                 response = self.client.get(reverse_name + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class GroupIndexViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_disc',
+        )
+        cls.empty_group = Group.objects.create(
+            title='empty_title',
+            slug='empty_slug',
+            description='empty_disc',
+        )
+        Post.objects.bulk_create([
+            Post(author=cls.user, group=cls.group, text='post 1'),
+            Post(author=cls.user, group=cls.group, text='post 2'),
+            Post(author=cls.other, group=cls.group, text='post 3'),
+        ])
+
+    def setUp(self):
+        cache.clear()
+
+    def test_group_index_stats(self):
+        """Каталог групп показывает число постов и активных авторов."""
+        response = self.client.get(reverse('posts:groups'))
+        self.assertTemplateUsed(response, 'posts/groups.html')
+        first, second = response.context['page_obj']
+        self.assertEqual(first['group'], self.group)
+        self.assertEqual(first['posts_count'], 3)
+        self.assertIsNotNone(first['latest'])
+        self.assertEqual(first['authors'], [('Noname', 2), ('Other', 1)])
+        self.assertEqual(second['group'], self.empty_group)
+        self.assertEqual(second['posts_count'], 0)
+
+    def test_group_index_cached(self):
+        """Статистика кэшируется и сбрасывается при новом посте."""
+        self.client.get(reverse('posts:groups'))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:groups'))
+        Post.objects.create(
+            author=self.other, group=self.empty_group, text='post 4'
+        )
+        response = self.client.get(reverse('posts:groups'))
+        counts = {
+            item['group'].slug: item['posts_count']
+            for item in response.context['page_obj']
+        }
+        self.assertEqual(counts['empty_slug'], 1)
+
+
+class IdentityMapTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_disc',
+        )
+
+    def setUp(self):
+        cache.clear()
+        groups_by_slug.clear()
+        users_by_username.clear()
+
+    def test_lookup_is_cached(self):
+        """Повторный поиск группы и автора не обращается к базе."""
+        self.assertEqual(groups_by_slug.get('test_slug'), self.group)
+        self.assertEqual(users_by_username.get('Noname'), self.user)
+        groups_by_slug.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(groups_by_slug.get('test_slug'), self.group)
+            self.assertEqual(users_by_username.get('Noname'), self.user)
+
+    def test_unknown_slug_is_cached(self):
+        """Неизвестный slug кэшируется и сбрасывается при создании."""
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': 'unknown'})
+        )
+        self.assertEqual(response.status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertIsNone(groups_by_slug.get('unknown'))
+        group = Group.objects.create(
+            title='unknown', slug='unknown', description='unknown'
+        )
+        self.assertEqual(groups_by_slug.get('unknown'), group)
+
+    def test_rename_invalidates(self):
+        """После смены slug старое значение больше не находится."""
+        group = Group.objects.create(
+            title='old', slug='old_slug', description='old'
+        )
+        groups_by_slug.get('old_slug')
+        group.slug = 'new_slug'
+        group.save()
+        self.assertIsNone(groups_by_slug.get('old_slug'))
+        self.assertEqual(groups_by_slug.get('new_slug'), group)
+
+    def test_stats(self):
+        users_by_username.get('Noname')
+        users_by_username.get('Noname')
+        stats = users_by_username.stats()
+        self.assertGreaterEqual(stats['local'], 1)
+        self.assertGreater(stats['hit_rate'], 0)
+
+    def test_stats_counted_across_threads(self):
+        """Счётчики не теряют обращений из параллельных потоков."""
+        lookup = IdentityMap(Group, 'slug')
+        lookup.get('test_slug')
+
+        def worker():
+            for _ in range(500):
+                lookup.get('test_slug')
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        stats = lookup.stats()
+        self.assertEqual(stats['total'], 8 * 500 + 1)
+        self.assertEqual(stats['db'], 1)
+
+
+class SessionQueriesTest(TestCase):
+    """Страницы ленты для авторизованного пользователя не читают
+    сессию и пользователя из базы."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+        cls.group = Group.objects.create(
+            title='test_title',
+            slug='test_slug',
+            description='test_disc',
+        )
+        for number in range(3):
+            Post.objects.create(
+                author=User.objects.create_user(username=f'author{number}'),
+                group=cls.group,
+                text=f'text {number}',
+            )
+
+    def setUp(self):
+        cache.clear()
+        users_by_id.clear()
+        self.client.force_login(self.user)
+
+    def test_feed_queries(self):
+        """Только запросы самой страницы: посты с авторами, без COUNT
+        для пагинатора; профиль считает посты автора для шапки."""
+        group_url = reverse('posts:group_list', args=['test_slug'])
+        profile_url = reverse('posts:profile', args=['author0'])
+        self.client.get(group_url)
+        self.client.get(profile_url)
+        pages = (
+            (reverse('posts:index'), 1),
+            (group_url, 1),
+            (profile_url, 2),
+        )
+        for url, queries in pages:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertTrue(response.context['user'].is_authenticated)
+
+    def test_password_change_ends_session(self):
+        """Смена пароля сбрасывает кэш пользователя и старые сессии."""
+        self.client.get(reverse('posts:index'))
+        self.user.set_password('new-password')
+        self.user.save()
+        response = self.client.get(reverse('posts:post_create'))
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+)
+class SignedCookieSessionQueriesTest(SessionQueriesTest):
+    pass
+
+
+class CommentsViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Noname')
+        cls.post = Post.objects.create(author=cls.user, text='test text')
+        Comment.objects.bulk_create(
+            Comment(
+                post=cls.post,
+                author=User.objects.create_user(username=f'reader{number}'),
+                text=f'comment {number}',
+            )
+            for number in range(COMMENTS_WINDOW + 5)
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('posts:post_detail', args=[self.post.pk])
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_comments_rendered_in_one_query(self):
+        """Пост, счётчик постов автора и комментарии с авторами."""
+        with self.assertNumQueries(3):
+            response = self.client.get(self.url)
+        comments = response.context['comments']
+        self.assertEqual(len(comments), COMMENTS_WINDOW)
+        self.assertTrue(response.context['has_more_comments'])
+        self.assertEqual(comments[0].text, f'comment {COMMENTS_WINDOW + 4}')
+        self.assertContains(response, 'comment 24\n')
+        self.assertNotContains(response, 'comment 4\n')
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+    def test_add_comment_resets_cache(self):
+        self.client.get(self.url)
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'fresh comment'},
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['comments'][0].text, 'fresh comment')
+
+    def test_comment_saved_elsewhere_resets_cache(self):
+        """Комментарий, добавленный не через add_comment (например,
+        в админке), сразу виден на странице поста."""
+        self.client.get(self.url)
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, text='from admin'
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['comments'][0].text, 'from admin')
+        comment.text = 'edited in admin'
+        comment.save()
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response.context['comments'][0].text, 'edited in admin'
+        )
+
+
+def make_png(color):
+    output = BytesIO()
+    Image.new('RGB', (4, 3), color).save(output, 'PNG')
+    return SimpleUploadedFile(f'{color}.png', output.getvalue(), 'image/png')
+
+
+class ThumbnailQueriesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Noname')
+        cls.group = Group.objects.create(
+            title='test_title', slug='test_slug', description='test_disc'
+        )
+        for color in range(POST_FILTER):
+            post = Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Пост {color}',
+                image=make_png((color, 0, 0)),
+            )
+            post_thumbnail(post)
+
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+
+    def kvstore_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.content.count(b'width="960"'), POST_FILTER)
+        return [
+            query for query in queries.captured_queries
+            if 'thumbnail_kvstore' in query['sql']
+        ]
+
+    def test_feeds_resolve_thumbnails_in_one_query(self):
+        """Миниатюры страницы читаются одним запросом, затем из кэша."""
+        urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': 'Noname'}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                caches['thumbnails'].clear()
+                self.assertEqual(len(self.kvstore_queries(url)), 1)
+                cache.clear()
+                self.assertEqual(len(self.kvstore_queries(url)), 0)
+
+    def test_thumbnails_in_page(self):
+        response = self.client.get(reverse('posts:index'))
+        for post in response.context['page_obj']:
+            with self.subTest(post=post.pk):
+                self.assertIsNotNone(post.thumbnail)
+                self.assertContains(response, post.thumbnail.url)
+
+
+class ThumbnailQueueTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='Noname')
+        # Пост с картинкой, но без миниатюры: например, загружен
+        # до фоновых миниатюр.
+        cls.post = Post.objects.create(
+            author=cls.user, text='Пост', image=make_png((0, 0, 255)),
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+
+    def test_missing_thumbnail_queued_once(self):
+        """Промах ставит миниатюру в очередь один раз, воркер её готовит."""
+        self.assertIsNone(cached_thumbnail(self.post))
+        Job.objects.all().delete()
+        cache.clear()
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:profile', args=['Noname']),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        ):
+            response = self.client.get(url)
+            self.assertContains(response, self.post.image.url)
+        self.assertEqual(
+            Job.objects.filter(name='posts.tasks.make_thumbnail').count(), 1
+        )
+        run_pending()
+        thumbnail = cached_thumbnail(self.post)
+        self.assertIsNotNone(thumbnail)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, thumbnail.url)
+
+    def test_original_keeps_own_size(self):
+        """Пока миниатюры нет, у исходной картинки её собственные
+        размеры, а не размеры миниатюры."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(
+            response,
+            f'src="{self.post.image.url}" width="4" height="3"',
+        )
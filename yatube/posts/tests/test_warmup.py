@@ -0,0 +1,126 @@
+import threading
+import time
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from core.warmup import run_concurrently
+from jobs.models import Job
+from posts.models import Group, Post
+from posts.thumbnails import cached_thumbnail
+from posts.views import POST_FILTER
+from posts.warmup import warm_caches, warm_targets
+
+from .test_views import make_png
+
+User = get_user_model()
+
+
+class RunConcurrentlyTest(SimpleTestCase):
+    def test_pool_is_bounded(self):
+        """Одновременно работают не больше workers вызовов, порядок
+        результатов — как у items, исключения возвращаются."""
+        running = []
+        peak = []
+        lock = threading.Lock()
+
+        def func(item):
+            with lock:
+                running.append(item)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.remove(item)
+            if item == 3:
+                raise ValueError(item)
+            return item * 2
+
+        results = run_concurrently(func, range(10), 3)
+        self.assertLessEqual(max(peak), 3)
+        self.assertEqual([item for item, _, _ in results], list(range(10)))
+        self.assertEqual(results[1][1], 2)
+        self.assertIsInstance(results[3][1], ValueError)
+
+
+@override_settings(PAGE_CACHE_TIMEOUTS={
+    'posts:index': 60,
+    'posts:group_list': 60,
+    'posts:profile': 60,
+    'posts:post_detail': 60,
+})
+class WarmCachesTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+        cls.big = Group.objects.create(title='Большая', slug='big')
+        cls.small = Group.objects.create(title='Маленькая', slug='small')
+        Post.objects.create(author=cls.other, group=cls.small, text='Старый')
+        for number in range(POST_FILTER + 1):
+            Post.objects.create(
+                author=cls.author, group=cls.big, text=f'Пост {number}'
+            )
+        cls.image_post = Post.objects.create(
+            author=cls.author, group=cls.big, text='С картинкой',
+            image=make_png((1, 2, 3)),
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['thumbnails'].clear()
+
+    def test_targets(self):
+        targets, shown = warm_targets(pages=1, groups=1, profiles=5, posts=2)
+        self.assertEqual(targets, [
+            ('posts:index', reverse('posts:index')),
+            ('posts:group_list', reverse('posts:group_list', args=['big'])),
+            ('posts:profile', reverse('posts:profile', args=['author'])),
+            ('posts:post_detail',
+             reverse('posts:post_detail', args=[self.image_post.pk])),
+            ('posts:post_detail',
+             reverse('posts:post_detail', args=[self.image_post.pk - 1])),
+        ])
+        self.assertEqual([post.pk for post in shown], [self.image_post.pk])
+
+    def test_command_warms_pages_and_thumbnails(self):
+        self.assertIsNone(cached_thumbnail(self.image_post))
+        stdout = StringIO()
+        call_command(
+            'warm_caches', workers=1, stdout=stdout, stderr=StringIO()
+        )
+        self.assertIn('создано 1', stdout.getvalue())
+        self.assertIsNotNone(cached_thumbnail(self.image_post))
+        urls = (
+            reverse('posts:index'),
+            f'{reverse("posts:index")}?page=2',
+            reverse('posts:group_list', args=['big']),
+            reverse('posts:profile', args=['author']),
+            reverse('posts:post_detail', args=[self.image_post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(0):
+                    self.client.get(url)
+        self.assertContains(
+            self.client.get(reverse('posts:index')),
+            cached_thumbnail(self.image_post).url,
+        )
+
+    def test_startup_skips_thumbnails(self):
+        """При запуске воркера страницы прогреваются, а миниатюры только
+        ставятся в очередь."""
+        report = warm_caches(workers=1, thumbnails=False)
+        self.assertEqual(report['thumbnails'], [])
+        self.assertIsNone(cached_thumbnail(self.image_post))
+        self.assertTrue(Job.objects.filter(
+            name='posts.tasks.make_thumbnail'
+        ).exists())
+        self.assertTrue(all(
+            result == 200 for _, _, result, _ in report['pages']
+        ))
+        with self.assertNumQueries(0):
+            self.client.get(reverse('posts:index'))
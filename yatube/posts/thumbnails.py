@@ -0,0 +1,139 @@
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.helpers import toint
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+from sorl.thumbnail.parsers import parse_geometry
+
+from jobs.queue import enqueue
+
+# Миниатюра картинки поста в ленте и на странице поста.
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+# Сколько секунд не ставить миниатюру поста в очередь повторно: задача
+# уже ждёт воркера. Если она так и не выполнилась, после этого срока
+# её поставит следующий запрос.
+THUMBNAIL_QUEUE_TIMEOUT = 10 * 60
+
+
+class BatchedKVStore(cached_db_kvstore.KVStore):
+    """Хранилище ключей sorl (кэш поверх базы) с чтением пачкой."""
+
+    def get_many(self, image_files):
+        """{key: ImageFile} для найденных файлов: один get_many в кэш
+        и не больше одного запроса к базе на промахи."""
+        keys = {add_prefix(image_file.key): image_file.key
+                for image_file in image_files}
+        values = self.cache.get_many(list(keys))
+        missing = [key for key in keys if key not in values]
+        if missing:
+            stored = dict(
+                KVStoreModel.objects.filter(key__in=missing)
+                .values_list('key', 'value')
+            )
+            # Как и _get_raw, запоминаем отсутствие ключа в кэше.
+            fetched = {
+                key: stored.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            self.cache.set_many(
+                fetched, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT
+            )
+            values.update(fetched)
+        return {
+            keys[key]: deserialize_image_file(value)
+            for key, value in values.items()
+            if value != cached_db_kvstore.EMPTY_VALUE
+        }
+
+
+def post_thumbnail(post):
+    return get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+def thumbnail_size(width, height):
+    """Размер миниатюры по размеру исходной картинки, как его
+    посчитает движок sorl (scale, затем crop)."""
+    options = {**default.backend.default_options, **THUMBNAIL_OPTIONS}
+    x, y = parse_geometry(THUMBNAIL_GEOMETRY, width / height)
+    factors = (x / width, y / height)
+    factor = max(factors) if options['crop'] else min(factors)
+    if factor < 1 or options['upscale']:
+        width, height = toint(width * factor), toint(height * factor)
+    if options['crop']:
+        width, height = min(width, x), min(height, y)
+    return width, height
+
+
+def thumbnail_file(image):
+    """Файл миниатюры, который get_thumbnail создаст для image.
+
+    Повторяет вычисление имени из ThumbnailBackend.get_thumbnail, но
+    не открывает ни картинку, ни хранилище.
+    """
+    backend = default.backend
+    source = ImageFile(image)
+    options = dict(THUMBNAIL_OPTIONS)
+    if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(thumbnail_settings, attr)
+        if value != getattr(default_settings, attr):
+            options.setdefault(key, value)
+    name = backend._get_thumbnail_filename(
+        source, THUMBNAIL_GEOMETRY, options
+    )
+    return ImageFile(name, default.storage)
+
+
+def cached_thumbnail(post):
+    """Готовая миниатюра из хранилища ключей sorl или None.
+
+    В отличие от {% thumbnail %} не создаёт миниатюру при промахе,
+    а ставит в очередь фоновую задачу make_thumbnail.
+    """
+    thumbnail = default.kvstore.get(thumbnail_file(post.image))
+    if thumbnail is None:
+        queue_thumbnails([post])
+    return thumbnail
+
+
+def queue_thumbnails(posts):
+    """Ставит в очередь make_thumbnail для постов без миниатюры.
+
+    Пост ставится не чаще раза в THUMBNAIL_QUEUE_TIMEOUT: cache.add
+    атомарен, и одну миниатюру не готовят несколько задач сразу.
+    """
+    for post in posts:
+        archived = post._meta.model_name == 'archivedpost'
+        key = f'thumbnail_queued:{post._meta.label_lower}:{post.pk}'
+        if cache.add(key, True, THUMBNAIL_QUEUE_TIMEOUT):
+            # Путь, а не функция: posts.tasks импортирует этот модуль.
+            enqueue('posts.tasks.make_thumbnail', post.pk, archived=archived)
+
+
+def resolve_thumbnails(posts, queue=True):
+    """Находит готовые миниатюры для всех постов страницы разом.
+
+    Результат кладётся в post.thumbnail (None, если миниатюры ещё нет),
+    и {% post_image %} уже не обращается к хранилищу ключей сам.
+    Недостающие миниатюры ставятся в очередь, если queue.
+    """
+    posts = list(posts)
+    files = {
+        post.pk: thumbnail_file(post.image) for post in posts if post.image
+    }
+    found = default.kvstore.get_many(files.values())
+    for post in posts:
+        image_file = files.get(post.pk)
+        post.thumbnail = found.get(image_file.key) if image_file else None
+    if queue:
+        queue_thumbnails(
+            post for post in posts if post.image and post.thumbnail is None
+        )
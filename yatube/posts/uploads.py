@@ -0,0 +1,200 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, SkipFile
+from PIL import Image, ImageOps
+
+# Сколько первых байт файла копить, пытаясь прочитать заголовок картинки.
+HEADER_LIMIT = 256 * 1024
+# Форматы, которые пересохраняем при уменьшении или повороте; прочие
+# (например, анимированные GIF) не трогаем, пока они не слишком большие.
+REENCODE_FORMATS = ('JPEG', 'PNG', 'WEBP')
+EXIF_ORIENTATION = 0x0112
+# APP1 (EXIF, XMP), APP13 (IPTC) и COM.
+STRIPPED_JPEG_MARKERS = (0xE1, 0xED, 0xFE)
+COPY_CHUNK = 64 * 1024
+
+
+def read_image_size(head):
+    """Размер картинки по началу файла или None, если заголовка мало.
+
+    Image.open читает только заголовок, пиксели не декодируются.
+    """
+    try:
+        with Image.open(BytesIO(head)) as image:
+            return image.size
+    except Image.DecompressionBombError:
+        raise
+    except Exception:
+        return None
+
+
+def get_upload_errors(request):
+    return getattr(request, 'upload_errors', {})
+
+
+class ImageUploadHandler(FileUploadHandler):
+    """Отклоняет слишком большие файлы прямо во время загрузки.
+
+    Размер файла проверяется по мере поступления данных, размеры
+    картинки — по заголовку из первых HEADER_LIMIT байт (нет заголовка —
+    файл отклоняется). Отклонённый файл
+    пропускается без буферизации, причина попадает в
+    request.upload_errors и показывается в форме.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.head = b''
+        self.checked = False
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.IMAGE_UPLOAD_MAX_SIZE:
+            self.reject(
+                'Файл больше '
+                f'{settings.IMAGE_UPLOAD_MAX_SIZE // (1024 * 1024)} МБ'
+            )
+        if not self.checked:
+            self.check_header(raw_data)
+        return raw_data
+
+    def check_header(self, raw_data):
+        self.head += raw_data
+        try:
+            size = read_image_size(self.head)
+        except Image.DecompressionBombError:
+            size = (settings.IMAGE_MAX_PIXELS + 1, 1)
+        if size is None and len(self.head) < HEADER_LIMIT:
+            return
+        self.checked = True
+        self.head = b''
+        if size is None:
+            # Заголовок можно отодвинуть мусорными сегментами; без него
+            # разрешение не проверить до декодирования.
+            self.reject('Не удалось прочитать размеры картинки')
+        if size[0] * size[1] > settings.IMAGE_MAX_PIXELS:
+            self.reject('Слишком большое разрешение картинки')
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        raise SkipFile(message)
+
+    def file_complete(self, file_size):
+        return None
+
+
+def strip_jpeg_metadata(source, target):
+    """Копирует JPEG без сегментов APP1 (EXIF, XMP), APP13 и комментариев.
+
+    Пиксели не декодируются и не пережимаются: после маркера SOS
+    данные копируются как есть.
+    """
+    source.seek(0)
+    if source.read(2) != b'\xff\xd8':
+        raise ValueError('Not a JPEG file')
+    target.write(b'\xff\xd8')
+    while True:
+        marker = source.read(2)
+        # Перед маркером допускаются байты-заполнители 0xFF.
+        while marker == b'\xff\xff':
+            marker = b'\xff' + source.read(1)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError('Broken JPEG marker')
+        if marker[1] == 0xDA:
+            target.write(marker)
+            break
+        length_bytes = source.read(2)
+        length = int.from_bytes(length_bytes, 'big')
+        segment = source.read(length - 2)
+        if marker[1] not in STRIPPED_JPEG_MARKERS:
+            target.write(marker + length_bytes + segment)
+    for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+        target.write(chunk)
+
+
+def normalize_image(upload):
+    """Уменьшает картинку до IMAGE_MAX_DIMENSION и убирает EXIF.
+
+    JPEG подходящего размера очищается от метаданных без
+    перекодирования. Битые файлы дают OSError или ValueError, слишком
+    большое разрешение — Image.DecompressionBombError.
+    """
+    max_size = (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+    upload.seek(0)
+    image = Image.open(upload)
+    # Заголовок при загрузке мог не найтись или лгать: проверяем
+    # разрешение ещё раз, до декодирования пикселей.
+    if image.width * image.height > settings.IMAGE_MAX_PIXELS:
+        raise Image.DecompressionBombError(
+            f'Image size ({image.width}x{image.height}) exceeds '
+            f'IMAGE_MAX_PIXELS ({settings.IMAGE_MAX_PIXELS})'
+        )
+    image_format = image.format
+    oversized = image.width > max_size[0] or image.height > max_size[1]
+    rotated = image.getexif().get(EXIF_ORIENTATION, 1) != 1
+    if not oversized and not rotated:
+        if image_format == 'JPEG':
+            output = SpooledTemporaryFile(settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+            strip_jpeg_metadata(upload, output)
+            return as_upload(output, upload.name, image_format)
+        if image_format not in REENCODE_FORMATS:
+            upload.seek(0)
+            return upload
+    return run_processing(resize_image, image, upload.name, rotated)
+
+
+def resize_image(image, name, rotated):
+    max_size = (settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION)
+    image_format = image.format
+    image.thumbnail(max_size, Image.LANCZOS)
+    if rotated:
+        image = ImageOps.exif_transpose(image)
+    if image_format not in REENCODE_FORMATS:
+        image_format = 'PNG'
+        name = f'{os.path.splitext(name)[0]}.png'
+    if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    output = SpooledTemporaryFile(settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    save_options = {'optimize': True}
+    if image_format == 'JPEG':
+        save_options['quality'] = 85
+    image.save(output, image_format, **save_options)
+    return as_upload(output, name, image_format)
+
+
+def as_upload(output, name, image_format):
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(
+        output, name=name, size=size, content_type=Image.MIME[image_format]
+    )
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def run_processing(func, *args):
+    """Выполняет func в общем пуле из IMAGE_PROCESSING_CONCURRENCY потоков.
+
+    Декодируют картинки только эти потоки, а не потоки запросов: память
+    под пиксели, которую malloc держит за каждым потоком и после
+    освобождения, не растёт с числом одновременных загрузок.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                settings.IMAGE_PROCESSING_CONCURRENCY,
+                thread_name_prefix='image-processing',
+            )
+    return _pool.submit(func, *args).result()
@@ -6,6 +6,9 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='groups'),
+    path('groups/autocomplete/', views.group_autocomplete,
+         name='group_autocomplete'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     # Профайл пользователя
     path('profile/<str:username>/', views.profile, name='profile'),
@@ -1,54 +1,123 @@
+from django.http import Http404, JsonResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.utils.cache import patch_cache_control
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
-from django.views.decorators.cache import cache_page
+from django.db import IntegrityError, transaction
 
-from .models import Post, Group, User
+from core.pagecache import split_cache_page
+from core.pagination import TieredPaginator
+from jobs.queue import enqueue
+
+from .archive import count_posts, get_post, has_archive
+from .comments import get_comments
 from .forms import PostForm, CommentForm
+from .groups import search_groups
+from .lookups import groups_by_slug, users_by_username
+from .models import ArchivedPost, Post, Purge
+from .purge import PURGED_USERS_TAG, hidden_ids, visible_posts
+from .stats import get_group_directory
+from .tasks import make_thumbnail
+from .thumbnails import resolve_thumbnails
+from .uploads import get_upload_errors
 
 POST_FILTER = 10
+# Ленты показывают готовый анонс, полный текст из базы не читаем.
+FEED_DEFER = ('text', 'text_html')
+
+
+def feed_paginator(posts, archived_posts):
+    """Лента с продолжением в архиве: архивные посты старше всех
+    остальных и читаются, только когда страница доходит до них."""
+    def prepare(queryset):
+        return visible_posts(
+            queryset.select_related('author', 'group').defer(*FEED_DEFER)
+        )
+    tail = prepare(archived_posts) if has_archive() else None
+    return TieredPaginator(prepare(posts), tail, POST_FILTER)
+
+
+def group_tags(slug):
+    group = groups_by_slug.get(slug)
+    return [f'group:{group.pk}'] if group else []
 
 
-@cache_page(20, key_prefix='index_page')
+def author_tags(username):
+    author = users_by_username.get(username)
+    return [f'user:{author.pk}'] if author else []
+
+
+@split_cache_page()
 def index(request):
-    posts = Post.objects.all()
-    paginator = Paginator(posts, POST_FILTER)
+    # Страницы без COUNT по всей таблице.
+    paginator = feed_paginator(Post.objects.all(), ArchivedPost.objects.all())
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    resolve_thumbnails(page_obj)
 
     context = {
-        'posts': posts,
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@split_cache_page(tags=group_tags)
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, POST_FILTER)
+    group = groups_by_slug.get_or_404(slug)
+    if group.pk in hidden_ids(Purge.GROUP):
+        raise Http404('Группа удалена')
+    paginator = feed_paginator(group.posts.all(), group.archived_posts.all())
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    resolve_thumbnails(page_obj)
     context = {'group': group,
                'page_obj': page_obj,
                }
     return render(request, 'posts/group_list.html', context)
 
 
-def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    count_posts = Post.objects.filter(author=author).count()
-    profile_list = author.posts.select_related(
-        'group', 'author')
+def group_index(request):
+    hidden = hidden_ids(Purge.GROUP)
+    directory = [
+        entry for entry in get_group_directory()
+        if entry['group'].pk not in hidden
+    ]
+    paginator = Paginator(directory, POST_FILTER)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    context = {'page_obj': page_obj}
+    return render(request, 'posts/groups.html', context)
+
+
+def group_autocomplete(request):
+    """Группы для поля поиска в форме поста: ?q= — начало названия
+    или slug."""
+    term = request.GET.get('q', '').strip()
+    results = [
+        {'id': group['pk'], 'title': group['title'], 'slug': group['slug']}
+        for group in search_groups(term)
+    ] if term else []
+    response = JsonResponse({'results': results})
+    patch_cache_control(response, max_age=60)
+    return response
+
 
-    paginator = Paginator(profile_list, POST_FILTER)
+@split_cache_page(tags=author_tags)
+def profile(request, username):
+    author = users_by_username.get_or_404(username)
+    if not author.is_active and author.pk in hidden_ids(Purge.USER):
+        raise Http404('Пользователь удалён')
+    paginator = feed_paginator(
+        author.posts.all(), author.archived_posts.all()
+    )
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
+    resolve_thumbnails(page_obj)
 
     context = {
         'author': author,
         'username': username,
-        'count_posts': count_posts,
+        'count_posts': count_posts(author=author),
         'page_obj': page_obj,
     }
     return render(request, 'posts/profile.html', context)
@@ -62,22 +131,52 @@ def add_comment(request, post_id):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        try:
+            with transaction.atomic():
+                comment.save()
+        except IntegrityError:
+            # Пост успели перенести в архив: он только для чтения,
+            # показываем его архивную страницу.
+            pass
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@split_cache_page(tags=lambda post_id: [f'post:{post_id}', PURGED_USERS_TAG])
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_count = Post.objects.filter(author=post.author).count()
-    title_post = post.text[:30]
+    post = get_post(
+        Post.objects.select_related('author', 'group').defer('text'),
+        ArchivedPost.objects.select_related('author', 'group').defer('text'),
+        post_id,
+    )
+    if post is None:
+        raise Http404('Пост не найден')
+    # Удалённый автор всегда отключён, кэш проверяем только для таких.
+    if not post.author.is_active and post.author_id in hidden_ids(
+        Purge.USER
+    ):
+        raise Http404('Пользователь удалён')
+    archived = isinstance(post, ArchivedPost)
+    post_count = count_posts(author=post.author_id)
+    title_post = post.excerpt[:30]
     form = CommentForm()
-    comments = post.comments.all()
+    window = get_comments(post.pk, archived=archived)
+    comments = window['comments']
+    # Комментарии удалённых авторов скрыты до фоновой очистки; окна
+    # с ними schedule_deletion сбросил, поэтому такие авторы отключены.
+    if any(not comment.author.is_active for comment in comments):
+        hidden = hidden_ids(Purge.USER)
+        comments = [
+            comment for comment in comments
+            if comment.author_id not in hidden
+        ]
     author = post.author
     context = {
         'post': post,
         'post_count': post_count,
+        'archived': archived,
         'title_post': title_post,
         'comments': comments,
+        'has_more_comments': window['has_more'],
         'form': form,
         'author': author,
     }
@@ -87,12 +186,15 @@ def post_detail(request, post_id):
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None,
-                    files=request.FILES or None,)
+                    files=request.FILES or None,
+                    upload_errors=get_upload_errors(request))
     if request.method == 'POST':
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
             form.save()
+            if post.image:
+                enqueue(make_thumbnail, post.pk)
             return redirect('posts:profile', post.author)
     return render(request, 'posts/create_post.html', {'form': form})
 
@@ -112,9 +214,13 @@ def post_edit(request, post_id):
     if request.user != post.author:
         return redirect('posts:post_detail', post_id)
     if request.method == 'POST':
-        form = PostForm(request.POST or None, files=request.FILES or None, instance=post)
+        form = PostForm(request.POST or None, files=request.FILES or None,
+                        instance=post,
+                        upload_errors=get_upload_errors(request))
         if form.is_valid():
             form.save()
+            if 'image' in form.changed_data and post.image:
+                enqueue(make_thumbnail, post.pk)
             return redirect('posts:post_detail', post_id)
         return render(request, 'posts/create_post.html', {'form': form})
     return render(request, 'posts/create_post.html', context)
@@ -0,0 +1,108 @@
+import time
+
+from django.urls import reverse
+
+from core.templates import warm_templates
+from core.warmup import run_concurrently, warm_pages
+
+from .models import Post, Purge
+from .purge import hidden_ids, visible_posts
+from .stats import get_group_directory
+from .thumbnails import post_thumbnail, resolve_thumbnails
+from .views import POST_FILTER
+
+# Сколько прогревать по умолчанию (см. manage.py warm_caches).
+WARM_PAGES = 3
+WARM_GROUPS = 10
+WARM_PROFILES = 20
+WARM_POSTS = 30
+WARM_WORKERS = 4
+
+
+def target(view_name, *args):
+    return view_name, reverse(view_name, args=args)
+
+
+def warm_targets(pages=WARM_PAGES, groups=WARM_GROUPS,
+                 profiles=WARM_PROFILES, posts=WARM_POSTS):
+    """Что прогревать: [(имя view, адрес)] и посты с картинками,
+    которые видны на этих страницах.
+
+    Посещения не записываются, поэтому самые читаемые страницы
+    угадываются: первые pages страниц главной, ленты groups групп
+    с наибольшим числом постов, профили авторов и сами посты
+    с первых страниц главной — на них ведёт больше всего переходов.
+    """
+    feed = list(
+        visible_posts(Post.objects.select_related('author'))
+        .only('image', 'author__username')[:pages * POST_FILTER]
+    )
+    index = reverse('posts:index')
+    targets = [('posts:index', index)] + [
+        ('posts:index', f'{index}?page={number}')
+        for number in range(2, pages + 1)
+    ]
+    shown = list(feed)
+    hidden = hidden_ids(Purge.GROUP)
+    top_groups = [
+        entry['group'] for entry in get_group_directory()
+        if entry['group'].pk not in hidden
+    ][:groups]
+    for group in top_groups:
+        targets.append(target('posts:group_list', group.slug))
+        shown += visible_posts(group.posts.only('image'))[:POST_FILTER]
+    authors = list(dict.fromkeys(post.author for post in feed))[:profiles]
+    for author in authors:
+        targets.append(target('posts:profile', author.username))
+        shown += author.posts.only('image')[:POST_FILTER]
+    targets += [target('posts:post_detail', post.pk) for post in feed[:posts]]
+    with_images = {post.pk: post for post in shown if post.image}
+    return targets, list(with_images.values())
+
+
+def warm_thumbnails(posts, workers=WARM_WORKERS):
+    """Читает записи о миниатюрах постов в кэш одним запросом
+    и создаёт недостающие миниатюры в workers потоках.
+
+    Возвращает результаты run_concurrently для созданных.
+    """
+    resolve_thumbnails(posts, queue=False)
+    missing = [post for post in posts if post.thumbnail is None]
+    return run_concurrently(post_thumbnail, missing, workers)
+
+
+def warm_caches(pages=WARM_PAGES, groups=WARM_GROUPS,
+                profiles=WARM_PROFILES, posts=WARM_POSTS,
+                workers=WARM_WORKERS, host=None, thumbnails=True):
+    """Прогревает шаблоны, миниатюры и кэш страниц после запуска.
+
+    Миниатюры готовятся до страниц, чтобы в кэш не попали страницы
+    без картинок. При thumbnails=False (запуск воркера) их не создаём:
+    недостающие уйдут в очередь фоновых задач. Возвращает словарь
+    с результатами и временем (в секундах) каждого шага.
+    """
+    report = {}
+    started = time.perf_counter()
+    report['templates'] = warm_templates()
+    report['templates_time'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    targets, shown = warm_targets(pages, groups, profiles, posts)
+    report['thumbnails_checked'] = len(shown)
+    if thumbnails:
+        report['thumbnails'] = warm_thumbnails(shown, workers)
+    else:
+        resolve_thumbnails(shown)
+        report['thumbnails'] = []
+    report['thumbnails_time'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    views = {url: name for name, url in targets}
+    report['pages'] = [
+        (views[url], url, result, seconds)
+        for url, result, seconds in warm_pages(
+            [url for _, url in targets], workers, host
+        )
+    ]
+    report['pages_time'] = time.perf_counter() - started
+    return report
@@ -0,0 +1,29 @@
+// Подсказки групп для поля с data-autocomplete-url (posts.forms).
+document.querySelectorAll('input[data-autocomplete-url]').forEach(
+  function (input) {
+    var options = document.getElementById(input.getAttribute('list'));
+    var timer = null;
+    input.addEventListener('input', function () {
+      var term = input.value.trim();
+      clearTimeout(timer);
+      if (!term) {
+        return;
+      }
+      timer = setTimeout(function () {
+        var url = input.dataset.autocompleteUrl + '?q=' +
+          encodeURIComponent(term);
+        fetch(url)
+          .then(function (response) { return response.json(); })
+          .then(function (data) {
+            options.innerHTML = '';
+            data.results.forEach(function (group) {
+              var option = document.createElement('option');
+              option.value = group.slug;
+              option.label = group.title;
+              options.appendChild(option);
+            });
+          });
+      }, 200);
+    });
+  }
+);
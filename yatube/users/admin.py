@@ -1,3 +1,16 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
 
+from posts.admin import BackgroundDeleteMixin
 
-# Register your models here.
+User = get_user_model()
+
+
+class PurgingUserAdmin(BackgroundDeleteMixin, UserAdmin):
+    """Удалённый пользователь отключается сразу, а его посты
+    и комментарии вычищаются в фоне."""
+
+
+admin.site.unregister(User)
+admin.site.register(User, PurgingUserAdmin)
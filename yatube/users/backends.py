@@ -0,0 +1,18 @@
+from django.contrib.auth.backends import ModelBackend
+
+from posts.lookups import users_by_id
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    Запись сбрасывается сигналом при сохранении пользователя, в том
+    числе при смене пароля и last_login. В LRU процесса пользователи
+    не попадают: вместе с ними там жили бы хэши паролей.
+    """
+
+    def get_user(self, user_id):
+        user = users_by_id.get(user_id)
+        if user is None or not self.user_can_authenticate(user):
+            return None
+        return user
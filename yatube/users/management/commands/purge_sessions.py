@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет истёкшие сессии пачками. Запускается по расписанию, '
+        'например из cron раз в сутки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.1,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_sessions(
+            options['batch_size'], options['pause']
+        )
+        self.stdout.write(f'Удалено сессий: {deleted}')
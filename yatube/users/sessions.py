@@ -0,0 +1,34 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.utils import timezone
+
+
+def get_session_model():
+    """Модель сессий текущего движка или None, если он не в базе."""
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    get_model_class = getattr(store, 'get_model_class', None)
+    return get_model_class() if get_model_class else None
+
+
+def purge_expired_sessions(batch_size=1000, pause=0):
+    """Удаляет истёкшие сессии пачками и возвращает их число.
+
+    В отличие от clearsessions не держит одну длинную транзакцию
+    над всей таблицей.
+    """
+    model = get_session_model()
+    if model is None:
+        return 0
+    deleted = 0
+    while True:
+        pks = list(
+            model.objects.filter(expire_date__lt=timezone.now())
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return deleted
+        deleted += model.objects.filter(pk__in=pks).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -1,3 +1,77 @@
+from datetime import timedelta
+from io import StringIO
 
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
 
-# Create your tests here.
+from posts.lookups import users_by_id
+
+from .backends import CachedModelBackend
+from .sessions import purge_expired_sessions
+
+User = get_user_model()
+
+
+class PurgeSessionsTest(TestCase):
+    def create_sessions(self, prefix, count, expire_date):
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'{prefix}{number}',
+                session_data='',
+                expire_date=expire_date,
+            )
+            for number in range(count)
+        )
+
+    def test_purge_in_batches(self):
+        """Истёкшие сессии удаляются пачками, живые остаются."""
+        now = timezone.now()
+        self.create_sessions('old', 5, now - timedelta(days=1))
+        self.create_sessions('new', 2, now + timedelta(days=1))
+        with self.assertNumQueries(3 * 2 + 1):
+            self.assertEqual(purge_expired_sessions(batch_size=2), 5)
+        self.assertEqual(Session.objects.count(), 2)
+
+    def test_command(self):
+        self.create_sessions('old', 3, timezone.now() - timedelta(days=1))
+        call_command('purge_sessions', pause=0, stdout=StringIO())
+        self.assertFalse(Session.objects.exists())
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookies_have_nothing_to_purge(self):
+        self.assertEqual(purge_expired_sessions(), 0)
+
+
+class CachedModelBackendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_authenticate(self):
+        user = User.objects.create_user('reader', password='password')
+        self.assertEqual(authenticate(username='reader', password='password'),
+                         user)
+        self.assertIsNone(authenticate(username='reader', password='wrong'))
+        self.assertIsNone(authenticate(username='nobody', password='wrong'))
+
+    def test_wrong_password_returns_none(self):
+        """Неверный пароль — None, а не PermissionDenied: следующие
+        бэкенды тоже получают шанс."""
+        User.objects.create_user('reader', password='password')
+        self.assertIsNone(CachedModelBackend().authenticate(
+            None, username='reader', password='wrong'
+        ))
+
+    def test_session_user_not_kept_in_process(self):
+        """Пользователь сессии (и хэш его пароля) не остаётся в LRU
+        процесса."""
+        user = User.objects.create_user('reader', password='password')
+        self.assertEqual(CachedModelBackend().get_user(user.pk), user)
+        with self.assertNumQueries(0):
+            self.assertEqual(CachedModelBackend().get_user(user.pk), user)
+        self.assertEqual(len(users_by_id._local), 0)
@@ -0,0 +1,23 @@
+"""Выбор профиля настроек.
+
+Профиль задаётся переменной окружения YATUBE_ENV: dev (по умолчанию),
+test или prod. Профиль можно указать и напрямую через
+DJANGO_SETTINGS_MODULE=yatube.settings.<профиль>.
+"""
+import os
+from importlib import import_module
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('dev', 'test', 'prod')
+
+YATUBE_ENV = os.environ.get('YATUBE_ENV', 'dev')
+if YATUBE_ENV not in PROFILES:
+    raise ImproperlyConfigured(
+        f'YATUBE_ENV={YATUBE_ENV!r}, ожидается одно из: {", ".join(PROFILES)}'
+    )
+
+_profile = import_module(f'{__name__}.{YATUBE_ENV}')
+globals().update(
+    (name, value) for name, value in vars(_profile).items() if name.isupper()
+)
@@ -0,0 +1,280 @@
+"""
+Django settings for yatube3 project.
+
+Общие настройки всех окружений; профили dev, test и prod
+переопределяют их (см. yatube/settings/__init__.py).
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = '%2fxsk%3%7*$nz_rvgyuonmdf^1e*8(n67*__@2crnm72zr3y2'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+
+# Application definition
+
+INSTALLED_APPS = [
+    'about.apps.AboutConfig',
+    'core.apps.CoreConfig',
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'jobs.apps.JobsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+# Сюда collectstatic собирает статику для боевого окружения.
+STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
+# Встраивать стили первого экрана в base.html (см. core/templatetags).
+INLINE_CRITICAL_CSS = False
+
+# Сессии: 'cached_db' — кэш поверх базы, 'signed_cookies' — данные
+# в подписанной куке без обращений к базе (выход не отзывает куку,
+# скопированную на другое устройство), 'db' — только база.
+SESSION_MODE = os.environ.get('SESSION_MODE', 'cached_db')
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + SESSION_MODE
+
+# Пользователь сессии читается из кэша (users/backends.py).
+# ModelBackend нужен только сессиям, созданным до его появления; пока
+# он в списке, неверный пароль проверяется обоими бэкендами.
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+# LOGOUT_REDIRECT_URL = 'posts:index'
+
+# Письма ставятся в очередь (jobs/mail.py) и уходят пачками из
+# run_worker через EMAIL_DELIVERY_BACKEND.
+EMAIL_BACKEND = 'jobs.mail.QueuedEmailBackend'
+#  подключаем движок filebased.EmailBackend
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# указываем директорию, в которую будут складываться файлы писем
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+# Писем за одно соединение; повтор через EMAIL_RETRY_DELAY секунд,
+# дальше задержка удваивается.
+EMAIL_BATCH_SIZE = 100
+EMAIL_MAX_ATTEMPTS = 5
+EMAIL_RETRY_DELAY = 60
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Отдавать media через core.media.serve, когда DEBUG выключен.
+MEDIA_SERVE = False
+# Передать отдачу файла веб-серверу: 'nginx' (X-Accel-Redirect),
+# 'apache' (X-Sendfile) или пусто — отдавать самим.
+MEDIA_SENDFILE = ''
+# internal location в nginx, указывающий на MEDIA_ROOT.
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'thumbnails': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'thumbnails',
+    },
+}
+
+# Записи sorl о миниатюрах: кэш поверх таблицы в базе, ленты читают
+# их пачкой на страницу (см. posts/thumbnails.py). Отдельный кэш,
+# чтобы их не вытесняли страницы и не сбрасывала очистка default.
+THUMBNAIL_KVSTORE = 'posts.thumbnails.BatchedKVStore'
+THUMBNAIL_CACHE = 'thumbnails'
+
+# Лимит страниц 404 на один IP за окно в секундах, после которого
+# отдаётся короткий ответ без шаблона.
+NOT_FOUND_RATE_LIMIT = 50
+NOT_FOUND_RATE_WINDOW = 60
+
+# Кэш страниц целиком (см. core/pagecache.py): имя view → время жизни
+# в секундах. Для авторизованных кэшируется оболочка страницы без
+# фрагментов, зависящих от пользователя. PAGE_CACHE_ESI отдаёт оболочку
+# прокси с поддержкой ESI (заголовок Surrogate-Capability) как есть
+# и открывает ему адреса фрагментов /holes/<имя>/.
+PAGE_CACHE_TIMEOUTS = {
+    'posts:index': 20,
+    'posts:group_list': 60,
+    'posts:profile': 60,
+    'posts:post_detail': 60,
+}
+PAGE_CACHE_ESI = False
+# Сколько секунд после срока страница ещё отдаётся из кэша, пока её
+# перерисовывает один запрос; остальные не ждут и не рисуют её сами.
+PAGE_CACHE_STALE = 30
+
+# До скольких групп форма поста показывает их списком <select>
+# (список кэшируется), дальше — полем с поиском по началу названия.
+GROUP_SELECT_LIMIT = 200
+
+# Лимиты запросов на запись (см. core/ratelimit.py): имя view →
+# скорость пополнения ведра ('10/m') и его объём. Считаются отдельно
+# для каждого пользователя, для анонимов — для каждого IP.
+RATELIMIT_ENABLED = True
+RATELIMIT_METHODS = ('POST',)
+RATELIMITS = {
+    'posts:post_create': {'rate': '10/m', 'burst': 5},
+    'posts:add_comment': {'rate': '30/m', 'burst': 10},
+    'users:signup': {'rate': '10/h', 'burst': 3},
+}
+
+
+# Загрузка картинок (см. posts/uploads.py): файлы больше
+# IMAGE_UPLOAD_MAX_SIZE и картинки больше IMAGE_MAX_PIXELS отклоняются
+# по ходу загрузки, остальные уменьшаются до IMAGE_MAX_DIMENSION.
+FILE_UPLOAD_HANDLERS = [
+    'posts.uploads.ImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+IMAGE_UPLOAD_MAX_SIZE = 25 * 1024 * 1024
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_MAX_DIMENSION = 2560
+IMAGE_PROCESSING_CONCURRENCY = 2
+
+# Очередь фоновых задач в базе (см. jobs/queue.py и manage.py run_worker).
+# JOBS_EAGER выполняет задачи сразу при постановке, без воркера.
+JOBS_EAGER = False
+JOBS_WORKER_PROCESSES = 2
+# Задержка первого повтора в секундах, дальше она удваивается.
+JOBS_RETRY_DELAY = 30
+# Через сколько секунд задача «выполняется» считается брошенной.
+JOBS_TIMEOUT = 600
+# Сколько секунд хранить выполненные и упавшие задачи; старые удаляет
+# run_worker.
+JOBS_KEEP_DONE = 24 * 60 * 60
+JOBS_KEEP_FAILED = 7 * 24 * 60 * 60
+
+# Архив старых постов (см. posts/archive.py и manage.py archive_posts):
+# посты старше ARCHIVE_AFTER_DAYS дней переносятся вместе с комментариями
+# в отдельные таблицы пачками по ARCHIVE_BATCH_SIZE. None — архив
+# выключен, и ленты не заглядывают в архивные таблицы.
+ARCHIVE_AFTER_DAYS = None
+ARCHIVE_BATCH_SIZE = 500
+
+# Фоновая очистка удалённых пользователей и групп (см. posts/purge.py):
+# строк в одной транзакции, пауза между пачками и сколько секунд задача
+# работает до того, как передать остаток следующей (меньше JOBS_TIMEOUT).
+PURGE_BATCH_SIZE = 1000
+PURGE_PAUSE = 0.01
+PURGE_TIME_BUDGET = 60
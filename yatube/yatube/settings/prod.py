@@ -0,0 +1,94 @@
+import copy
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['SECRET_KEY']
+
+ALLOWED_HOSTS = os.environ.get('ALLOWED_HOSTS', '').split()
+
+# Без контекстного процессора debug; шаблоны читаются и разбираются
+# один раз на процесс.
+TEMPLATES = copy.deepcopy(TEMPLATES)
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    processor
+    for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.template.context_processors.debug'
+]
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+# Постоянные соединения с базой вместо нового на каждый запрос.
+DATABASES = {
+    'default': {
+        'ENGINE': os.environ.get(
+            'DB_ENGINE', 'django.db.backends.postgresql'
+        ),
+        'NAME': os.environ.get('DB_NAME', 'yatube'),
+        'USER': os.environ.get('DB_USER', ''),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', ''),
+        'PORT': os.environ.get('DB_PORT', ''),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+    }
+}
+
+# Общий для всех воркеров кэш.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+    },
+    'thumbnails': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', '127.0.0.1:11211'),
+        'KEY_PREFIX': 'thumbnails',
+    },
+}
+
+# Хеш в именах файлов статики и сжатые копии .gz/.br; статику отдаёт
+# core.static.StaticFiles с Cache-Control immutable (см. yatube/wsgi.py).
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+STATIC_SERVE = True
+INLINE_CRITICAL_CSS = True
+
+# Письма из очереди уходят через SMTP, одно соединение на пачку.
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+EMAIL_HOST = os.environ.get('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.environ.get('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.environ.get('EMAIL_USE_TLS') == '1'
+EMAIL_TIMEOUT = 10
+
+MEDIA_SERVE = True
+MEDIA_SENDFILE = os.environ.get('MEDIA_SENDFILE', '')
+
+# Прогревать кэш шаблонов при старте воркера (см. yatube/wsgi.py).
+WARM_TEMPLATES_ON_STARTUP = True
+# Прогревать кэш страниц при старте воркера. Нужно, только если
+# CACHE_BACKEND — LocMemCache; общий кэш прогревает один
+# manage.py warm_caches после выкладки.
+WARM_CACHES_ON_STARTUP = os.environ.get('WARM_CACHES_ON_STARTUP') == '1'
+
+# Отказываться запускаться с заведомо медленной конфигурацией
+# (см. core/checks.py).
+PERFORMANCE_CHECKS = True
+
+# Архив старых постов: возраст в днях из окружения, без него выключен.
+if os.environ.get('ARCHIVE_AFTER_DAYS'):
+    ARCHIVE_AFTER_DAYS = int(os.environ['ARCHIVE_AFTER_DAYS'])
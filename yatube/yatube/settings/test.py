@@ -0,0 +1,22 @@
+import tempfile
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = False
+
+# Быстрый хешер паролей: в тестах стойкость не нужна.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+# Тесты шлют формы подряд от одного клиента; лимиты проверяются
+# в core/tests.py.
+RATELIMIT_ENABLED = False
+
+# Ответ из кэша не несёт context и шаблонов, которые проверяют тесты;
+# кэш страниц проверяется в core/tests.py.
+PAGE_CACHE_TIMEOUTS = {'posts:index': 20}
+
+# Загруженные в тестах картинки не попадают в media проекта.
+MEDIA_ROOT = tempfile.mkdtemp(prefix='yatube-media-')
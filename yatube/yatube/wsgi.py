@@ -14,3 +14,29 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if getattr(settings, 'PERFORMANCE_CHECKS', False):
+    from core.checks import ensure_fast_configuration
+
+    ensure_fast_configuration()
+
+if getattr(settings, 'WARM_TEMPLATES_ON_STARTUP', False):
+    from core.templates import warm_templates
+
+    warm_templates()
+
+if getattr(settings, 'WARM_CACHES_ON_STARTUP', False):
+    from posts.warmup import warm_caches
+
+    # Миниатюры готовит manage.py warm_caches, а не каждый воркер.
+    warm_caches(thumbnails=False)
+
+
+if getattr(settings, 'STATIC_SERVE', False):
+    from core.static import StaticFiles
+
+    application = StaticFiles(
+        application, settings.STATIC_ROOT, settings.STATIC_URL
+    )